@@ -1,72 +1,136 @@
-import os, io
-from flask import Flask, request, jsonify, send_from_directory
-from PIL import Image
-from pydantic import BaseModel, Field
-from google import genai
-from dotenv import load_dotenv
-from flask_cors import CORS
-
-load_dotenv()
-
-# Config
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-MODEL_ID = "gemini-2.0-flash" 
-
-app = Flask(__name__, static_folder='web')
-CORS(app)  # Enable CORS for web frontend and Unity
-client = genai.Client(api_key=GEMINI_API_KEY)
-
-# Serve web frontend
-@app.route('/')
-def serve_index():
-    return send_from_directory('web', 'index.html')
-
-@app.route('/<path:filename>')
-def serve_static(filename):
-    return send_from_directory('web', filename)
-
-# --- Schema for Structured Output ---
-class Ingredient(BaseModel):
-    label: str = Field(description="Singular lowercase name of food")
-    box_2d: list[int] = Field(description="Normalized [ymin, xmin, ymax, xmax] (0-1000)")
-
-class Recipe(BaseModel):
-    title: str
-    description: str
-    uses: list[str]
-
-class AnalysisResponse(BaseModel):
-    ingredients: list[Ingredient]
-    recipes: list[Recipe]
-
-# --- Optimized Multimodal Prompt ---
-PROMPT = """
-Identify all raw food ingredients in this image. 
-1. Provide a bounding box [ymin, xmin, ymax, xmax] (normalized 0-1000) for each.
-2. Suggest 3-5 realistic recipes using these items.
-Return strictly JSON matching the schema.
-"""
-
-@app.post("/analyze_frame")
-def analyze_frame():
-    if "file" not in request.files:
-        return jsonify({"error": "No file"}), 400
-    
+import argparse, asyncio, ssl, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+from server import create_app
+
+# WSGI entry point (e.g. `gunicorn backend:app`)
+app = create_app()
+
+CERT_FILE = "cert.pem"
+KEY_FILE = "key.pem"
+
+
+# ----------------------------
+# Sync (Flask) serving
+# ----------------------------
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles requests on a fixed-size thread pool."""
+
+    multithread = True
+
+    def __init__(self, host, port, app, workers=8, ssl_context=None):
+        super().__init__(host, port, app, ssl_context=ssl_context)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"http-{port}")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _ssl_context(args):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(args.cert, args.key)
+    return context
+
+
+def _listeners(args):
+    out = []
+    if args.http_port:
+        out.append((args.http_port, None))
+    if args.https_port:
+        out.append((args.https_port, _ssl_context(args)))
+    return out
+
+
+def serve_sync(args):
+    servers = [
+        PooledWSGIServer(args.host, port, app, workers=args.workers, ssl_context=ctx)
+        for port, ctx in _listeners(args)
+    ]
+    threads = [threading.Thread(target=s.serve_forever, daemon=True) for s in servers]
+    for t in threads:
+        t.start()
     try:
-        f = request.files["file"].read()
-        img = Image.open(io.BytesIO(f)).convert("RGB")
-        
-        response = client.models.generate_content(
-            model=MODEL_ID,
-            contents=[PROMPT, img],
-            config={
-                "response_mime_type": "application/json",
-                "response_json_schema": AnalysisResponse.model_json_schema(),
-            }
-        )
-        return response.text
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        for s in servers:
+            s.shutdown()
+
+
+# ----------------------------
+# Async (ASGI) serving
+# ----------------------------
+def serve_async(args):
+    import uvicorn
+
+    listeners = _listeners(args)
+    ssl_kwargs = {"ssl_certfile": args.cert, "ssl_keyfile": args.key}
+
+    if args.workers > 1:
+        # uvicorn forks one process per worker; each worker gets its own cache.
+        if len(listeners) != 1:
+            sys.exit("--workers > 1 with --async needs exactly one listener")
+        port, ctx = listeners[0]
+        uvicorn.run("backend_async:app", host=args.host, port=port, workers=args.workers,
+                    **(ssl_kwargs if ctx else {}))
+        return
+
+    from backend_async import app as asgi_app
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(asgi_app, host=args.host, port=port, **(ssl_kwargs if ctx else {})))
+        for port, ctx in listeners
+    ]
+
+    async def run_all():
+        await asyncio.gather(*(s.serve() for s in servers))
+
+    asyncio.run(run_all())
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Recipefy AR backend")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--http-port", type=int, default=5000, help="0 disables plain HTTP")
+    p.add_argument("--https-port", type=int, default=0, help="0 disables HTTPS")
+    p.add_argument("--cert", default=CERT_FILE)
+    p.add_argument("--key", default=KEY_FILE)
+    p.add_argument("--workers", type=int, default=None,
+                   help="request threads (sync, default 8) or worker processes (--async, default 1)")
+    p.add_argument("--async", dest="use_async", action="store_true",
+                   help="serve through the ASGI app (backend_async.py)")
+    args = p.parse_args(argv)
+    if not args.http_port and not args.https_port:
+        p.error("enable at least one of --http-port / --https-port")
+    if args.workers is None:
+        args.workers = 1 if args.use_async else 8
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    for port, ctx in _listeners(args):
+        scheme = "https" if ctx else "http"
+        print(f"🚀 Recipefy AR Server listening on {scheme}://{args.host}:{port}")
+    if args.https_port:
+        print("🔒 Note: You'll need to accept the SSL certificate warning")
+
+    if args.use_async:
+        serve_async(args)
+    else:
+        serve_sync(args)
+
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+    main()
@@ -0,0 +1,333 @@
+import asyncio, os, sys
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from server import (
+    BATCH_MAX_FRAMES, MODEL_ID, PROFILE_ADMIN_TOKEN, RECIPE_BUDGET_SECONDS, SERVER_TIMING, SSE_HEADERS, WEB_DIR, batch_contents, batch_generation_config,
+    cache_header, client, constraints_from, decode_frame, finish_chunk, frame_cache, frame_gate,
+    generation_config, is_reused, known_labels_from, labels_of, lazy_components, lookup_frame, model_contents, prepare_batch,
+    recipe_stage, remember_frame, session_id_for, start_warmup, with_recipes,
+)
+from ingredients import normalize_ingredient
+from lazy import readiness
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ASGIMetrics, CallbackGauge, span, upstream_call
+from metrics import render as render_metrics
+from mosaic import parse_tiles, untile
+from profiler import ADMIN_TOKEN_HEADER, ASGIProfile, admin_request as profile_admin_request
+from streaming import AnalysisEventStream, replay_events, sse
+
+# Config
+# Upstream calls allowed at once; everything above this waits in the queue.
+MAX_CONCURRENCY = int(os.environ.get("ASYNC_MAX_CONCURRENCY", "64"))
+# Requests allowed to wait for an upstream slot before we shed load.
+MAX_QUEUE = int(os.environ.get("ASYNC_MAX_QUEUE", "256"))
+# Wall-clock budget for one /analyze_frame request, queueing included.
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("ASYNC_REQUEST_DEADLINE", "20"))
+RETRY_AFTER_SECONDS = int(os.environ.get("ASYNC_RETRY_AFTER", "2"))
+
+# Created lazily so it binds to the running event loop.
+_upstream_slots: asyncio.Semaphore | None = None
+_waiting = 0
+_in_flight = 0
+# recipe_key -> pending generation, so concurrent frames share one call
+_recipe_tasks: dict[str, asyncio.Future] = {}
+
+CallbackGauge("recipefy_upstream_in_flight", "Model calls holding an upstream slot.", lambda: _in_flight)
+CallbackGauge("recipefy_upstream_waiting", "Requests queued for an upstream slot.", lambda: _waiting)
+
+
+def _slots() -> asyncio.Semaphore:
+    global _upstream_slots
+    if _upstream_slots is None:
+        _upstream_slots = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _upstream_slots
+
+
+def _overloaded(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status,
+                        headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+async def _call_model(kind: str, contents: list, config: dict) -> str:
+    global _waiting, _in_flight
+    _waiting += 1
+    try:
+        await _slots().acquire()
+    finally:
+        _waiting -= 1
+
+    _in_flight += 1
+    try:
+        with upstream_call(kind):
+            response = await client.aio.models.generate_content(
+                model=MODEL_ID,
+                contents=contents,
+                config=config,
+            )
+        return response.text
+    finally:
+        _in_flight -= 1
+        _slots().release()
+
+
+async def _generate_recipes(ingredients: list[str], key: str, constraints: dict) -> list:
+    text = await _call_model("recipes", recipe_stage.contents(ingredients, constraints), recipe_stage.config())
+    return recipe_stage.store(key, text)
+
+
+async def _recipes_for(labels: list[str], constraints: dict) -> list:
+    ingredients, key = recipe_stage.key_for(labels, constraints)
+    if not ingredients:
+        return []
+    cached = recipe_stage.cache.get(key)
+    if cached is not None:
+        return cached
+
+    task = _recipe_tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_recipes(ingredients, key, constraints))
+        _recipe_tasks[key] = task
+        task.add_done_callback(lambda _t: _recipe_tasks.pop(key, None))
+    # shield: one caller timing out must not cancel the others' generation
+    if RECIPE_BUDGET_SECONDS is None:
+        return await asyncio.shield(task)
+    done, _pending = await asyncio.wait([task], timeout=RECIPE_BUDGET_SECONDS)
+    return task.result() if done else []
+
+
+# ----------------------------
+# Routes
+# ----------------------------
+async def analyze_frame(request):
+    # Shed load before reading the body if the upstream queue is full.
+    if _waiting >= MAX_QUEUE:
+        return _overloaded(429, "Too many queued frames")
+
+    with span("parse"):
+        form = await request.form()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "read"):
+        return JSONResponse({"error": "No file"}, status_code=400)
+    try:
+        tiles = parse_tiles(form.get("tiles"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        async with asyncio.timeout(REQUEST_DEADLINE_SECONDS):
+            raw = await upload.read()
+            img, key = await asyncio.to_thread(decode_frame, raw)
+
+            session_id = session_id_for(request.headers, request.cookies,
+                                        request.client.host if request.client else None)
+            detection, source, frame = await asyncio.to_thread(lookup_frame, img, key, session_id)
+            if detection is None:
+                if _waiting >= MAX_QUEUE:
+                    return _overloaded(429, "Too many queued frames")
+                text = await _call_model("detect", model_contents(img), generation_config())
+                detection = remember_frame(key, session_id, frame, text)
+
+            if tiles:
+                detection = untile(detection, tiles)
+            labels = labels_of(detection) + known_labels_from(form)
+            recipes = await _recipes_for(labels, constraints_from(form))
+    except TimeoutError:
+        return _overloaded(503, "Deadline exceeded")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    with span("serialize"):
+        return JSONResponse(with_recipes(detection, recipes, is_reused(source)), headers=cache_header(source))
+
+
+async def analyze_frame_stream(request):
+    if _waiting >= MAX_QUEUE:
+        return _overloaded(429, "Too many queued frames")
+
+    with span("parse"):
+        form = await request.form()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "read"):
+        return JSONResponse({"error": "No file"}, status_code=400)
+    if form.get("tiles"):
+        return JSONResponse({"error": "Crop mosaics are only supported by /analyze_frame"}, status_code=400)
+
+    try:
+        raw = await upload.read()
+        img, key = await asyncio.to_thread(decode_frame, raw)
+        session_id = session_id_for(request.headers, request.cookies,
+                                    request.client.host if request.client else None)
+        constraints = constraints_from(form)
+        detection, source, frame = await asyncio.to_thread(lookup_frame, img, key, session_id)
+        if detection is not None:
+            recipes = await _recipes_for(labels_of(detection), constraints)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    headers = {**SSE_HEADERS, **cache_header(source)}
+    if detection is not None:
+        events = replay_events(with_recipes(detection, recipes, is_reused(source)))
+        return StreamingResponse(iter(events), media_type="text/event-stream", headers=headers)
+
+    async def stream_detection(stream):
+        global _waiting, _in_flight
+        _waiting += 1
+        try:
+            await _slots().acquire()
+        finally:
+            _waiting -= 1
+        _in_flight += 1
+        try:
+            with upstream_call("stream"):
+                async for chunk in await client.aio.models.generate_content_stream(
+                    model=MODEL_ID,
+                    contents=model_contents(img),
+                    config=generation_config(),
+                ):
+                    for ev in stream.on_chunk(chunk.text or ""):
+                        yield ev
+        finally:
+            # Release before the recipe stage takes its own slot.
+            _in_flight -= 1
+            _slots().release()
+
+    async def events():
+        stream = AnalysisEventStream()
+        try:
+            async with asyncio.timeout(REQUEST_DEADLINE_SECONDS):
+                async for ev in stream_detection(stream):
+                    yield ev
+                detection = remember_frame(key, session_id, frame, stream.text)
+                recipes = await _recipes_for(labels_of(detection), constraints)
+                for ev in stream.finish(with_recipes(detection, recipes, reused=False)):
+                    yield ev
+        except TimeoutError:
+            yield sse("error", {"error": "Deadline exceeded"})
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+async def _with_recipes(result: dict, constraints: dict) -> dict:
+    if "error" in result:
+        return result
+    try:
+        recipes = await _recipes_for(labels_of(result), constraints)
+    except Exception as e:
+        return {"index": result["index"], "error": str(e)}
+    return {"index": result["index"], **with_recipes(result, recipes, result["reused"])}
+
+
+async def analyze_frames(request):
+    if _waiting >= MAX_QUEUE:
+        return _overloaded(429, "Too many queued frames")
+
+    with span("parse"):
+        form = await request.form()
+    uploads = [u for u in form.getlist("file") + form.getlist("files") if hasattr(u, "read")]
+    if not uploads:
+        return JSONResponse({"error": "No file"}, status_code=400)
+    if len(uploads) > BATCH_MAX_FRAMES:
+        return JSONResponse({"error": f"At most {BATCH_MAX_FRAMES} frames per batch"}, status_code=413)
+
+    async def run_chunk(chunk):
+        frames = [frame for _i, frame, _key in chunk]
+        try:
+            text = await _call_model("batch", batch_contents(frames), batch_generation_config())
+            finish_chunk(results, chunk, text)
+        except Exception as e:
+            finish_chunk(results, chunk, None, e)
+
+    try:
+        async with asyncio.timeout(REQUEST_DEADLINE_SECONDS):
+            raws = [await u.read() for u in uploads]
+            results, chunks = await asyncio.to_thread(prepare_batch, raws)
+            await asyncio.gather(*(run_chunk(c) for c in chunks))
+            results = await asyncio.gather(*(_with_recipes(r, constraints_from(form)) for r in results))
+    except TimeoutError:
+        return _overloaded(503, "Deadline exceeded")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    with span("serialize"):
+        return JSONResponse({"results": results})
+
+
+async def cache_stats(request):
+    return JSONResponse({
+        **frame_cache.stats(),
+        "frame_gate": frame_gate.stats(),
+        "recipe_cache": recipe_stage.cache.stats(),
+        "normalize_cache": normalize_ingredient.cache_info()._asdict(),
+    })
+
+
+async def queue_stats(request):
+    return JSONResponse({
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+        "max_concurrency": MAX_CONCURRENCY,
+        "max_queue": MAX_QUEUE,
+    })
+
+
+async def metrics(request):
+    return Response(render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def admin_profile(request):
+    status, body, content_type = profile_admin_request(
+        request.method, request.headers.get(ADMIN_TOKEN_HEADER), request.query_params, PROFILE_ADMIN_TOKEN)
+    if content_type is None:
+        return JSONResponse(body, status_code=status)
+    return Response(body, status_code=status, headers={"Content-Type": content_type})
+
+
+async def ready(request):
+    body, ok = readiness(lazy_components())
+    return JSONResponse(body, status_code=200 if ok else 503)
+
+
+async def serve_index(request):
+    return FileResponse(os.path.join(WEB_DIR, "index.html"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_warmup()  # each worker process warms its own client / detector
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/analyze_frame", analyze_frame, methods=["POST"]),
+        Route("/analyze_frames", analyze_frames, methods=["POST"]),
+        Route("/analyze_frame_stream", analyze_frame_stream, methods=["POST"]),
+        Route("/cache_stats", cache_stats),
+        Route("/queue_stats", queue_stats),
+        Route("/ready", ready),
+        Route("/metrics", metrics),
+        Route("/admin/profile", admin_profile, methods=["GET", "POST", "DELETE"]),
+        Route("/", serve_index),
+        Mount("/", StaticFiles(directory=WEB_DIR)),
+    ],
+    middleware=[
+        Middleware(ASGIMetrics, server_timing=SERVER_TIMING),
+        Middleware(ASGIProfile),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=["Server-Timing"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    from backend import main
+    main(["--async"] + sys.argv[1:])
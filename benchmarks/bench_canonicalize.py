@@ -0,0 +1,97 @@
+"""
+Recipe-cache key fragmentation and per-label cost of ingredient normalization.
+
+    python benchmarks/bench_canonicalize.py [--sets 2000] [--seed 0]
+
+Simulates a stream of frames whose labels are noisy spellings of a few
+ingredients (plurals, case, dropped/doubled/swapped letters, as vision models
+produce) and counts distinct recipe_key values: the old regex +
+naive-singular rules vs the canonical index. Every extra key is a recipe
+cache miss, i.e. an upstream call.
+"""
+import argparse, os, random, re, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingredients import CANONICAL_NAMES, SYNONYMS, normalize_ingredient  # noqa: E402
+from recipe_stage import recipe_key  # noqa: E402
+
+
+def old_normalize(name):
+    # The rules before the canonical index, for comparison.
+    s = name.strip().lower()
+    s = re.sub(r"[^a-z0-9\s\-]", "", s)
+    s = re.sub(r"\s+", " ", s)
+    if s in SYNONYMS:
+        s = SYNONYMS[s]
+    if s.endswith("es") and len(s) > 4:
+        s = s[:-2]
+    elif s.endswith("s") and len(s) > 3:
+        s = s[:-1]
+    return s
+
+
+def noisy(name, rng):
+    r = rng.random()
+    if r < 0.25:
+        name = name + ("es" if name.endswith(("o", "ch", "sh")) else "s")
+    elif r < 0.35 and len(name) > 5:
+        i = rng.randrange(1, len(name) - 1)
+        name = name[:i] + name[i + 1:]               # dropped letter
+    elif r < 0.45 and len(name) > 5:
+        i = rng.randrange(1, len(name) - 1)
+        name = name[:i] + name[i] + name[i:]         # doubled letter
+    if rng.random() < 0.3:
+        name = name.capitalize()
+    return name
+
+
+def keys(normalize, frames):
+    out = set()
+    for labels in frames:
+        items = []
+        for label in labels:
+            n = normalize(label)
+            if n and n not in items:
+                items.append(n)
+        out.add(recipe_key(items))
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sets", type=int, default=2000, help="frames to simulate")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    # A handful of scenes, each seen many times with noisy labels.
+    scenes = [rng.sample(CANONICAL_NAMES, 3) for _ in range(20)]
+    frames = [[noisy(n, rng) for n in rng.choice(scenes)] for _ in range(args.sets)]
+    labels = [label for f in frames for label in f]
+
+    old_keys = keys(old_normalize, frames)
+    new_keys = keys(normalize_ingredient, frames)
+    print(f"frames={len(frames)} scenes={len(scenes)} distinct labels={len(set(labels))}")
+    print(f"{'rules':>10} {'recipe keys':>12} {'extra misses':>13}")
+    print(f"{'old':>10} {len(old_keys):>12} {len(old_keys) - len(scenes):>13}")
+    print(f"{'canonical':>10} {len(new_keys):>12} {len(new_keys) - len(scenes):>13}")
+
+    normalize_ingredient.cache_clear()
+    t0 = time.perf_counter()
+    for label in set(labels):
+        normalize_ingredient(label)
+    cold = (time.perf_counter() - t0) * 1e6 / len(set(labels))
+    t0 = time.perf_counter()
+    for label in labels:
+        normalize_ingredient(label)
+    warm = (time.perf_counter() - t0) * 1e6 / len(labels)
+    t0 = time.perf_counter()
+    for label in labels:
+        old_normalize(label)
+    old = (time.perf_counter() - t0) * 1e6 / len(labels)
+    print(f"us/label: old {old:.2f}, canonical cold {cold:.1f}, canonical memoized {warm:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Load test for the HF classifier backend (legacy/backend2.py): per-request
+forward passes vs the micro-batching worker.
+
+    HF_MODEL_ID=... python benchmarks/bench_classifier_batching.py [--clients 16] [--requests 20]
+
+Each client thread sends `--requests` frames back to back. "per-request" is
+backend2.classify (FastPreprocessor + a batch-of-one forward pass, from the
+caller's thread); "batched" goes through backend2.batcher.
+"""
+import argparse, os, sys, threading, time
+
+import numpy as np
+from PIL import Image
+
+LEGACY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legacy")
+sys.path.insert(0, LEGACY)
+
+os.environ.setdefault("BATCHING", "1")
+import backend2  # noqa: E402  (the model loads lazily, on the warm-up calls in main)
+
+
+def frame(seed, size=(640, 480)):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8))
+
+
+def load(fn, clients, requests):
+    images = [frame(i) for i in range(clients)]
+    latencies = [[] for _ in range(clients)]
+    start = threading.Barrier(clients + 1)
+
+    def client(i):
+        start.wait()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            fn(images[i])
+            latencies[i].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    lat = np.array([x for per in latencies for x in per]) * 1000
+    return len(lat) / wall, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--requests", type=int, default=20)
+    args = p.parse_args()
+
+    if backend2.batcher is None:
+        sys.exit("BATCHING=0 disables the batcher; unset it to run this benchmark")
+
+    # warm up both paths (the first call also builds the model)
+    backend2.classify(frame(0))
+    backend2.batcher(frame(0))
+
+    print(f"model={backend2.MODEL_ID} device={backend2.classifier.device} "
+          f"runtime={backend2.RUNTIME} MAX_BATCH={backend2.MAX_BATCH} MAX_WAIT_MS={backend2.MAX_WAIT_MS}")
+    print(f"{'path':>12} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, fn in [("per-request", backend2.classify), ("batched", backend2.batcher)]:
+        rps, p50, p99 = load(fn, args.clients, args.requests)
+        print(f"{name:>12} {args.clients:>8} {rps:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+    print("batcher:", backend2.batcher.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cold start, memory, latency and accuracy of the classifier runtimes in
+legacy/backend2.py (fp32 torch vs ONNX Runtime fp32 vs int8).
+
+    cd legacy && python export_onnx.py --out onnx_model
+    ONNX_DIR=legacy/onnx_model python benchmarks/bench_classifier_runtimes.py [--images DIR] [--iters 50]
+
+Each runtime is measured in a fresh process so import-to-ready time and
+resident memory are not shared. "ready" is backend2 imported (model loaded)
+plus one inference. With --images, DIR is laid out as DIR/<label>/*.jpg:
+top-1 accuracy is checked against the folder name, and "agree" is the share
+of images where the runtime's top-1 matches fp32 torch.
+"""
+import argparse, json, os, resource, subprocess, sys, time
+
+LEGACY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legacy")
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def folder_images(root):
+    for label in sorted(os.listdir(root)):
+        sub = os.path.join(root, label)
+        if not os.path.isdir(sub):
+            continue
+        for name in sorted(os.listdir(sub)):
+            if name.lower().endswith(IMAGE_EXTS):
+                yield label, os.path.join(sub, name)
+
+
+def child(args):
+    sys.path.insert(0, LEGACY)
+    import numpy as np
+    from PIL import Image
+
+    import backend2
+
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8))
+    backend2.classify(img)
+    ready_at = time.time()
+
+    lat = []
+    for _ in range(args.iters):
+        t0 = time.perf_counter()
+        backend2.classify(img)
+        lat.append((time.perf_counter() - t0) * 1000)
+
+    preds, correct = [], 0
+    if args.images:
+        for label, path in folder_images(args.images):
+            top = backend2.classify(Image.open(path).convert("RGB"))
+            pred = top[0] if top else ""
+            preds.append(pred)
+            correct += pred == backend2.normalize_label(label)
+
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+    print(json.dumps({
+        "ready_at": ready_at,
+        "rss_mb": rss_kb / 1024,
+        "mean_ms": float(np.mean(lat)),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "accuracy": (correct / len(preds)) if preds else None,
+        "preds": preds,
+    }))
+
+
+def run(runtime, args):
+    env = dict(os.environ, RUNTIME=runtime, BATCHING="0")
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--iters", str(args.iters)]
+    if args.images:
+        cmd += ["--images", args.images]
+    t0 = time.time()
+    out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["ready_s"] = result["ready_at"] - t0
+    return result
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--runtimes", default="torch,onnx,int8")
+    p.add_argument("--iters", type=int, default=50)
+    p.add_argument("--images", help="folder of DIR/<label>/*.jpg for accuracy")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        return child(args)
+
+    results = {rt: run(rt, args) for rt in args.runtimes.split(",")}
+    ref = results.get("torch", {}).get("preds")
+
+    print(f"{'runtime':>8} {'ready s':>8} {'rss MB':>8} {'mean ms':>8} {'p50 ms':>8} {'top-1':>7} {'agree':>7}")
+    for rt, r in results.items():
+        acc = f"{r['accuracy']:.3f}" if r["accuracy"] is not None else "-"
+        agree = "-"
+        if ref and r["preds"]:
+            agree = f"{sum(a == b for a, b in zip(ref, r['preds'])) / len(ref):.3f}"
+        print(f"{rt:>8} {r['ready_s']:>8.2f} {r['rss_mb']:>8.0f} {r['mean_ms']:>8.2f} {r['p50_ms']:>8.2f} {acc:>7} {agree:>7}")
+
+
+if __name__ == "__main__":
+    main()
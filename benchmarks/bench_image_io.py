@@ -0,0 +1,71 @@
+"""
+Per-frame transcoding cost of /analyze_frame uploads.
+
+    python benchmarks/bench_image_io.py [--iters 20]
+
+"baseline" is the old path: full decode to RGB, then the SDK re-encodes the
+PIL image for the request. "fast" is image_io.prepare_frame plus the hash.
+"""
+import argparse, io, os, sys, time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_cache import dhash
+from image_io import IMAGE_MAX_LONG_EDGE, prepare_frame
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def synthetic_jpeg(w, h, quality=80):
+    # Smooth gradients plus noise so the JPEG size resembles a camera frame.
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:h, 0:w]
+    base = np.stack([(xx * 255 // w), (yy * 255 // h), ((xx + yy) * 127 // (w + h))], axis=-1)
+    noise = rng.integers(0, 24, size=(h, w, 3))
+    arr = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def baseline(raw):
+    img = Image.open(io.BytesIO(raw)).convert("RGB")
+    dhash(img)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG")
+    return len(buf.getvalue())
+
+
+def fast(raw):
+    frame = prepare_frame(raw)
+    dhash(frame.thumb)
+    return len(frame.data)
+
+
+def timed(fn, raw, iters):
+    fn(raw)  # warm up
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        nbytes = fn(raw)
+    return (time.perf_counter() - t0) * 1000 / iters, nbytes
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--iters", type=int, default=20)
+    args = p.parse_args()
+
+    print(f"IMAGE_MAX_LONG_EDGE={IMAGE_MAX_LONG_EDGE}")
+    print(f"{'res':>6} {'upload':>10} {'base ms':>8} {'base bytes':>11} {'fast ms':>8} {'fast bytes':>11} {'speedup':>8}")
+    for name, (w, h) in RESOLUTIONS.items():
+        raw = synthetic_jpeg(w, h)
+        b_ms, b_bytes = timed(baseline, raw, args.iters)
+        f_ms, f_bytes = timed(fast, raw, args.iters)
+        print(f"{name:>6} {len(raw):>10} {b_ms:>8.2f} {b_bytes:>11} {f_ms:>8.2f} {f_bytes:>11} {b_ms / f_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Import cost of each server entry point, from `python -X importtime`.
+
+    python benchmarks/bench_import_time.py [--max-ms 800] [--top 5]
+
+Models and clients are built on first use (lazy.py), so importing a server
+module should not pull in torch, transformers, google.genai, onnxruntime or
+ultralytics. The script exits non-zero when a module imports one of those or
+takes longer than --max-ms, so it can run as a regression check.
+"""
+import argparse, os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, directory it is imported from)
+TARGETS = [
+    ("server", ROOT),
+    ("backend_async", ROOT),
+    ("app", os.path.join(ROOT, "legacy")),
+    ("backend2", os.path.join(ROOT, "legacy")),
+    ("vision", os.path.join(ROOT, "legacy")),
+]
+
+HEAVY = ("torch", "transformers", "google.genai", "onnxruntime", "ultralytics")
+
+
+def importtime(module, cwd):
+    env = dict(os.environ, WARMUP="0", PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("GEMINI_API_KEY", "unused")  # legacy config refuses to start without one
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return proc.returncode, proc.stderr, rows
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--max-ms", type=float, default=None, help="fail if any module takes longer")
+    p.add_argument("--top", type=int, default=5, help="heaviest top-level imports to list")
+    args = p.parse_args()
+
+    failed = False
+    print(f"{'module':>14} {'import ms':>10}  heavy deps / heaviest imports")
+    for module, cwd in TARGETS:
+        code, stderr, rows = importtime(module, cwd)
+        if code != 0:
+            errors = [l for l in stderr.splitlines() if l.strip() and not l.startswith("import time:")]
+            print(f"{module:>14} {'error':>10}  {errors[-1] if errors else f'exit code {code}'}")
+            failed = True
+            continue
+
+        # importtime lists a module's imports right before it, one level
+        # (two spaces) deeper; walk back from the target to collect its own.
+        idx = next(i for i, (_, _, name) in enumerate(rows) if name == f" {module}")
+        total_ms = rows[idx][1] / 1000
+        start = idx
+        while start > 0 and rows[start - 1][2].startswith("   "):
+            start -= 1
+        own = rows[start:idx]
+        heavy = sorted({name.strip() for _, _, name in own if name.strip() in HEAVY})
+        children = sorted((r for r in own if not r[2].startswith("    ")), key=lambda r: -r[1])[:args.top]
+        listing = ", ".join(f"{name.strip()} {c / 1000:.0f}ms" for _, c, name in children)
+
+        over = args.max_ms is not None and total_ms > args.max_ms
+        failed |= bool(heavy) or over
+        flag = ("HEAVY: " + ", ".join(heavy) + "; ") if heavy else ""
+        print(f"{module:>14} {total_ms:>10.1f}{'!' if over else ' '} {flag}{listing}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-frame cost and size of the session IngredientState as the label vocabulary grows.
+
+    python benchmarks/bench_ingredient_state.py [--frames 2000] [--labels 10 1000 100000]
+
+Each frame observes a handful of labels drawn from a vocabulary of --labels
+names (an open-vocabulary detector over a long session sees many). The
+array-backed legacy/state.py is compared with the dict implementation it
+replaced (kept below as DictIngredientState). Before timing, both are fed the
+same random streams and must agree on every `changed` result and confirmed
+set; --check-only runs just that.
+"""
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legacy"))
+
+from sessions import approx_size  # noqa: E402
+from state import IngredientState  # noqa: E402
+
+
+class DictIngredientState:
+    """The previous IngredientState: dict counters, every seen label walked per frame."""
+
+    def __init__(self, add_hits, remove_misses, stable_seconds):
+        self.add_hits = add_hits
+        self.remove_misses = remove_misses
+        self.stable_seconds = stable_seconds
+        self.hits, self.misses, self.confirmed = {}, {}, set()
+        self.last_changed_ts = time.time()
+
+    def update(self, observed):
+        now = time.time()
+        obs_set = set(observed)
+        for ing in obs_set:
+            self.hits[ing] = self.hits.get(ing, 0) + 1
+            self.misses[ing] = 0
+        for ing in list(self.hits.keys()):
+            if ing not in obs_set:
+                self.misses[ing] = self.misses.get(ing, 0) + 1
+                self.hits[ing] = 0
+        changed = False
+        for ing in obs_set:
+            if ing not in self.confirmed and self.hits.get(ing, 0) >= self.add_hits:
+                self.confirmed.add(ing)
+                changed = True
+        for ing in list(self.confirmed):
+            if self.misses.get(ing, 0) >= self.remove_misses:
+                self.confirmed.remove(ing)
+                changed = True
+        if changed:
+            self.last_changed_ts = now
+        return changed
+
+
+def stream(rng, vocab, frames, per_frame, sticky=0.7):
+    """Frames that mostly repeat the previous frame's labels, like a steady camera."""
+    current = rng.sample(range(vocab), min(per_frame, vocab))
+    for _ in range(frames):
+        current = [x if rng.random() < sticky else rng.randrange(vocab) for x in current]
+        yield [f"label{x}" for x in current[:rng.randint(0, per_frame)]]
+
+
+def check(runs, rng):
+    for run in range(runs):
+        add_hits, remove_misses = rng.randint(0, 4), rng.randint(0, 5)
+        vocab = rng.choice([3, 10, 50])
+        old = DictIngredientState(add_hits, remove_misses, 0.0)
+        new = IngredientState(add_hits, remove_misses, 0.0)
+        for t, observed in enumerate(stream(rng, vocab, 300, rng.randint(1, 6), sticky=rng.random())):
+            a, b = old.update(observed), new.update(observed)
+            if a != b or old.confirmed != new.confirmed:
+                sys.exit(f"mismatch: run {run} frame {t} add_hits={add_hits} remove_misses={remove_misses}"
+                         f" observed={observed} old={sorted(old.confirmed)} new={sorted(new.confirmed)}")
+            for label, i in new._ids.items():
+                if (old.hits[label], old.misses[label]) != (new._hits[i], new._misses[i]):
+                    sys.exit(f"counter mismatch for {label}: run {run} frame {t}")
+    print(f"equivalence: {runs} random streams agree")
+
+
+def bench(cls, vocab, frames, per_frame, seed):
+    state = cls(add_hits=2, remove_misses=3, stable_seconds=2.0)
+    observed = list(stream(random.Random(seed), vocab, frames, per_frame))
+    t0 = time.perf_counter()
+    for obs in observed:
+        state.update(obs)
+    us = (time.perf_counter() - t0) * 1e6 / frames
+    return us, len(state.hits), approx_size(state)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--frames", type=int, default=2000)
+    p.add_argument("--labels", type=int, nargs="+", default=[10, 1000, 100_000])
+    p.add_argument("--per-frame", type=int, default=8, help="labels observed per frame")
+    p.add_argument("--runs", type=int, default=300, help="random streams for the equivalence check")
+    p.add_argument("--check-only", action="store_true")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    check(args.runs, random.Random(args.seed))
+    if args.check_only:
+        return
+
+    print(f"{'labels':>8} {'impl':>6} {'us/frame':>9} {'tracked':>8} {'approx KB':>10}")
+    for vocab in args.labels:
+        for name, cls in (("dict", DictIngredientState), ("array", IngredientState)):
+            us, tracked, size = bench(cls, vocab, args.frames, args.per_frame, args.seed)
+            print(f"{vocab:>8} {name:>6} {us:>9.1f} {tracked:>8} {size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
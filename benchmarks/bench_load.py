@@ -0,0 +1,297 @@
+"""
+End-to-end load test for the /analyze_frame backends.
+
+    python benchmarks/fake_gemini.py --latency-ms 800 &
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8001 python backend.py &
+    python benchmarks/bench_load.py --concurrency 8 --requests 400 \\
+        --fake http://127.0.0.1:8001 --json results/before.json
+    ... change something, restart the backend ...
+    python benchmarks/bench_load.py ... --json results/after.json --compare results/before.json
+
+Works against backend.py / backend-https.py (--url https://... --insecure),
+backend_async.py, legacy/app.py and legacy/backend2.py (which needs no fake).
+Each of --concurrency clients is one camera: its own X-Session-Id, sending
+frames back to back (or every --interval-ms). Frames come from --frames DIR
+(image files, played in name order) or are synthetic: --scenes scenes of
+coloured shapes, held for --frames-per-scene frames each with small camera
+jitter and sensor noise, so frame caches and gates see realistic repeats.
+
+Reports requests/s, latency p50/p95/p99, status codes, X-Cache hit rates,
+and with --fake the upstream (model) calls per frame. Where the server has
+/metrics, it also checks that no metric family is exposed twice (Prometheus
+rejects such a scrape). --json writes the result for later --compare runs.
+"""
+import argparse, io, json, os, sys, threading, time
+from collections import Counter
+
+import httpx
+import numpy as np
+from PIL import Image, ImageDraw
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+# Metrics shown by --compare: (key path, label, True if higher is better)
+COMPARE = [
+    (("rps",), "req/s", True),
+    (("latency_ms", "p50"), "p50 ms", False),
+    (("latency_ms", "p95"), "p95 ms", False),
+    (("latency_ms", "p99"), "p99 ms", False),
+    (("error_rate",), "error rate", False),
+    (("cache_hit_rate",), "cache hit rate", True),
+    (("upstream", "calls_per_frame"), "upstream calls/frame", False),
+]
+
+
+# ----------------------------
+# Frames
+# ----------------------------
+def synthetic_frames(scenes, per_scene, size=(640, 480), quality=85, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(scenes):
+        bg = tuple(int(c) for c in rng.integers(40, 200, 3))
+        shapes = [(tuple(int(c) for c in rng.integers(0, 256, 3)),
+                   int(rng.integers(0, size[0] - 160)), int(rng.integers(0, size[1] - 160)),
+                   int(rng.integers(60, 160)))
+                  for _ in range(int(rng.integers(2, 6)))]
+        for _ in range(per_scene):
+            dx, dy = (int(v) for v in rng.integers(-4, 5, 2))   # hand-held camera jitter
+            img = Image.new("RGB", size, bg)
+            draw = ImageDraw.Draw(img)
+            for color, x, y, r in shapes:
+                draw.ellipse([x + dx, y + dy, x + dx + r, y + dy + r], fill=color)
+            arr = np.asarray(img, dtype=np.int16) + rng.integers(-6, 7, (size[1], size[0], 3))
+            buf = io.BytesIO()
+            Image.fromarray(arr.clip(0, 255).astype(np.uint8)).save(buf, format="JPEG", quality=quality)
+            out.append(buf.getvalue())
+    return out
+
+
+def recorded_frames(folder):
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTS))
+    if not names:
+        sys.exit(f"no {'/'.join(IMAGE_EXTS)} files in {folder}")
+    frames = []
+    for n in names:
+        with open(os.path.join(folder, n), "rb") as f:
+            frames.append(f.read())
+    return frames
+
+
+# ----------------------------
+# Load
+# ----------------------------
+def percentiles(values):
+    if not values:
+        return {}
+    a = np.array(values)
+    return {
+        "mean": round(float(a.mean()), 2),
+        "p50": round(float(np.percentile(a, 50)), 2),
+        "p95": round(float(np.percentile(a, 95)), 2),
+        "p99": round(float(np.percentile(a, 99)), 2),
+        "max": round(float(a.max()), 2),
+    }
+
+
+def get_json(client, url):
+    try:
+        r = client.get(url)
+        return r.json() if r.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def duplicate_families(client, url):
+    """Metric families with more than one # TYPE line, or None without /metrics."""
+    try:
+        r = client.get(url)
+    except httpx.HTTPError:
+        return None
+    if r.status_code != 200:
+        return None
+    types = Counter(line.split()[2] for line in r.text.splitlines() if line.startswith("# TYPE "))
+    return sorted(name for name, n in types.items() if n > 1)
+
+
+def run_load(args, frames):
+    results = []           # (latency ms, first byte ms, status code, X-Cache, body status)
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + args.duration if args.duration else None
+    remaining = [args.requests]
+    start = threading.Barrier(args.concurrency + 1)
+
+    def next_ticket():
+        with lock:
+            if stop_at is not None:
+                return time.perf_counter() < stop_at
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def camera(i):
+        headers = {"X-Session-Id": f"bench-{i}"}
+        pos = i * len(frames) // args.concurrency   # cameras start at different scenes
+        with httpx.Client(timeout=args.timeout, verify=not args.insecure) as client:
+            start.wait()
+            while next_ticket():
+                raw = frames[pos % len(frames)]
+                pos += 1
+                files = {"file": ("frame.jpg", raw, "image/jpeg")}
+                t0 = time.perf_counter()
+                first = None
+                try:
+                    with client.stream("POST", args.url, files=files, headers=headers) as resp:
+                        chunks = []
+                        for chunk in resp.iter_bytes():
+                            if first is None:
+                                first = time.perf_counter()
+                            chunks.append(chunk)
+                    status, cache = resp.status_code, resp.headers.get("X-Cache", "")
+                    body_status = ""
+                    content_type = resp.headers.get("Content-Type", "")
+                    if content_type.startswith("application/json"):
+                        try:
+                            body_status = json.loads(b"".join(chunks)).get("status", "")
+                        except (ValueError, AttributeError):
+                            pass
+                    elif content_type.startswith("text/event-stream") and b"event: error" in b"".join(chunks):
+                        status = "sse-error"   # streams report upstream failures in-band
+                except httpx.HTTPError as e:
+                    status, cache, body_status = type(e).__name__, "", ""
+                end = time.perf_counter()
+                with lock:
+                    results.append(((end - t0) * 1000, ((first or end) - t0) * 1000, status, cache, body_status))
+                if args.interval_ms:
+                    time.sleep(max(0.0, args.interval_ms / 1000 - (end - t0)))
+
+    threads = [threading.Thread(target=camera, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - t0
+
+
+def summarize(args, results, wall, upstream, cache_stats, duplicates=None):
+    n = len(results)
+    ok = [r for r in results if r[2] == 200]
+    statuses = Counter(str(r[2]) for r in results)
+    caches = Counter(r[3] or "-" for r in ok)
+    body = Counter(r[4] for r in ok if r[4])
+    served = sum(caches[k] for k in ("HIT", "REUSED")) + sum(v for k, v in body.items() if k.endswith("_cached"))
+    out = {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "frames": "recorded:" + args.frames if args.frames else f"synthetic:{args.scenes}x{args.frames_per_scene}",
+        "requests": n,
+        "seconds": round(wall, 3),
+        "rps": round(n / wall, 2) if wall else 0.0,
+        "latency_ms": percentiles([r[0] for r in ok]),
+        "first_byte_ms": percentiles([r[1] for r in ok]),
+        "status": dict(statuses),
+        "error_rate": round(1 - len(ok) / n, 4) if n else 0.0,
+        "x_cache": dict(caches),
+        "body_status": dict(body),
+        "cache_hit_rate": round(served / len(ok), 4) if ok else 0.0,
+    }
+    if upstream is not None:
+        out["upstream"] = {**upstream, "calls_per_frame": round(upstream["calls"] / n, 4) if n else 0.0}
+    if cache_stats is not None:
+        out["server_cache_stats"] = cache_stats
+    if duplicates is not None:
+        out["metrics_duplicate_families"] = duplicates
+    return out
+
+
+def dig(d, path):
+    for k in path:
+        if not isinstance(d, dict) or k not in d:
+            return None
+        d = d[k]
+    return d
+
+
+def print_summary(r):
+    lat = r["latency_ms"]
+    print(f"{r['requests']} requests in {r['seconds']}s from {r['concurrency']} clients -> {r['rps']} req/s")
+    if lat:
+        print(f"latency ms: p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}"
+              f"  (first byte p50 {r['first_byte_ms']['p50']})")
+    print(f"status {r['status']}  x-cache {r['x_cache']}" + (f"  body {r['body_status']}" if r["body_status"] else ""))
+    print(f"cache hit rate {r['cache_hit_rate']:.1%}")
+    up = r.get("upstream")
+    if up:
+        print(f"upstream: {up['calls']} calls ({up['errors']} errors, {up['images']} images) "
+              f"= {up['calls_per_frame']} per frame, by schema {up['by_schema']}")
+    if r.get("metrics_duplicate_families"):
+        print(f"/metrics exposes these families more than once: {', '.join(r['metrics_duplicate_families'])}")
+
+
+def print_compare(before, after):
+    print(f"\n{'metric':>22} {'before':>10} {'after':>10} {'change':>9}")
+    for path, label, higher_better in COMPARE:
+        a, b = dig(before, path), dig(after, path)
+        if a is None or b is None:
+            continue
+        change = f"{(b - a) / a * 100:+.0f}%" if a else ""
+        better = (b > a) == higher_better if a != b else None
+        mark = {True: " better", False: " worse", None: ""}[better]
+        print(f"{label:>22} {a:>10} {b:>10} {change:>9}{mark}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--url", default="http://127.0.0.1:5000/analyze_frame")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--requests", type=int, default=200, help="total requests (ignored with --duration)")
+    p.add_argument("--duration", type=float, default=None, help="seconds to run instead of --requests")
+    p.add_argument("--interval-ms", type=float, default=0.0, help="per-client pacing, e.g. 500 for 2 fps")
+    p.add_argument("--frames", default=None, help="folder of recorded frames (jpg/png)")
+    p.add_argument("--scenes", type=int, default=6)
+    p.add_argument("--frames-per-scene", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--fake", default=None, help="fake_gemini.py base URL, for upstream call counts")
+    p.add_argument("--cache-stats", default=None, help="server stats URL (default: <url base>/cache_stats)")
+    p.add_argument("--metrics", default=None, help="server metrics URL (default: <url base>/metrics)")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--insecure", action="store_true", help="skip TLS verification (self-signed cert.pem)")
+    p.add_argument("--json", default=None, help="write results to this file")
+    p.add_argument("--compare", default=None, help="earlier --json output to compare against")
+    args = p.parse_args()
+
+    frames = recorded_frames(args.frames) if args.frames else \
+        synthetic_frames(args.scenes, args.frames_per_scene, seed=args.seed)
+
+    base = args.url.rsplit("/", 1)[0]
+    with httpx.Client(timeout=10.0, verify=not args.insecure) as admin:
+        before = get_json(admin, args.fake.rstrip("/") + "/stats") if args.fake else None
+        results, wall = run_load(args, frames)
+        after = get_json(admin, args.fake.rstrip("/") + "/stats") if args.fake else None
+        cache_stats = get_json(admin, args.cache_stats or base + "/cache_stats")
+        duplicates = duplicate_families(admin, args.metrics or base + "/metrics")
+
+    upstream = None
+    if before is not None and after is not None:
+        upstream = {k: after[k] - before[k] for k in ("calls", "streams", "errors", "images")}
+        upstream["by_schema"] = {k: v - before["by_schema"].get(k, 0) for k, v in after["by_schema"].items()
+                                 if v - before["by_schema"].get(k, 0)}
+
+    out = summarize(args, results, wall, upstream, cache_stats, duplicates)
+    print_summary(out)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(out, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_compare(json.load(f), out)
+    if duplicates:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
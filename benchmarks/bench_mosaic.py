@@ -0,0 +1,103 @@
+"""
+Upload size and image tokens of crop mosaics vs full frames, and box round-trip error.
+
+    python benchmarks/bench_mosaic.py [--frames 50] [--boxes 1 2 4 8]
+
+Frames are 1920x1080 synthetic tables with --boxes textured objects. "frame"
+is webcam_viewer's full-frame upload (downscaled to UPLOAD_MAX_LONG_EDGE,
+JPEG q80); "mosaic" sends the padded crops of the first `--new` objects
+(default: all of them). Tokens use Gemini's image accounting: 258 for an image
+within 384x384, else 258 per 768x768 tile. The round trip maps each object's
+true box into mosaic coordinates and back through mosaic.untile (as the
+server does); the error is in 0-1000 units.
+"""
+import argparse, math, os, sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mosaic import build_mosaic, untile  # noqa: E402
+
+UPLOAD_MAX_LONG_EDGE = 960
+UPLOAD_JPEG_QUALITY = 80
+
+
+def image_tokens(h, w):
+    if h <= 384 and w <= 384:
+        return 258
+    return math.ceil(h / 768) * math.ceil(w / 768) * 258
+
+
+def jpeg_bytes(img):
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, UPLOAD_JPEG_QUALITY])
+    return len(buf)
+
+
+def scene(rng, n, size=(1080, 1920)):
+    h, w = size
+    img = np.full((h, w, 3), rng.integers(60, 200, 3), np.uint8)
+    img = (img + rng.integers(-10, 11, img.shape)).clip(0, 255).astype(np.uint8)
+    boxes = []
+    for _ in range(n):
+        bh, bw = rng.integers(80, 260, 2)
+        y, x = rng.integers(0, h - bh), rng.integers(0, w - bw)
+        texture = rng.integers(0, 256, (bh // 8 + 1, bw // 8 + 1, 3)).astype(np.uint8)
+        img[y:y + bh, x:x + bw] = cv2.resize(texture, (int(bw), int(bh)), interpolation=cv2.INTER_LINEAR)
+        boxes.append([y * 1000 / h, x * 1000 / w, (y + bh) * 1000 / h, (x + bw) * 1000 / w])
+    return img, boxes
+
+
+def downscale(frame):
+    h, w = frame.shape[:2]
+    scale = UPLOAD_MAX_LONG_EDGE / max(h, w)
+    return cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def to_tile(box, tile):
+    """Frame box -> mosaic box through one tile (inverse of untile's mapping)."""
+    ty0, tx0, ty1, tx1 = tile["tile"]
+    fy0, fx0, fy1, fx1 = tile["frame"]
+    sy, sx = (ty1 - ty0) / (fy1 - fy0), (tx1 - tx0) / (fx1 - fx0)
+    return [ty0 + (box[0] - fy0) * sy, tx0 + (box[1] - fx0) * sx, ty0 + (box[2] - fy0) * sy, tx0 + (box[3] - fx0) * sx]
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--frames", type=int, default=50)
+    p.add_argument("--boxes", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--new", type=int, default=None, help="crops per mosaic (default: every box)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'boxes':>5} {'frame KB':>9} {'mosaic KB':>10} {'frame tok':>10} {'mosaic tok':>11} "
+          f"{'mosaic px':>10} {'max err':>8}")
+    for n in args.boxes:
+        fb, mb, ft, mt, err, px = [], [], [], [], 0.0, []
+        for _ in range(args.frames):
+            img, boxes = scene(rng, n)
+            small = downscale(img)
+            fb.append(jpeg_bytes(small))
+            ft.append(image_tokens(*small.shape[:2]))
+
+            sent = boxes[:args.new] if args.new else boxes
+            mosaic, tiles = build_mosaic(img, sent)
+            mb.append(jpeg_bytes(mosaic))
+            mt.append(image_tokens(*mosaic.shape[:2]))
+            px.append(f"{mosaic.shape[1]}x{mosaic.shape[0]}")
+
+            # each crop's tile holds its box: send it through the mosaic and back
+            for box in sent:
+                tile = next(t for t in tiles if t["frame"][0] <= box[0] + 1 and t["frame"][1] <= box[1] + 1
+                            and t["frame"][2] >= box[2] - 1 and t["frame"][3] >= box[3] - 1)
+                detection = {"ingredients": [{"label": "x", "box_2d": [round(v) for v in to_tile(box, tile)]}]}
+                back = untile(detection, [tile])["ingredients"][0]["box_2d"]
+                err = max(err, max(abs(a - b) for a, b in zip(back, box)))
+        print(f"{n:>5} {np.mean(fb) / 1024:>9.1f} {np.mean(mb) / 1024:>10.1f} {np.mean(ft):>10.0f} "
+              f"{np.mean(mt):>11.0f} {max(set(px), key=px.count):>10} {err:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
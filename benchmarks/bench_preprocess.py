@@ -0,0 +1,85 @@
+"""
+Per-image preprocessing cost for the classifier in legacy/backend2.py: the
+generic HF AutoImageProcessor vs legacy/preprocess.FastPreprocessor.
+
+    HF_MODEL_ID=... python benchmarks/bench_preprocess.py [--iters 30] [--batch 8]
+
+Both paths start from the uploaded JPEG bytes and end at float32 pixel values.
+"max diff" is the largest absolute difference from the HF output (in
+normalized units); "fast/full" decodes at full resolution, "fast/draft" lets
+JPEG draft mode decode at reduced scale first.
+"""
+import argparse, io, os, sys, time
+
+import numpy as np
+from PIL import Image
+
+LEGACY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legacy")
+sys.path.insert(0, LEGACY)
+
+from transformers import AutoImageProcessor  # noqa: E402
+
+from preprocess import FastPreprocessor  # noqa: E402
+
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def synthetic_jpeg(w, h, seed=0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w]
+    base = np.stack([(xx * 255 // w), (yy * 255 // h), ((xx + yy) * 127 // (w + h))], axis=-1)
+    arr = np.clip(base + rng.integers(0, 24, size=(h, w, 3)), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def hf_path(processor):
+    def run(raws):
+        images = [Image.open(io.BytesIO(r)).convert("RGB") for r in raws]
+        return processor(images=images, return_tensors="np")["pixel_values"]
+    return run
+
+
+def fast_path(pre):
+    def run(raws):
+        return pre([pre.prepare(r) for r in raws])
+    return run
+
+
+def per_image_ms(fn, raws, iters):
+    fn(raws)  # warm up
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn(raws)
+    return (time.perf_counter() - t0) * 1000 / (iters * len(raws))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--model", default=os.environ.get("HF_MODEL_ID", "BinhQuocNguyen/food-recognition-model"))
+    p.add_argument("--iters", type=int, default=30)
+    p.add_argument("--batch", type=int, default=8)
+    args = p.parse_args()
+
+    processor = AutoImageProcessor.from_pretrained(args.model)
+    paths = {
+        "hf": hf_path(processor),
+        "fast/full": fast_path(FastPreprocessor.from_processor(processor, draft=False)),
+        "fast/draft": fast_path(FastPreprocessor.from_processor(processor, draft=True)),
+    }
+
+    print(f"processor={type(processor).__name__} batch={args.batch}")
+    print(f"{'res':>6} {'path':>11} {'ms/img b=1':>11} {'ms/img b=N':>11} {'max diff':>9} {'mean diff':>10}")
+    for name, (w, h) in RESOLUTIONS.items():
+        raws = [synthetic_jpeg(w, h, seed=i) for i in range(args.batch)]
+        ref = paths["hf"](raws)
+        for label, fn in paths.items():
+            one = per_image_ms(fn, raws[:1], args.iters)
+            many = per_image_ms(fn, raws, max(1, args.iters // args.batch))
+            diff = np.abs(fn(raws) - ref)
+            print(f"{name:>6} {label:>11} {one:>11.2f} {many:>11.2f} {diff.max():>9.4f} {diff.mean():>10.5f}")
+
+
+if __name__ == "__main__":
+    main()
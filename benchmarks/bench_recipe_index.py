@@ -0,0 +1,107 @@
+"""
+Build time, open time and query latency of the offline recipe index.
+
+    python benchmarks/bench_recipe_index.py [--recipes 100000] [--queries 2000] [--seed 0]
+
+Writes a synthetic corpus (random titles over the canonical ingredient names,
+3-10 ingredients each, a few staples mixed in), indexes it into a temp
+directory and queries it with random 2-8 ingredient sets, as the app does once
+a session's ingredients are stable. Opening the index is memory-mapped, so it
+should stay flat as --recipes grows. The first --check queries are also ranked
+by brute force (every recipe's ingredient list against the query) and must
+return the same recipes in the same order.
+"""
+import argparse, json, os, random, sys, tempfile, time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "legacy"))
+sys.path.append(ROOT)   # lazy.py and ingredients.py, shared with the legacy modules
+
+from gemini_client import STAPLES  # noqa: E402
+from recipe_index import RecipeIndex, build_index  # noqa: E402
+from utils import CANONICAL_NAMES, normalize_list  # noqa: E402
+
+
+def write_corpus(path, n, rng):
+    names = [c for c in CANONICAL_NAMES if c not in STAPLES]
+    # Skewed popularity, like real corpora (onion and garlic are everywhere).
+    weights = [1 / (i + 1) for i in range(len(names))]
+    with open(path, "w") as f:
+        for i in range(n):
+            k = rng.randint(3, 10)
+            ings = list(dict.fromkeys(rng.choices(names, weights, k=k)))
+            ings += rng.sample(STAPLES, rng.randint(0, 2))
+            f.write(json.dumps({
+                "title": f"{ings[0].title()} and {ings[-1]} #{i}",
+                "description": "Synthetic recipe for benchmarking.",
+                "ingredients": ings,
+            }) + "\n")
+
+
+def brute_force(index, ingredients, k):
+    """Titles of the top-k recipes, scoring every recipe from its own ingredient list."""
+    have = [index.ids[n] for n in normalize_list(ingredients, max_items=64)
+            if n in index.ids and n not in index.staples]
+    owner = np.repeat(np.arange(len(index)), np.diff(np.asarray(index.ing_offsets, dtype=np.int64)))
+    matched = np.bincount(owner, weights=np.isin(index.ing_ids, have), minlength=len(index))
+    score = matched * index.weight
+    top = [int(r) for r in np.argsort(-score, kind="stable")[:k] if matched[r]]
+    return [index._card(r, set(have)).title for r in top]
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--recipes", type=int, default=100_000)
+    p.add_argument("--queries", type=int, default=2000)
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--check", type=int, default=200, help="queries compared against a brute-force ranking")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "recipes.jsonl")
+        out = os.path.join(tmp, "index")
+        write_corpus(corpus, args.recipes, rng)
+
+        t0 = time.perf_counter()
+        build_index(corpus, out)
+        build_s = time.perf_counter() - t0
+        size_mb = sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out)) / 1e6
+
+        t0 = time.perf_counter()
+        index = RecipeIndex(out)
+        open_ms = (time.perf_counter() - t0) * 1000
+
+        queries = [rng.sample(CANONICAL_NAMES, rng.randint(2, 8)) for _ in range(args.queries)]
+        for q in queries[:50]:
+            index.search(q, k=args.k)  # fault in the pages a query touches
+
+        lat, best = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            hits = index.search(q, k=args.k)
+            lat.append((time.perf_counter() - t0) * 1e6)
+            best.append(hits[0].coverage if hits else 0.0)
+        lat = np.array(lat)
+
+        mismatched = sum(
+            [h.card.title for h in index.search(q, k=args.k)] != brute_force(index, q, args.k)
+            for q in queries[:args.check]
+        )
+
+    print(f"recipes={len(index)} ingredients={len(index.names)} index={size_mb:.1f} MB")
+    print(f"build {build_s:.1f}s  open {open_ms:.2f} ms")
+    print(f"query us: mean {lat.mean():.0f}  p50 {np.percentile(lat, 50):.0f}  p99 {np.percentile(lat, 99):.0f}")
+    print(f"best coverage: mean {np.mean(best):.2f}, "
+          f">= 0.6 for {np.mean(np.array(best) >= 0.6) * 100:.0f}% of queries")
+    print(f"brute-force check: {min(args.check, len(queries)) - mismatched}/{min(args.check, len(queries))} "
+          f"rankings match")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
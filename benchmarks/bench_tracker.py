@@ -0,0 +1,157 @@
+"""
+Upstream calls and overlay label accuracy: webcam_viewer's tracker vs the box-signature trigger it replaced.
+
+    python benchmarks/bench_tracker.py [--seconds 120] [--objects 5] [--latency 0.8]
+
+Simulates a steady camera at --fps over a table of objects that drift and
+jitter by a few pixels, with YOLO missing a box now and then and a new object
+put down every --arrival-seconds. A fake Gemini answers each upload after
+--latency seconds with the true labels and slightly-off box_2d for the frame
+that was sent. Both policies see the same YOLO boxes; they are scored on
+calls made and the share of drawn boxes showing the right label.
+
+"old": a call whenever the quantized box signature changes or
+SCAN_INTERVAL_SECONDS passes, while idle; labels mapped to boxes left-to-right
+when the counts match. "tracker": tracker.Tracker with webcam_viewer's
+settings; calls only for confirmed unlabeled tracks.
+"""
+import argparse, os, random, sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import Tracker  # noqa: E402
+
+SCAN_INTERVAL_SECONDS = 3.0
+TRACK_MIN_HITS = 3
+TRACK_MAX_MISSES = 10
+LABEL_RETRY_SECONDS = 3.0
+FOODS = ["apple", "banana", "carrot", "egg", "garlic", "lemon", "milk", "onion", "pepper", "tomato",
+         "zucchini", "bread", "cheese", "butter", "rice", "potato"]
+
+
+class Scene:
+    def __init__(self, rng, objects):
+        self.rng = rng
+        self.objects = []   # [label, cy, cx, size, vy, vx]
+        for _ in range(objects):
+            self.add()
+
+    def add(self):
+        used = {o[0] for o in self.objects}
+        label = self.rng.choice([f for f in FOODS if f not in used] or FOODS)
+        size = self.rng.uniform(80, 200)
+        self.objects.append([label, self.rng.uniform(150, 850), self.rng.uniform(150, 850), size,
+                             self.rng.uniform(-0.5, 0.5), self.rng.uniform(-0.5, 0.5)])
+
+    def step(self):
+        for o in self.objects:
+            o[1] = min(900, max(100, o[1] + o[4]))
+            o[2] = min(900, max(100, o[2] + o[5]))
+
+    def truth(self):
+        return [(o[0], [o[1] - o[3] / 2, o[2] - o[3] / 2, o[1] + o[3] / 2, o[2] + o[3] / 2]) for o in self.objects]
+
+
+def yolo(rng, truth, miss_rate, jitter):
+    """Detected boxes as 0-1000 ints, shuffled like YOLO's confidence order, with (hidden) true labels."""
+    out = []
+    for label, b in truth:
+        if rng.random() < miss_rate:
+            continue
+        out.append((label, [int(np.clip(v + rng.gauss(0, jitter), 0, 999)) for v in b]))
+    rng.shuffle(out)
+    return out
+
+
+def gemini(rng, truth):
+    return {"ingredients": [{"label": label, "box_2d": [int(v + rng.gauss(0, 15)) for v in b]}
+                            for label, b in truth]}
+
+
+def signature(boxes):
+    return tuple(sorted(tuple(v // 25 for v in b) for b in boxes)) if boxes else None
+
+
+def old_labels(payload, boxes):
+    labels = [g["label"] for g in payload.get("ingredients", [])]
+    if len(labels) != len(boxes) or not boxes:
+        return [""] * len(boxes)
+    mapped = [""] * len(boxes)
+    for k, (idx, _b) in enumerate(sorted(enumerate(boxes), key=lambda x: x[1][1])):
+        mapped[idx] = sorted(labels)[k]
+    return mapped
+
+
+def run(args, policy):
+    rng = random.Random(args.seed)
+    scene = Scene(rng, args.objects)
+    tracker = Tracker(max_misses=TRACK_MAX_MISSES, min_hits=TRACK_MIN_HITS)
+    dt = 1.0 / args.fps
+    in_flight = None          # (done at, response, sent boxes)
+    payload, last_sig, last_call = {}, None, -1e9
+    calls = correct = drawn = 0
+    next_arrival = args.arrival_seconds
+
+    for frame in range(int(args.seconds * args.fps)):
+        now = frame * dt
+        scene.step()
+        if now >= next_arrival:
+            scene.add()
+            next_arrival += args.arrival_seconds
+        truth = scene.truth()
+        detected = yolo(rng, truth, args.miss_rate, args.jitter)
+        boxes = [b for _label, b in detected]
+
+        if in_flight is not None and now >= in_flight[0]:
+            _t, payload, sent = in_flight
+            in_flight = None
+            if policy == "tracker":
+                tracker.label(sent, payload["ingredients"])
+
+        if policy == "old":
+            sig = signature(boxes)
+            if in_flight is None and ((sig != last_sig and sig is not None) or now - last_call > SCAN_INTERVAL_SECONDS):
+                last_sig, last_call = sig, now
+                in_flight = (now + args.latency, gemini(rng, truth), None)
+                calls += 1
+            shown = old_labels(payload, boxes)
+        else:
+            tracks = tracker.update(boxes)
+            unlabeled = tracker.unlabeled(LABEL_RETRY_SECONDS, now)
+            if unlabeled and in_flight is None:
+                in_flight = (now + args.latency, gemini(rng, truth), tracker.mark_asked(unlabeled, now))
+                calls += 1
+            # tracks come back in track order; map each to its detection by box
+            by_box = {tuple(b): label for label, b in detected}
+            shown = [tr.label for tr in tracks]
+            detected = [(by_box.get(tr.box, ""), tr.box) for tr in tracks]
+
+        for (label, _b), s in zip(detected, shown):
+            drawn += 1
+            correct += s == label
+    return calls, correct / max(drawn, 1)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--seconds", type=float, default=120)
+    p.add_argument("--fps", type=float, default=30)
+    p.add_argument("--objects", type=int, default=5)
+    p.add_argument("--arrival-seconds", type=float, default=20.0, help="a new object every N seconds")
+    p.add_argument("--latency", type=float, default=0.8, help="Gemini round trip, seconds")
+    p.add_argument("--miss-rate", type=float, default=0.05, help="chance YOLO misses a box in a frame")
+    p.add_argument("--jitter", type=float, default=4.0, help="box edge noise, 0-1000 units")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{args.seconds:g}s at {args.fps:g} fps, {args.objects} objects + one every {args.arrival_seconds:g}s")
+    print(f"{'policy':>8} {'calls':>6} {'calls/min':>10} {'labels right':>13}")
+    for policy in ("old", "tracker"):
+        calls, accuracy = run(args, policy)
+        print(f"{policy:>8} {calls:>6} {calls * 60 / args.seconds:>10.1f} {accuracy:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
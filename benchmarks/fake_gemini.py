@@ -0,0 +1,347 @@
+"""
+Local stand-in for the Gemini API, for load tests without a key or network.
+
+    python benchmarks/fake_gemini.py [--port 8001] [--latency lognormal] [--latency-ms 800]
+                                     [--latency-spread 0.5] [--error-rate 0.0] [--stream-chunks 4]
+
+Point a server at it with GEMINI_BASE_URL=http://127.0.0.1:8001 (any
+GEMINI_API_KEY works). It serves the two REST calls the google-genai client
+makes, `models/{model}:generateContent` and `:streamGenerateContent?alt=sse`,
+and answers with JSON generated from the request's response schema, so
+DetectionResponse, BatchDetectionResponse, BoxLabels, RecipeList and the
+legacy RecipeSuggestions all parse; a prompt without a schema gets the
+legacy "INGREDIENTS: a, b" text. Labels are derived from a hash of the
+image bytes, so the same frame always gets the same ingredients and caches
+behave as they would against the real model.
+
+GET /stats returns call counts (by schema, images, errors, streams); POST
+/reset clears them; POST /config with a JSON object changes latency / error
+settings of a running instance.
+"""
+import argparse, base64, hashlib, json, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+INGREDIENTS = [
+    "tomato", "onion", "garlic", "carrot", "potato", "egg", "cheese", "chicken", "rice", "pasta",
+    "bell pepper", "spinach", "mushroom", "broccoli", "lemon", "apple", "banana", "avocado",
+    "cucumber", "basil", "bread", "milk", "butter", "zucchini", "corn", "beef", "salmon", "tofu",
+]
+DISHES = ["stir-fry", "soup", "salad", "omelet", "bake", "pasta", "tacos", "curry", "skillet", "wrap"]
+
+
+class FakeSettings:
+    def __init__(self, latency="lognormal", latency_ms=800.0, latency_spread=0.5,
+                 error_rate=0.0, error_status=503, stream_chunks=4, ttft_fraction=0.5, seed=None):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunks = stream_chunks
+        self.ttft_fraction = ttft_fraction   # share of the latency before the first stream chunk
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def update(self, **kwargs):
+        with self.lock:
+            for k, v in kwargs.items():
+                if not hasattr(self, k) or k in ("rng", "lock"):
+                    raise ValueError(f"unknown setting {k}")
+                setattr(self, k, type(getattr(self, k))(v))
+
+    def as_dict(self):
+        return {k: v for k, v in vars(self).items() if k not in ("rng", "lock")}
+
+    def sample_latency(self) -> float:
+        """Seconds for one call."""
+        with self.lock:
+            ms, spread = self.latency_ms, self.latency_spread
+            if self.latency == "fixed":
+                return ms / 1000
+            if self.latency == "uniform":
+                return max(0.0, self.rng.uniform(ms * (1 - spread), ms * (1 + spread))) / 1000
+            if self.latency == "lognormal":   # latency_ms is the median
+                return ms * self.rng.lognormvariate(0.0, spread) / 1000
+            raise ValueError(f"unknown latency distribution {self.latency}")
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+
+class CallStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.streams = 0
+        self.errors = 0
+        self.images = 0
+        self.by_schema: dict[str, int] = {}
+        self.started = time.time()
+
+    def record(self, schema_title: str, images: int, stream: bool, error: bool):
+        with self.lock:
+            self.calls += 1
+            self.streams += stream
+            self.errors += error
+            self.images += images
+            self.by_schema[schema_title] = self.by_schema.get(schema_title, 0) + 1
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "streams": self.streams,
+                "errors": self.errors,
+                "images": self.images,
+                "by_schema": dict(self.by_schema),
+                "seconds": round(time.time() - self.started, 3),
+            }
+
+
+# ----------------------------
+# Responses
+# ----------------------------
+def request_parts(body: dict) -> tuple[str, list[bytes]]:
+    """(all prompt text, image payloads in order) of a generateContent body."""
+    texts, images = [], []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                texts.append(part["text"])
+            inline = part.get("inlineData") or part.get("inline_data")
+            if inline:
+                data = inline.get("data", "")
+                images.append(base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)))
+    return "\n".join(texts), images
+
+
+def seeded(*chunks: bytes) -> random.Random:
+    h = hashlib.sha1()
+    for c in chunks:
+        h.update(c)
+    return random.Random(h.digest())
+
+
+def fake_box(rng: random.Random) -> list[int]:
+    ymin, xmin = rng.randrange(0, 700), rng.randrange(0, 700)
+    return [ymin, xmin, ymin + rng.randrange(80, 300), xmin + rng.randrange(80, 300)]
+
+
+class SchemaFaker:
+    """JSON value matching a (pydantic-generated) JSON schema."""
+
+    def __init__(self, schema: dict, prompt: str, images: list[bytes]):
+        self.root = schema
+        self.defs = schema.get("$defs", {})
+        self.prompt = prompt
+        self.images = images
+        self.box_count = sum(1 for line in prompt.splitlines() if line.split(":")[0].strip().isdigit())
+        self.rng = seeded(*(images or [prompt.encode()]))
+        self.labels = self.rng.sample(INGREDIENTS, self.rng.randint(2, 5))
+
+    def resolve(self, schema: dict) -> dict:
+        ref = schema.get("$ref")
+        if ref:
+            return self.defs[ref.rsplit("/", 1)[-1]]
+        for key in ("anyOf", "oneOf"):
+            if key in schema:  # Optional[...]: the non-null branch
+                return self.resolve(next(s for s in schema[key] if s.get("type") != "null"))
+        return schema
+
+    def value(self, schema: dict, name: str = "", index: int = 0):
+        schema = self.resolve(schema)
+        kind = schema.get("type")
+        if kind == "object":
+            return {k: self.value(v, k, index) for k, v in schema.get("properties", {}).items()}
+        if kind == "array":
+            return self.array(schema.get("items", {}), name)
+        if kind == "integer":
+            return index if name == "index" else self.rng.randrange(0, 1000)
+        if kind == "number":
+            return round(self.rng.random(), 3)
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        return self.string(name, index)
+
+    def array(self, items: dict, name: str) -> list:
+        if name == "box_2d":
+            return fake_box(self.rng)
+        if name == "frames":
+            # One entry per image, each labelled from its own bytes.
+            out = []
+            for i, img in enumerate(self.images or [b""]):
+                sub = SchemaFaker(self.root, self.prompt, [img])
+                out.append(sub.value(items, "frame", i))
+            return out
+        if name == "labels":
+            return [self.value(items, name, i) for i in range(self.box_count)]
+        if name == "ingredients":
+            return [self.value(items, name, i) for i in range(len(self.labels))]
+        if name == "recipes":
+            return [self.value(items, name, i) for i in range(self.rng.randint(3, 5))]
+        if name in ("uses", "missing_common_items"):
+            return self.rng.sample(self.labels, min(len(self.labels), self.rng.randint(1, 3)))
+        return [self.value(items, name, i) for i in range(self.rng.randint(1, 3))]
+
+    def string(self, name: str, index: int) -> str:
+        if name == "label":
+            return self.labels[index % len(self.labels)] if self.labels else self.rng.choice(INGREDIENTS)
+        if name == "title":
+            return f"{self.rng.choice(self.labels).title()} {self.rng.choice(DISHES)}"
+        if name == "description":
+            return f"A quick dish with {', '.join(self.labels[:3])}, ready in about 20 minutes."
+        return self.rng.choice(INGREDIENTS)
+
+
+def fake_text(body: dict) -> tuple[str, str]:
+    """(response text, schema title) for a generateContent request body."""
+    prompt, images = request_parts(body)
+    config = body.get("generationConfig", {})
+    schema = config.get("responseJsonSchema") or config.get("responseSchema")
+    if not schema:
+        labels = seeded(*(images or [prompt.encode()])).sample(INGREDIENTS, 3)
+        return "INGREDIENTS: " + ", ".join(labels), "text"
+    faker = SchemaFaker(schema, prompt, images)
+    return json.dumps(faker.value(schema)), schema.get("title", "object")
+
+
+def response_body(text: str, finish: bool = True) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": len(text) // 4},
+        "modelVersion": "fake",
+    }
+
+
+# ----------------------------
+# HTTP
+# ----------------------------
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings: FakeSettings
+    stats: CallStats
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, status: int, payload: dict):
+        out = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/stats":
+            return self._json(200, {**self.stats.as_dict(), "settings": self.settings.as_dict()})
+        self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/reset":
+            self.stats.reset()
+            return self._json(200, self.stats.as_dict())
+        if path == "/config":
+            try:
+                self.settings.update(**self._read_json())
+            except (ValueError, TypeError) as e:
+                return self._json(400, {"error": str(e)})
+            return self._json(200, self.settings.as_dict())
+
+        method = path.rsplit(":", 1)[-1]
+        if method not in ("generateContent", "streamGenerateContent"):
+            return self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+        body = self._read_json()
+        text, title = fake_text(body)
+        _, images = request_parts(body)
+        stream = method == "streamGenerateContent"
+        latency = self.settings.sample_latency()
+        failed = self.settings.should_fail()
+        self.stats.record(title, len(images), stream, failed)
+
+        if failed:
+            time.sleep(latency * self.settings.ttft_fraction)
+            status = self.settings.error_status
+            return self._json(status, {"error": {"code": status, "message": "fake upstream error",
+                                                 "status": "UNAVAILABLE" if status == 503 else "RESOURCE_EXHAUSTED"}})
+        if not stream:
+            time.sleep(latency)
+            return self._json(200, response_body(text))
+        self._stream(text, latency)
+
+    def _stream(self, text: str, latency: float):
+        n = max(1, self.settings.stream_chunks)
+        size = -(-len(text) // n)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        first = latency * self.settings.ttft_fraction
+        gap = (latency - first) / max(1, len(pieces) - 1)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(first)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(gap)
+            event = f"data: {json.dumps(response_body(piece, finish=i == len(pieces) - 1))}\r\n\r\n".encode()
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8001, settings: FakeSettings = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeGeminiHandler,), {
+        "settings": settings or FakeSettings(),
+        "stats": CallStats(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8001)
+    p.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    p.add_argument("--latency-ms", type=float, default=800.0, help="median (lognormal) or mean")
+    p.add_argument("--latency-spread", type=float, default=0.5,
+                   help="lognormal sigma, or +/- fraction for uniform")
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--error-status", type=int, default=503)
+    p.add_argument("--stream-chunks", type=int, default=4)
+    p.add_argument("--ttft-fraction", type=float, default=0.5)
+    p.add_argument("--seed", type=int, default=None)
+    args = p.parse_args()
+
+    settings = FakeSettings(
+        latency=args.latency, latency_ms=args.latency_ms, latency_spread=args.latency_spread,
+        error_rate=args.error_rate, error_status=args.error_status,
+        stream_chunks=args.stream_chunks, ttft_fraction=args.ttft_fraction, seed=args.seed,
+    )
+    server = make_server(args.host, args.port, settings)
+    print(f"fake Gemini on http://{args.host}:{server.server_port}  {json.dumps(settings.as_dict())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import ast
+import io
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+from PIL import Image
+
+from image_io import PreparedFrame
+
+# Local, on-box detection engines for /analyze_frame. They fill in
+# ingredients[].box_2d in tens of milliseconds on CPU, so the remote model is
+# only needed for label enrichment and recipes (see server.py).
+
+
+def to_box_2d(x1, y1, x2, y2, frame_w, frame_h) -> list[int]:
+    """Pixel xyxy -> normalized [ymin, xmin, ymax, xmax] (0-1000), like webcam_viewer."""
+    return [
+        int(max(0, min(999, (y1 / frame_h) * 1000))),
+        int(max(0, min(999, (x1 / frame_w) * 1000))),
+        int(max(0, min(999, (y2 / frame_h) * 1000))),
+        int(max(0, min(999, (x2 / frame_w) * 1000))),
+    ]
+
+
+def clean_label(name: str) -> str:
+    # class names such as "apple_pie" -> "apple pie"
+    return " ".join(str(name).replace("_", " ").replace("-", " ").lower().split())
+
+
+def decode_rgb(frame: PreparedFrame, size: int) -> np.ndarray:
+    img = Image.open(io.BytesIO(frame.data))
+    img.draft("RGB", (size, size))  # detector input is ~size px anyway
+    return np.asarray(img.convert("RGB"))
+
+
+class DetectorEngine(ABC):
+    """Interface: one frame in, a list of {"label", "box_2d", "score"} out."""
+
+    name = "base"
+
+    @abstractmethod
+    def detect(self, frame: PreparedFrame) -> list[dict]:
+        ...
+
+
+class YoloDetector(DetectorEngine):
+    """Ultralytics YOLO weights (e.g. food_yolo.pt) on CPU."""
+
+    name = "yolo"
+
+    def __init__(self, weights: str = "food_yolo.pt", device: str = "cpu", conf: float = 0.35,
+                 iou: float = 0.45, max_boxes: int = 8, imgsz: int = 640):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights)
+        self.device = device
+        self.conf = conf
+        self.iou = iou
+        self.max_boxes = max_boxes
+        self.imgsz = imgsz
+        # Ultralytics predictors keep per-call state; serialize calls.
+        self._lock = threading.Lock()
+
+    def detect(self, frame: PreparedFrame) -> list[dict]:
+        rgb = decode_rgb(frame, self.imgsz)
+        h, w = rgb.shape[:2]
+        with self._lock:
+            results = self.model.predict(
+                np.ascontiguousarray(rgb[:, :, ::-1]),  # ultralytics expects BGR arrays
+                conf=self.conf,
+                iou=self.iou,
+                imgsz=self.imgsz,
+                max_det=self.max_boxes,
+                device=self.device,
+                verbose=False,
+            )
+        r0 = results[0]
+        if r0.boxes is None or len(r0.boxes) == 0:
+            return []
+
+        names = r0.names or {}
+        xyxy = r0.boxes.xyxy.cpu().numpy()
+        confs = r0.boxes.conf.cpu().numpy()
+        classes = r0.boxes.cls.cpu().numpy().astype(int)
+        return [
+            {"label": clean_label(names.get(c, c)), "box_2d": to_box_2d(*b, w, h), "score": float(s)}
+            for b, s, c in zip(xyxy, confs, classes)
+        ]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou: float) -> list[int]:
+    """Greedy non-maximum suppression over xyxy boxes."""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        overlap = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][overlap <= iou]
+    return keep
+
+
+class OnnxDetector(DetectorEngine):
+    """
+    YOLOv8-style ONNX export (`yolo export model=food_yolo.pt format=onnx`)
+    served by ONNX Runtime, without torch/ultralytics in the process.
+    """
+
+    name = "onnx"
+
+    def __init__(self, weights: str = "food_yolo.onnx", conf: float = 0.35, iou: float = 0.45,
+                 max_boxes: int = 8, threads: int = 0):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(weights, sess_options=opts, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.imgsz = int(inp.shape[2]) if isinstance(inp.shape[2], int) else 640
+        self.conf = conf
+        self.iou = iou
+        self.max_boxes = max_boxes
+
+        # Ultralytics stores the class map as a dict literal in the metadata.
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+
+    def _letterbox(self, rgb: np.ndarray):
+        h, w = rgb.shape[:2]
+        scale = min(self.imgsz / h, self.imgsz / w)
+        nh, nw = round(h * scale), round(w * scale)
+        resized = np.asarray(Image.fromarray(rgb).resize((nw, nh), Image.Resampling.BILINEAR))
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        top, left = (self.imgsz - nh) // 2, (self.imgsz - nw) // 2
+        canvas[top:top + nh, left:left + nw] = resized
+        blob = canvas.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+        return blob, scale, left, top
+
+    def detect(self, frame: PreparedFrame) -> list[dict]:
+        rgb = decode_rgb(frame, self.imgsz)
+        h, w = rgb.shape[:2]
+        blob, scale, left, top = self._letterbox(rgb)
+
+        # (1, 4 + classes, anchors) -> (anchors, 4 + classes)
+        pred = self.session.run(None, {self.input_name: blob})[0][0].T
+        class_scores = pred[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        mask = scores >= self.conf
+        if not mask.any():
+            return []
+
+        cx, cy, bw, bh = pred[mask, :4].T
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        boxes -= [left, top, left, top]
+        boxes /= scale
+        scores, classes = scores[mask], classes[mask]
+
+        keep = nms(boxes, scores, self.iou)[:self.max_boxes]
+        return [
+            {
+                "label": clean_label(self.names.get(int(classes[i]), int(classes[i]))),
+                "box_2d": to_box_2d(*boxes[i], w, h),
+                "score": float(scores[i]),
+            }
+            for i in keep
+        ]
+
+
+ENGINES = {"yolo": YoloDetector, "onnx": OnnxDetector}
+
+
+def create_detector(name: str, **kwargs) -> DetectorEngine:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown detector engine {name!r} (choose from {sorted(ENGINES)})")
+    return ENGINES[name](**kwargs)
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from PIL import Image
+
+
+# ----------------------------
+# Perceptual hash
+# ----------------------------
+def dhash(img: Image.Image, hash_size: int = 16) -> int:
+    """
+    Difference hash over a downscaled grayscale copy of the frame.
+    Near-identical frames (JPEG noise, small hand jitter) land within a
+    few bits of each other, so the cache can match them by Hamming distance.
+    """
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    px = small.tobytes()
+    row = hash_size + 1
+
+    bits = 0
+    for y in range(hash_size):
+        base = y * row
+        for x in range(hash_size):
+            bits = (bits << 1) | (px[base + x] > px[base + x + 1])
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+# ----------------------------
+# Cache
+# ----------------------------
+class FrameCache:
+    """
+    LRU + TTL cache of analysis responses keyed on a perceptual frame hash.
+    Lookups accept any stored hash within `max_distance` bits.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0, max_distance: int = 12):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+
+        self._entries: "OrderedDict[int, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: int) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            match = None
+            best = self.max_distance + 1
+
+            for k, (ts, _payload) in list(self._entries.items()):
+                if now - ts > self.ttl_seconds:
+                    del self._entries[k]
+                    self.evictions += 1
+                    continue
+                d = hamming(k, key)
+                if d < best:
+                    best, match = d, k
+                    if d == 0:
+                        break
+
+            if match is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(match)
+            self.hits += 1
+            return self._entries[match][1]
+
+    def put(self, key: int, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_distance": self.max_distance,
+            }
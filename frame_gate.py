@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Server-side motion detection and LOCKED/SCANNING cadence, ported from the
+# cv2 check webcam_viewer used before it tracked boxes. Clients that post at
+# a fixed interval (web, Unity) don't cost an upstream call for a scene that
+# hasn't changed.
+
+# Same working size / blur / threshold as that cv2 motion check.
+MOTION_SIZE = (320, 180)
+MOTION_BLUR_RADIUS = 5.6        # sigma of cv2.GaussianBlur((35, 35), 0)
+MOTION_PIXEL_DELTA = 40
+MOTION_MIN_PIXELS = 50000 // 255  # np.sum(thresh) > 50000 on a 0/255 mask
+
+
+def motion_frame(img: Image.Image) -> np.ndarray:
+    small = img.convert("L").resize(MOTION_SIZE, Image.Resampling.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(MOTION_BLUR_RADIUS))
+    return np.asarray(small, dtype=np.int16)
+
+
+def significant_motion(prev: np.ndarray, cur: np.ndarray) -> bool:
+    changed = np.count_nonzero(np.abs(cur - prev) > MOTION_PIXEL_DELTA)
+    return changed > MOTION_MIN_PIXELS
+
+
+def labels_signature(payload: dict) -> tuple:
+    return tuple(sorted(i.get("label", "") for i in payload.get("ingredients", []) if i.get("label")))
+
+
+@dataclass
+class SessionGate:
+    ref_frame: Optional[np.ndarray] = None   # last frame that was actually analyzed
+    payload: Optional[dict] = None
+    analyzed_ts: float = 0.0
+    last_seen_ts: float = field(default_factory=time.time)
+
+    last_labels: tuple = ()
+    stable_hits: int = 0
+    is_locked: bool = False
+
+
+class FrameGate:
+    """
+    Per-session decision: reuse the last analysis or send this frame upstream.
+
+    A frame is reused while it shows no significant motion against the last
+    analyzed frame and that analysis is younger than the current cadence
+    (`scan_interval` while scanning, `locked_refresh` once the labels have
+    been stable for `lock_after` analyses).
+    """
+
+    def __init__(self, scan_interval: float = 3.0, locked_refresh: float = 10.0, lock_after: int = 3,
+                 max_sessions: int = 1024, idle_ttl: float = 300.0):
+        self.scan_interval = scan_interval
+        self.locked_refresh = locked_refresh
+        self.lock_after = lock_after
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+
+        self._sessions: "OrderedDict[str, SessionGate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.reused = 0
+        self.passed = 0
+
+    def _session(self, session_id: str, now: float) -> SessionGate:
+        s = self._sessions.get(session_id)
+        if s is None:
+            s = self._sessions[session_id] = SessionGate()
+        s.last_seen_ts = now
+        self._sessions.move_to_end(session_id)
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_seen_ts <= self.idle_ttl:
+                break
+            del self._sessions[oldest_id]
+        return s
+
+    def check(self, session_id: str, frame: np.ndarray) -> Optional[dict]:
+        """Returns the previous payload if this frame can reuse it, else None."""
+        now = time.time()
+        with self._lock:
+            s = self._session(session_id, now)
+            if s.payload is None or s.ref_frame is None:
+                self.passed += 1
+                return None
+
+            if significant_motion(s.ref_frame, frame):
+                # Motion invalidates lock
+                s.is_locked = False
+                s.stable_hits = 0
+                self.passed += 1
+                return None
+
+            interval = self.locked_refresh if s.is_locked else self.scan_interval
+            if now - s.analyzed_ts > interval:
+                self.passed += 1
+                return None
+
+            self.reused += 1
+            return s.payload
+
+    def record(self, session_id: str, frame: np.ndarray, payload: dict) -> None:
+        now = time.time()
+        with self._lock:
+            s = self._session(session_id, now)
+
+            labels = labels_signature(payload)
+            if labels == s.last_labels and len(labels) > 0:
+                s.stable_hits += 1
+            else:
+                s.stable_hits = 0
+            s.is_locked = s.stable_hits >= self.lock_after
+
+            s.last_labels = labels
+            s.ref_frame = frame
+            s.payload = payload
+            s.analyzed_ts = now
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "locked_sessions": sum(1 for s in self._sessions.values() if s.is_locked),
+                "reused": self.reused,
+                "passed": self.passed,
+            }
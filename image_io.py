@@ -0,0 +1,71 @@
+import io
+import math
+import os
+from dataclasses import dataclass
+
+from PIL import Image
+
+# Uploads are forwarded to the model as JPEG bytes. Frames that are already
+# JPEG and small enough go through untouched; bigger frames are decoded at a
+# reduced scale (JPEG draft mode / Image.reduce) and encoded exactly once.
+# With the default limit, 720p is forwarded as-is and 1080p/4K go up at 960x540.
+IMAGE_MAX_LONG_EDGE = int(os.environ.get("IMAGE_MAX_LONG_EDGE", "1280"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+
+# Hashing and motion gating only need a small grayscale view of the frame.
+THUMB_SIZE = (320, 180)
+
+
+@dataclass
+class PreparedFrame:
+    data: bytes              # JPEG bytes sent upstream
+    thumb: Image.Image       # small grayscale copy for hashing / motion
+    size: tuple[int, int]    # original (width, height)
+    forwarded: bool          # True if `data` is the untouched upload
+
+    mime_type: str = "image/jpeg"
+
+
+def _thumbnail(raw: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(raw))
+    if img.format == "JPEG":
+        img.draft("L", THUMB_SIZE)
+    return img.convert("L")
+
+
+def _reduced_rgb(img: Image.Image, max_long_edge: int) -> Image.Image:
+    # Reduce by an integer factor only, so the frame never goes through a
+    # separate resampling pass; the long edge ends up at or under the limit.
+    w, h = img.size
+    factor = math.ceil(max(w, h) / max_long_edge)
+
+    if img.format == "JPEG" and factor > 1:
+        # DCT-domain downscale by 1/2, 1/4 or 1/8 while decoding.
+        scale = 1
+        while scale < 8 and scale < factor:
+            scale *= 2
+        img.draft("RGB", (math.ceil(w / scale), math.ceil(h / scale)))
+        factor = math.ceil(max(img.size) / max_long_edge)
+
+    img = img.convert("RGB")
+    if factor > 1:
+        img = img.reduce(factor)
+    return img
+
+
+def prepare_frame(raw: bytes, max_long_edge: int = IMAGE_MAX_LONG_EDGE,
+                  quality: int = IMAGE_JPEG_QUALITY) -> PreparedFrame:
+    img = Image.open(io.BytesIO(raw))
+    size = img.size
+
+    if img.format == "JPEG" and img.mode in ("RGB", "L") and max(size) <= max_long_edge:
+        return PreparedFrame(data=raw, thumb=_thumbnail(raw), size=size, forwarded=True)
+
+    rgb = _reduced_rgb(img, max_long_edge)
+
+    buf = io.BytesIO()
+    rgb.save(buf, format="JPEG", quality=quality)
+
+    thumb = rgb.convert("L")
+    thumb.thumbnail(THUMB_SIZE)
+    return PreparedFrame(data=buf.getvalue(), thumb=thumb, size=size, forwarded=False)
@@ -0,0 +1,192 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# Ingredient normalization for server.py and the legacy app (legacy/utils.py
+# re-exports it). Keys the recipe cache on the ingredient *set* rather than on
+# the model's exact wording.
+SYNONYMS = {
+    "scallions": "green onion",
+    "spring onions": "green onion",
+    "capsicum": "bell pepper",
+    "bell peppers": "bell pepper",
+    "tomatoes": "tomato",
+    "onions": "onion",
+    "garlic cloves": "garlic",
+}
+
+STOPWORDS = set(["and", "with", "a", "an", "the"])
+
+# Canonical names labels resolve to. Near-misses ("tomatoe", "brocolli", or
+# "appl" from the naive singularization of "apples") snap to the closest one,
+# so one ingredient always produces one recipe-cache key.
+CANONICAL_NAMES = [
+    "almond", "apple", "asparagus", "avocado", "bacon", "banana", "basil", "bean", "beef", "beet",
+    "bell pepper", "blueberry", "bread", "broccoli", "butter", "cabbage", "carrot", "cashew",
+    "cauliflower", "celery", "cheese", "cherry", "chicken", "chickpea", "chili pepper", "chive",
+    "cilantro", "cinnamon", "coconut", "cooking oil", "corn", "couscous", "cucumber", "egg",
+    "eggplant", "flour", "garlic", "ginger", "grape", "green bean", "green onion", "ham", "honey",
+    "hummus", "jalapeno", "kale", "leek", "lemon", "lentil", "lettuce", "lime", "mango", "melon",
+    "milk", "mint", "mushroom", "noodle", "oat", "olive", "olive oil", "onion", "orange", "oregano",
+    "parsley", "pasta", "pea", "peach", "peanut", "pear", "pepper", "pineapple", "pork", "potato",
+    "pumpkin", "radish", "raspberry", "rice", "rosemary", "salmon", "salt", "sausage", "shallot",
+    "shrimp", "spinach", "squash", "strawberry", "sweet potato", "thyme", "tofu", "tomato",
+    "tortilla", "tuna", "turkey", "walnut", "water", "watermelon", "yogurt", "zucchini",
+]
+
+# Dish names from the nutrition table are canonical names too.
+NUTRITION_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nutritional_database.json")
+
+NORMALIZE_CACHE_SIZE = 4096
+
+
+def _clean(name: str) -> str:
+    s = name.strip().lower()
+    s = re.sub(r"[^a-z0-9\s\-]", "", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _singular(s: str) -> str:
+    # naive singularization (MVP)
+    if s.endswith("es") and len(s) > 4:
+        return s[:-2]
+    if s.endswith("s") and len(s) > 3:
+        return s[:-1]
+    return s
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def deletes(word: str, depth: int) -> set[str]:
+    """`word` plus every string reachable from it by up to `depth` deleted letters."""
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - out
+        out |= frontier
+    return out
+
+
+class DeletionIndex:
+    """
+    Nearest canonical name by edit distance (the SymSpell trick): two words
+    within distance d share a string reachable from both by at most d
+    deletions, so every name is indexed under its deletion variants up front
+    and a query is a handful of dict probes plus a few exact checks, instead
+    of a scan over the vocabulary.
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        self._variants: dict[str, list[str]] = {}
+        for w in words:
+            for v in deletes(w, max_distance):
+                self._variants.setdefault(v, []).append(w)
+
+    def closest(self, word: str, max_distance: int) -> Optional[str]:
+        """Nearest word within max_distance; None if there is none or it's a tie."""
+        max_distance = min(max_distance, self.max_distance)
+        if max_distance <= 0:
+            return None
+        candidates = {c for v in deletes(word, max_distance) for c in self._variants.get(v, ())}
+        best, best_d, tied = None, max_distance + 1, False
+        for c in sorted(candidates):
+            d = edit_distance(word, c, limit=max_distance)
+            if d < best_d:
+                best, best_d, tied = c, d, False
+            elif d == best_d:
+                tied = True
+        return None if best is None or tied else best
+
+
+def max_typos(s: str) -> int:
+    # Short words are too easy to confuse ("pear" / "peas"), so allow less.
+    if len(s) < 4:
+        return 0
+    return 1 if len(s) < 8 else 2
+
+
+class CanonicalIndex:
+    def __init__(self, names: Iterable[str], synonyms: dict):
+        self.names = set(names) | set(synonyms.values())
+        self.synonyms = synonyms
+        self.fuzzy = DeletionIndex(self.names)
+
+    def _known(self, s: str) -> Optional[str]:
+        s = self.synonyms.get(s, s)
+        if s in self.names:
+            return s
+        for form in (s[:-1] if s.endswith("s") else None, _singular(s)):
+            if form:
+                form = self.synonyms.get(form, form)
+                if form in self.names:
+                    return form
+        return None
+
+    def resolve(self, s: str) -> str:
+        """Canonical form of a cleaned label; unknown labels keep the naive singular."""
+        known = self._known(s)
+        if known:
+            return known
+
+        singular = _singular(s)
+        near = self.fuzzy.closest(singular, max_typos(singular))
+        if near:
+            return near
+
+        # "cherry tomatoes" -> "cherry tomato": canonicalize the head noun.
+        if " " in s:
+            head, last = s.rsplit(" ", 1)
+            return f"{head} {self.resolve(last)}"
+        return singular
+
+
+def _dish_names(path: str) -> list[str]:
+    try:
+        with open(path) as f:
+            return [_clean(k.replace("_", " ")) for k in json.load(f)]
+    except (OSError, ValueError):
+        return []
+
+
+canonical_index = CanonicalIndex(CANONICAL_NAMES + _dish_names(NUTRITION_DB_PATH), SYNONYMS)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)  # the same few labels arrive frame after frame
+def normalize_ingredient(name: str) -> str:
+    s = _clean(name)
+    if not s or s in STOPWORDS:
+        return ""
+    s = canonical_index.resolve(s)
+    if s in STOPWORDS:
+        return ""
+    return s
+
+
+def normalize_list(items: list[str], max_items: int = 8) -> list[str]:
+    out = []
+    seen = set()
+    for it in items:
+        n = normalize_ingredient(it)
+        if not n or n in seen:
+            continue
+        seen.add(n)
+        out.append(n)
+        if len(out) >= max_items:
+            break
+    return out
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Callable, Optional
+
+# Heavy clients and models are built on first use instead of at import, so
+# importing a server module (workers booting, health checks, scripts) stays
+# cheap. A warmup thread can build them ahead of the first request, and
+# readiness() reports which ones are warm.
+
+
+class Lazy:
+    """
+    Thread-safe, build-once holder for an expensive object.
+
+    Attribute access is forwarded to the built object, so a module-level
+    `client = Lazy(make_client)` can be used exactly like the client itself.
+    A factory that raises leaves the holder unbuilt (state "failed") and the
+    next use retries.
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._value = None
+        self._built = False
+        self._building = False
+        self._error: Optional[str] = None
+        self._seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                self._building = True
+                t0 = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self._building = False
+                self._seconds = time.perf_counter() - t0
+                self._error = None
+                self._built = True
+        return self._value
+
+    def __getattr__(self, attr):
+        # Only called for attributes Lazy itself doesn't have.
+        return getattr(self.get(), attr)
+
+    @property
+    def warm(self) -> bool:
+        return self._built
+
+    def state(self) -> dict:
+        if self._built:
+            status = "warm"
+        elif self._building:
+            status = "warming"
+        elif self._error:
+            status = "failed"
+        else:
+            status = "cold"
+        out = {"state": status}
+        if self._seconds is not None:
+            out["load_seconds"] = round(self._seconds, 3)
+        if self._error and not self._built:
+            out["error"] = self._error
+        return out
+
+
+def warmup(*items: Lazy) -> threading.Thread:
+    """Build `items` on a background thread; failures show up in readiness()."""
+    def run():
+        for item in items:
+            try:
+                item.get()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness(items: dict) -> tuple[dict, bool]:
+    """({"ready", "components": {name: state}}, ready) for a readiness endpoint."""
+    components = {name: item.state() for name, item in items.items()}
+    ready = all(item.warm for item in items.values())
+    return {"ready": ready, "components": components}, ready
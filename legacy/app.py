@@ -1,28 +1,85 @@
 from flask import Flask, request, jsonify
 from PIL import Image
 import io
-
-from config import get_config
-from state import IngredientState
-from utils import normalize_list
-from vision import detect_ingredients
-from gemini_client import GeminiRecipeClient
+import os
+import sys
+import uuid
+from typing import Optional
+
+# lazy.py and ingredients.py are shared with server.py from the repo root.
+# Appended, so the modules in this directory keep their names.
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from config import get_config  # noqa: E402
+from sessions import SessionStore, SqliteSessionStore  # noqa: E402
+from lazy import readiness, warmup  # noqa: E402
+from utils import normalize_list  # noqa: E402
+from vision import client as vision_client, detect_ingredients  # noqa: E402
+from gemini_client import GeminiRecipeClient  # noqa: E402
+from recipe_index import open_index  # noqa: E402
 
 app = Flask(__name__)
 
 cfg = get_config()
 
-state = IngredientState(
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "recipefy_session"
+
+_session_kwargs = dict(
     add_hits=cfg.ing_add_hits,
     remove_misses=cfg.ing_remove_misses,
     stable_seconds=cfg.stable_seconds,
+    idle_ttl=cfg.session_idle_ttl,
+    max_sessions=cfg.max_sessions,
+    max_bytes=cfg.max_session_bytes,
+    max_cached_recipes=cfg.max_cached_recipes,
 )
+if cfg.session_backend == "sqlite":
+    # shared by every worker process on this box
+    sessions = SqliteSessionStore(cfg.session_db_path, **_session_kwargs)
+else:
+    sessions = SessionStore(**_session_kwargs)
+
+def get_session_id() -> tuple[str, Optional[str]]:
+    """
+    Returns (session id, cookie to issue or None). Without a header or cookie
+    the client address is the session, as in server.session_id_for, so clients
+    that ignore cookies (Unity, plain HTTP posts) still build up state and
+    don't flood the store with one-frame sessions. Browsers, which announce
+    themselves with Sec-Fetch-Mode and keep cookies, are also given their own
+    id for later requests.
+    """
+    sid = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if sid:
+        return sid, None
+    cookie = uuid.uuid4().hex if request.headers.get("Sec-Fetch-Mode") else None
+    return request.remote_addr or "anonymous", cookie
 
 gemini = GeminiRecipeClient(api_key=cfg.gemini_api_key, model=cfg.gemini_model)
+recipe_index = open_index(cfg.recipe_index_path)
+
+def local_recipes(ingredients: list[str]):
+    """Recipes from the local corpus, or None when too few cover the ingredients."""
+    if recipe_index is None:
+        return None
+    hits = recipe_index.search(ingredients, k=cfg.recipe_count_max)
+    good = [h.card.model_dump() for h in hits if h.coverage >= cfg.recipe_min_coverage]
+    return good if len(good) >= cfg.recipe_count_min else None
+
+LAZY_COMPONENTS = {"vision_client": vision_client, "recipe_client": gemini.client}
+if cfg.warmup:
+    warmup(*LAZY_COMPONENTS.values())
 
 @app.get("/health")
 def health():
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "sessions": sessions.stats()})
+
+@app.get("/ready")
+def ready():
+    body, ok = readiness(LAZY_COMPONENTS)
+    return jsonify(body), 200 if ok else 503
 
 @app.post("/analyze_frame")
 def analyze_frame():
@@ -50,41 +107,55 @@ def analyze_frame():
     # 2) normalize + cap
     observed = normalize_list(observed_raw, max_items=8)
 
-    # 3) update state (debounce)
-    changed = state.update(observed)
+    # 3) update this session's state (debounce); the lock is held only for
+    #    the update, never across a Gemini call
+    session_id, new_cookie = get_session_id()
+    with sessions.session(session_id) as state:
+        changed = state.update(observed)
+        stable = state.is_stable()
+        confirmed = sorted(state.confirmed)
+        key = state.key()
+        cached = state.cached_recipes.get(key)
 
     payload = {
         "observed": observed,
-        "ingredients": sorted(state.confirmed),
-        "stable": state.is_stable(),
+        "ingredients": confirmed,
+        "stable": stable,
         "recipes": [],
         "status": "scanning",
     }
 
-    # 4) if stable, call Gemini (cached)
-    if state.is_stable() and len(state.confirmed) > 0:
-        key = state.key()
-
-        if key in state.cached_recipes:
-            payload["recipes"] = state.cached_recipes[key]["recipes"]
+    # 4) if stable, look up recipes (cached)
+    if stable and len(confirmed) > 0:
+        if cached is not None:
+            payload["recipes"] = cached["recipes"]
             payload["status"] = "ready_cached"
-            return jsonify(payload)
-
-        # Call Gemini only if stable AND not cached.
-        suggestions = gemini.suggest_recipes(
-            ingredients=sorted(state.confirmed),
-            min_n=cfg.recipe_count_min,
-            max_n=cfg.recipe_count_max,
-        )
-
-        recipes = [r.model_dump() for r in suggestions.recipes]
-        state.cached_recipes[key] = {"recipes": recipes}
+            return _respond(payload, session_id, new_cookie)
+
+        # Local corpus first; call Gemini only if it can't cover these ingredients.
+        recipes = local_recipes(confirmed)
+        if recipes is None:
+            suggestions = gemini.suggest_recipes(
+                ingredients=confirmed,
+                min_n=cfg.recipe_count_min,
+                max_n=cfg.recipe_count_max,
+            )
+            recipes = [r.model_dump() for r in suggestions.recipes]
+        with sessions.session(session_id) as state:
+            state.cached_recipes[key] = {"recipes": recipes}
 
         payload["recipes"] = recipes
         payload["status"] = "ready"
-        return jsonify(payload)
+        return _respond(payload, session_id, new_cookie)
+
+    return _respond(payload, session_id, new_cookie)
 
-    return jsonify(payload)
+def _respond(payload: dict, session_id: str, new_cookie: Optional[str]):
+    resp = jsonify(payload)
+    resp.headers[SESSION_HEADER] = session_id
+    if new_cookie:
+        resp.set_cookie(SESSION_COOKIE, new_cookie, httponly=True, samesite="Lax")
+    return resp
 
 if __name__ == "__main__":
     # For local dev only. Use gunicorn in production.
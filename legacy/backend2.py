@@ -1,29 +1,61 @@
 # backend.py
-import io
 import os
+import sys
 from typing import List
 
+import numpy as np
 from flask import Flask, request, jsonify
 from PIL import Image
 
-import torch
-from transformers import AutoImageProcessor, AutoModelForImageClassification
+# lazy.py and ingredients.py are shared with server.py from the repo root.
+# Appended, so the modules in this directory keep their names.
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from batcher import MicroBatcher  # noqa: E402
+from classifier_runtime import Frame, load_classifier  # noqa: E402
+from lazy import Lazy, readiness, warmup  # noqa: E402
+from recipe_index import open_index  # noqa: E402
 
 # ----------------------------
 # Config
 # ----------------------------
 MODEL_ID = os.environ.get("HF_MODEL_ID", "BinhQuocNguyen/food-recognition-model")
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 TOPK = int(os.environ.get("TOPK", "3"))
 
+# Concurrent requests share one forward pass: a batch closes at MAX_BATCH
+# images or MAX_WAIT_MS after its first image. BATCHING=0 runs each request
+# through the model on its own thread, as before.
+BATCHING = os.environ.get("BATCHING", "1") == "1"
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "16"))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", "5"))
+
+# RUNTIME=torch (fp32 PyTorch), onnx or int8 (ONNX Runtime over the files
+# written by `python export_onnx.py --out $ONNX_DIR`).
+RUNTIME = os.environ.get("RUNTIME", "torch")
+ONNX_DIR = os.environ.get("ONNX_DIR", "onnx_model")
+
+# Load the model on a background thread at startup (GET /ready turns 200 when
+# done); WARMUP=0 loads it on the first request instead.
+WARMUP = os.environ.get("WARMUP", "1") == "1"
+
+# Local recipe corpus built with `python recipe_index.py build`; without one
+# (or when nothing matches) the templated recipes below are used.
+RECIPE_INDEX_PATH = os.environ.get("RECIPE_INDEX_PATH", "recipe_index")
+RECIPE_COUNT = int(os.environ.get("RECIPE_COUNT", "3"))
+
 app = Flask(__name__)
 
 # ----------------------------
-# Load HF model once at startup
+# Model (loaded once, on first use or by the warmup thread)
 # ----------------------------
-processor = AutoImageProcessor.from_pretrained(MODEL_ID)
-model = AutoModelForImageClassification.from_pretrained(MODEL_ID).to(DEVICE)
-model.eval()
+def _load_classifier():
+    c = load_classifier(RUNTIME, MODEL_ID, ONNX_DIR)
+    c.logits([Image.new("RGB", (640, 480))])  # first forward pass is the slow one
+    return c
+
+classifier = Lazy(_load_classifier)
 
 # ----------------------------
 # Helpers
@@ -38,14 +70,16 @@ def normalize_label(s: str) -> str:
     s = " ".join(s.split())
     return s
 
-def pick_topk_labels(logits: torch.Tensor, k: int) -> List[str]:
-    probs = torch.softmax(logits, dim=-1)[0]
-    k = min(k, probs.numel())
-    topk = torch.topk(probs, k=k)
+def pick_topk_labels(logits: np.ndarray, k: int) -> List[str]:
+    row = np.asarray(logits, dtype=np.float64)[0]
+    probs = np.exp(row - row.max())
+    probs /= probs.sum()
+    k = min(k, probs.size)
+    topk = np.argsort(-probs, kind="stable")[:k]
 
-    id2label = getattr(model.config, "id2label", None) or {}
+    id2label = classifier.id2label
     labels = []
-    for idx in topk.indices.tolist():
+    for idx in topk.tolist():
         lbl = id2label.get(idx, str(idx))
         labels.append(normalize_label(lbl))
     # de-dup while preserving order
@@ -57,7 +91,24 @@ def pick_topk_labels(logits: torch.Tensor, k: int) -> List[str]:
             out.append(l)
     return out
 
+def classify(img: Frame) -> List[str]:
+    return pick_topk_labels(classifier.logits([img]), TOPK)
+
+def classify_batch(images: List[Frame]) -> List[List[str]]:
+    # One forward pass over the stacked batch; rows map back to callers in order.
+    logits = classifier.logits(images)
+    return [pick_topk_labels(logits[i:i + 1], TOPK) for i in range(len(images))]
+
+batcher = MicroBatcher(classify_batch, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS) if BATCHING else None
+
+recipe_index = open_index(RECIPE_INDEX_PATH)
+
 def recipes_for(label: str):
+    if recipe_index is not None and label:
+        hits = recipe_index.search([label], k=RECIPE_COUNT)
+        if hits:
+            return [h.card.model_dump() for h in hits]
+
     # Simple "good enough" recipes so your AR panel shows something realistic.
     # You can make this richer later or reintroduce Gemini for recipes only.
     if not label:
@@ -97,16 +148,9 @@ def analyze_frame():
 
     try:
         raw = request.files["file"].read()
-        img = Image.open(io.BytesIO(raw)).convert("RGB")
-
-        inputs = processor(images=img, return_tensors="pt")
-        inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
-
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
+        img = classifier.prepare(raw)  # decoded, resized and cropped to the model input
 
-        labels = pick_topk_labels(logits, TOPK)
+        labels = batcher(img) if batcher else classify(img)
         primary = labels[0] if labels else ""
 
         # Classification model => no bboxes.
@@ -130,6 +174,19 @@ def analyze_frame():
         return jsonify({"error": str(e)}), 500
 
 
+@app.get("/ready")
+def ready():
+    body, ok = readiness({"classifier": classifier})
+    return jsonify(body), 200 if ok else 503
+
+
+@app.get("/batch_stats")
+def batch_stats():
+    return jsonify(batcher.stats() if batcher else {"batching": False}), 200
+
+
 if __name__ == "__main__":
+    if WARMUP:
+        warmup(classifier)
     # match your existing port so the frontend keeps working
-    app.run(host="0.0.0.0", port=4444)
+    app.run(host="0.0.0.0", port=4444, threaded=True)
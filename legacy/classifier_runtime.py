@@ -0,0 +1,95 @@
+import io
+import json
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from preprocess import FastPreprocessor
+
+# Inference runtimes for the food classifier in backend2.py. All of them turn
+# upload bytes into a model-sized image with prepare(), and a list of those
+# (or PIL images) into float32 logits of shape (batch, classes).
+#
+#   torch  - fp32 PyTorch straight from the Hugging Face hub (default)
+#   onnx   - ONNX Runtime over the fp32 export from export_onnx.py
+#   int8   - ONNX Runtime over the dynamic-quantized int8 export
+#
+# The ONNX runtimes import neither torch nor transformers, which is most of
+# the cold start; preprocessing is replayed from the exported config.
+
+Frame = Union[Image.Image, np.ndarray]
+
+RUNTIMES = ("torch", "onnx", "int8")
+
+ONNX_FP32 = "model.onnx"
+ONNX_INT8 = "model.int8.onnx"
+
+
+class TorchClassifier:
+    def __init__(self, model_id: str, device: Optional[str] = None):
+        import torch
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+        self.torch = torch
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.processor = AutoImageProcessor.from_pretrained(model_id)
+        self.model = AutoModelForImageClassification.from_pretrained(model_id).to(self.device)
+        self.model.eval()
+        self.id2label = getattr(self.model.config, "id2label", None) or {}
+
+        try:
+            self.preprocess = FastPreprocessor.from_processor(self.processor)
+        except ValueError:
+            self.preprocess = None  # unusual processor layout; keep the HF path
+
+    def prepare(self, raw: bytes) -> Frame:
+        if self.preprocess is None:
+            return Image.open(io.BytesIO(raw)).convert("RGB")
+        return self.preprocess.prepare(raw)
+
+    def logits(self, images: List[Frame]) -> np.ndarray:
+        if self.preprocess is None:
+            inputs = self.processor(images=images, return_tensors="pt")
+            pixel_values = inputs["pixel_values"].to(self.device)
+        else:
+            pixel_values = self.torch.from_numpy(self.preprocess(images)).to(self.device)
+
+        with self.torch.no_grad():
+            logits = self.model(pixel_values=pixel_values).logits
+        return logits.float().cpu().numpy()
+
+
+class OnnxClassifier:
+    def __init__(self, export_dir: str, quantized: bool = False, threads: int = 0):
+        import onnxruntime as ort
+
+        path = os.path.join(export_dir, ONNX_INT8 if quantized else ONNX_FP32)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run `python export_onnx.py --out {export_dir}` first")
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.device = "cpu"
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        self.preprocess = FastPreprocessor.from_pretrained(export_dir)
+        with open(os.path.join(export_dir, "config.json")) as f:
+            self.id2label = {int(k): v for k, v in json.load(f).get("id2label", {}).items()}
+
+    def prepare(self, raw: bytes) -> Frame:
+        return self.preprocess.prepare(raw)
+
+    def logits(self, images: List[Frame]) -> np.ndarray:
+        return self.session.run(None, {self.input_name: self.preprocess(images)})[0]
+
+
+def load_classifier(runtime: str, model_id: str, onnx_dir: str, device: Optional[str] = None):
+    if runtime == "torch":
+        return TorchClassifier(model_id, device=device)
+    if runtime in ("onnx", "int8"):
+        return OnnxClassifier(onnx_dir, quantized=(runtime == "int8"))
+    raise ValueError(f"Unknown runtime {runtime!r} (choose from {RUNTIMES})")
@@ -17,6 +17,22 @@ class Config:
     recipe_count_min: int = int(os.getenv("RECIPE_COUNT_MIN", "4"))
     recipe_count_max: int = int(os.getenv("RECIPE_COUNT_MAX", "5"))
 
+    # local recipe corpus (recipe_index.py); Gemini is asked only when fewer than
+    # recipe_count_min local recipes reach this coverage of their ingredients
+    recipe_index_path: str = os.getenv("RECIPE_INDEX_PATH", "recipe_index")
+    recipe_min_coverage: float = float(os.getenv("RECIPE_MIN_COVERAGE", "0.6"))
+
+    # per-session ingredient state
+    session_backend: str = os.getenv("SESSION_BACKEND", "memory")  # "memory" | "sqlite"
+    session_db_path: str = os.getenv("SESSION_DB_PATH", "sessions.db")
+    session_idle_ttl: float = float(os.getenv("SESSION_IDLE_TTL", "600"))
+    max_sessions: int = int(os.getenv("MAX_SESSIONS", "256"))
+    max_session_bytes: int = int(os.getenv("MAX_SESSION_BYTES", str(64 * 1024 * 1024)))
+    max_cached_recipes: int = int(os.getenv("MAX_CACHED_RECIPES", "16"))
+
+    # build the Gemini clients on a background thread at startup (else on first use)
+    warmup: bool = os.getenv("WARMUP", "1") == "1"
+
 def get_config() -> Config:
     cfg = Config()
     if not cfg.gemini_api_key:
@@ -0,0 +1,75 @@
+"""
+Export the food classifier for the ONNX runtimes in backend2.py.
+
+    python export_onnx.py [--model BinhQuocNguyen/food-recognition-model] [--out onnx_model]
+
+Writes into --out:
+  model.onnx                fp32 graph, dynamic batch axis
+  model.int8.onnx           dynamic int8 quantization of the same graph
+  preprocessor_config.json  the image processor (resize / crop / normalize)
+  config.json               model config, for id2label
+"""
+import argparse
+import os
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from PIL import Image
+from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+from classifier_runtime import ONNX_FP32, ONNX_INT8
+
+
+class LogitsOnly(torch.nn.Module):
+    # HF models return a ModelOutput; export just the logits tensor.
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return self.model(pixel_values=pixel_values).logits
+
+
+def export(model_id: str, out: str, opset: int = 17) -> None:
+    os.makedirs(out, exist_ok=True)
+
+    processor = AutoImageProcessor.from_pretrained(model_id)
+    model = AutoModelForImageClassification.from_pretrained(model_id).eval()
+
+    # Dummy input with whatever shape the processor produces.
+    sample = processor(images=Image.new("RGB", (640, 480)), return_tensors="pt")["pixel_values"]
+
+    fp32_path = os.path.join(out, ONNX_FP32)
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            (sample,),
+            fp32_path,
+            input_names=["pixel_values"],
+            output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset,
+            dynamo=False,
+        )
+    print(f"wrote {fp32_path}")
+
+    int8_path = os.path.join(out, ONNX_INT8)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"wrote {int8_path}")
+
+    processor.save_pretrained(out)
+    model.config.save_pretrained(out)
+    print(f"wrote processor and config to {out}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--model", default=os.environ.get("HF_MODEL_ID", "BinhQuocNguyen/food-recognition-model"))
+    p.add_argument("--out", default=os.environ.get("ONNX_DIR", "onnx_model"))
+    p.add_argument("--opset", type=int, default=17)
+    args = p.parse_args()
+    export(args.model, args.out, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
-from google import genai
+import os
+
+from lazy import Lazy
 from recipes_schema import RecipeSuggestions
 
 STAPLES = ["salt", "pepper", "cooking oil", "butter", "water"]
 
+def _make_client(api_key: str):
+    from google import genai  # heavy import; deferred to first use
+    base_url = os.getenv("GEMINI_BASE_URL")  # e.g. benchmarks/fake_gemini.py
+    return genai.Client(api_key=api_key, http_options={"base_url": base_url} if base_url else None)
+
 class GeminiRecipeClient:
     def __init__(self, api_key: str, model: str):
-        self.client = genai.Client(api_key=api_key)
+        self.client = Lazy(lambda: _make_client(api_key))
         self.model = model
 
     def suggest_recipes(self, ingredients: list[str], min_n: int = 4, max_n: int = 5) -> RecipeSuggestions:
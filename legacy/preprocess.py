@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import threading
+from typing import List, Union
+
+import numpy as np
+from PIL import Image
+
+# Image preprocessing for the food classifier without the generic HF image
+# processor in the hot path. Per image, only the unavoidable work happens:
+# decode (at reduced scale when the upload is much bigger than the model
+# input), one uint8 resize and a crop. Rescale + normalize + HWC->CHW is then
+# a single fused NumPy pass over the whole batch, written into a buffer that
+# is reused between calls.
+
+
+class FastPreprocessor:
+    """
+    Resize -> center crop -> rescale -> normalize, matching a Hugging Face
+    image processor config (preprocessor_config.json / processor.to_dict()).
+    Covers the fixed-size ({"height", "width"}) and shortest-edge + crop
+    layouts used by ViT/DeiT/BEiT/CLIP-style processors; other layouts raise
+    ValueError so callers can fall back to the HF processor.
+    """
+
+    def __init__(self, cfg: dict, draft: bool = True):
+        size = cfg.get("size") or {}
+        crop = cfg.get("crop_size") if cfg.get("do_center_crop") else None
+        self.do_resize = cfg.get("do_resize", True)
+
+        if "height" in size and "width" in size:
+            self.resize_to = (size["width"], size["height"])
+            self.shortest_edge = None
+        elif "shortest_edge" in size and crop and "longest_edge" not in size:
+            self.resize_to = None
+            self.shortest_edge = size["shortest_edge"]
+        else:
+            raise ValueError(f"Unsupported processor size {size!r} (crop {crop!r})")
+
+        self.crop = (crop["width"], crop["height"]) if crop else None
+        self.out_size = self.crop or self.resize_to   # (w, h) fed to the model
+        if not self.do_resize and not self.crop:
+            raise ValueError("Processor without resize or crop has no fixed input size")
+
+        self.resample = cfg.get("resample", Image.Resampling.BILINEAR)
+        self.draft = draft
+
+        scale = cfg.get("rescale_factor", 1 / 255) if cfg.get("do_rescale", True) else 1.0
+        mean = np.array(cfg.get("image_mean", [0.0, 0.0, 0.0]), dtype=np.float32)
+        std = np.array(cfg.get("image_std", [1.0, 1.0, 1.0]), dtype=np.float32)
+        if not cfg.get("do_normalize", True):
+            mean, std = np.zeros(3, np.float32), np.ones(3, np.float32)
+        # (x * scale - mean) / std == x * alpha + beta
+        self.alpha = (scale / std).astype(np.float32)[:, None, None]
+        self.beta = (-mean / std).astype(np.float32)[:, None, None]
+
+        self._local = threading.local()
+
+    @classmethod
+    def from_pretrained(cls, folder: str, **kwargs) -> "FastPreprocessor":
+        with open(os.path.join(folder, "preprocessor_config.json")) as f:
+            return cls(json.load(f), **kwargs)
+
+    @classmethod
+    def from_processor(cls, processor, **kwargs) -> "FastPreprocessor":
+        return cls(processor.to_dict(), **kwargs)
+
+    # ----------------------------
+    # Per image
+    # ----------------------------
+    def _resize_size(self, w: int, h: int) -> tuple[int, int]:
+        if self.resize_to:
+            return self.resize_to
+        # Same rounding as transformers' get_resize_output_image_size.
+        short, long = (w, h) if w <= h else (h, w)
+        new_short, new_long = self.shortest_edge, int(self.shortest_edge * long / short)
+        return (new_short, new_long) if w <= h else (new_long, new_short)
+
+    def decode(self, raw: bytes) -> Image.Image:
+        """Upload bytes -> RGB image, JPEG-decoded at reduced scale when it is far above the model input."""
+        img = Image.open(io.BytesIO(raw))
+        if self.draft and img.format == "JPEG" and self.do_resize:
+            # Keep at least 2x the resize target, so the resize still
+            # antialiases from a denser grid and stays close to a full decode.
+            tw, th = self._resize_size(*img.size)
+            img.draft("RGB", (2 * tw, 2 * th))
+        return img.convert("RGB")
+
+    def fit(self, img: Image.Image) -> np.ndarray:
+        """RGB image -> uint8 HxWx3 at the model's input size."""
+        if self.do_resize:
+            target = self._resize_size(*img.size)
+            if img.size != target:
+                img = img.resize(target, self.resample)
+        if self.crop:
+            w, h = img.size
+            cw, ch = self.crop
+            top, left = (h - ch) // 2, (w - cw) // 2
+            img = img.crop((left, top, left + cw, top + ch))
+        return np.asarray(img.convert("RGB"))
+
+    def prepare(self, raw: bytes) -> np.ndarray:
+        return self.fit(self.decode(raw))
+
+    # ----------------------------
+    # Per batch
+    # ----------------------------
+    def _buffer(self, n: int) -> np.ndarray:
+        # One float32 NCHW buffer per thread, grown to the largest batch seen.
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n:
+            w, h = self.out_size
+            buf = self._local.buf = np.empty((max(n, 1), 3, h, w), dtype=np.float32)
+        return buf[:n]
+
+    def __call__(self, images: List[Union[Image.Image, np.ndarray]]) -> np.ndarray:
+        """
+        Batch of PIL images or fit() arrays -> float32 (N, 3, H, W).
+
+        The result is a view of this thread's reusable buffer: consume it
+        (run the model) before calling again from the same thread.
+        """
+        out = self._buffer(len(images))
+        for i, img in enumerate(images):
+            arr = img if isinstance(img, np.ndarray) else self.fit(img)
+            np.multiply(arr.transpose(2, 0, 1), self.alpha, out=out[i])
+        out += self.beta
+        return out
@@ -0,0 +1,219 @@
+"""
+Offline recipe retrieval: answers "what can I make with these?" from a local
+corpus, so the LLM is only needed when nothing local covers the ingredients.
+
+Corpus format (JSON lines, one recipe per line):
+
+    {"title": "Tomato bruschetta", "description": "...", "ingredients": ["tomato", "bread", "garlic", "basil"]}
+
+Build once, then point RECIPE_INDEX_PATH at the output directory:
+
+    python recipe_index.py build recipes.jsonl --out recipe_index
+
+Index layout (all NumPy .npy files, opened memory-mapped so startup doesn't
+depend on corpus size):
+  vocab.json            canonical ingredient names, position = ingredient id
+  post_offsets.npy      uint64, ingredient id -> slice of post_ids
+  post_ids.npy          uint32, recipe ids per ingredient (inverted index)
+  need.npy              uint16, non-staple ingredient count per recipe
+  ing_offsets.npy       uint64, recipe id -> slice of ing_ids
+  ing_ids.npy           uint32, each recipe's non-staple ingredient ids
+  text_offsets.npy      uint64, recipe id -> slice of text.bin
+  text.bin              UTF-8 JSON {"title", "description"} per recipe
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+# lazy.py and ingredients.py are shared with server.py from the repo root.
+# Appended, so the modules in this directory keep their names.
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from gemini_client import STAPLES  # noqa: E402
+from recipes_schema import RecipeCard  # noqa: E402
+from utils import normalize_ingredient, normalize_list  # noqa: E402
+
+
+# Tie-break between equal coverages: more matched ingredients ranks higher.
+# Small enough that (at most 64 ingredients per recipe) it never outweighs a
+# coverage difference.
+HIT_BONUS = 1e-6
+# Fractions of the best score tried, in order, when gathering top-k candidates.
+SCORE_CUTS = (0.999, 0.8, 0.6, 0.4, 0.0)  # score > best * cut
+# A query's postings are sorted and only the recipes they name are scored
+# while they number under 1/SPARSE_POSTINGS of the corpus. Past that (popular
+# ingredients post to most recipes) a dense count over every recipe is faster.
+SPARSE_POSTINGS = 8
+
+
+@dataclass
+class RecipeHit:
+    coverage: float    # share of the recipe's non-staple ingredients on hand
+    card: RecipeCard
+
+
+def _staples() -> set[str]:
+    return {normalize_ingredient(s) for s in STAPLES}
+
+
+# ----------------------------
+# Build
+# ----------------------------
+def build_index(corpus_path: str, out: str) -> int:
+    staples = _staples()
+    vocab: dict[str, int] = {}
+    postings: list[list[int]] = []
+    need, ing_offsets, ing_ids = [], [0], []
+    text_offsets = [0]
+
+    os.makedirs(out, exist_ok=True)
+    with open(corpus_path) as src, open(os.path.join(out, "text.bin"), "wb") as text:
+        for line in src:
+            if not line.strip():
+                continue
+            recipe = json.loads(line)
+            rid = len(need)
+            ids = []
+            for name in normalize_list(recipe.get("ingredients", []), max_items=64):
+                if name in staples:
+                    continue
+                iid = vocab.setdefault(name, len(vocab))
+                if iid == len(postings):
+                    postings.append([])
+                postings[iid].append(rid)
+                ids.append(iid)
+            need.append(len(ids))
+            ing_ids.extend(ids)
+            ing_offsets.append(len(ing_ids))
+
+            blob = json.dumps({"title": recipe.get("title", ""), "description": recipe.get("description", "")})
+            text.write(blob.encode())
+            text_offsets.append(text.tell())
+
+    post_offsets = np.zeros(len(postings) + 1, dtype=np.uint64)
+    post_offsets[1:] = np.cumsum([len(p) for p in postings])
+    flat = np.fromiter((r for p in postings for r in p), dtype=np.uint32, count=int(post_offsets[-1]))
+
+    np.save(os.path.join(out, "post_offsets.npy"), post_offsets)
+    np.save(os.path.join(out, "post_ids.npy"), flat)
+    np.save(os.path.join(out, "need.npy"), np.array(need, dtype=np.uint16))
+    np.save(os.path.join(out, "ing_offsets.npy"), np.array(ing_offsets, dtype=np.uint64))
+    np.save(os.path.join(out, "ing_ids.npy"), np.array(ing_ids, dtype=np.uint32))
+    np.save(os.path.join(out, "text_offsets.npy"), np.array(text_offsets, dtype=np.uint64))
+    with open(os.path.join(out, "vocab.json"), "w") as f:
+        json.dump({"ingredients": sorted(vocab, key=vocab.get), "staples": sorted(staples)}, f)
+    return len(need)
+
+
+# ----------------------------
+# Query
+# ----------------------------
+class RecipeIndex:
+    def __init__(self, path: str):
+        with open(os.path.join(path, "vocab.json")) as f:
+            meta = json.load(f)
+        self.names: list[str] = meta["ingredients"]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.staples = set(meta["staples"])
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        self.post_offsets = load("post_offsets.npy")
+        self.post_ids = load("post_ids.npy")
+        self.need = load("need.npy")
+        self.ing_offsets = load("ing_offsets.npy")
+        self.ing_ids = load("ing_ids.npy")
+        self.text_offsets = load("text_offsets.npy")
+        # Ranking key per matched ingredient: 1/need is the coverage each one
+        # adds; the small constant prefers recipes using more of what's on hand,
+        # and the per-recipe jitter makes keys unique so selection never stalls
+        # on ties (earlier recipes win).
+        need = np.maximum(np.asarray(self.need, dtype=np.float64), 1)
+        self.weight = 1 / need + HIT_BONUS - np.arange(len(need)) * (HIT_BONUS / 1024 / max(len(need), 1))
+        self.text = np.memmap(os.path.join(path, "text.bin"), dtype=np.uint8, mode="r") \
+            if int(self.text_offsets[-1]) else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.need)
+
+    def _card(self, rid: int, have: set[int]) -> RecipeCard:
+        start, end = int(self.text_offsets[rid]), int(self.text_offsets[rid + 1])
+        text = json.loads(self.text[start:end].tobytes())
+        ids = self.ing_ids[int(self.ing_offsets[rid]):int(self.ing_offsets[rid + 1])].tolist()
+        uses = [self.names[i] for i in ids if i in have]
+        missing = [self.names[i] for i in ids if i not in have]
+        return RecipeCard(
+            title=text["title"],
+            description=text["description"],
+            uses=uses,
+            missing_common_items=missing or None,
+        )
+
+    def search(self, ingredients: list[str], k: int = 5) -> list[RecipeHit]:
+        """
+        Recipes ranked by coverage (share of their non-staple ingredients in
+        `ingredients`), then by how many of `ingredients` they use.
+        """
+        have = {self.ids[n] for n in normalize_list(ingredients, max_items=64)
+                if n in self.ids and n not in self.staples}
+        if not have:
+            return []
+
+        lists = [self.post_ids[int(self.post_offsets[i]):int(self.post_offsets[i + 1])] for i in have]
+        postings = np.concatenate(lists)
+        if len(postings) * SPARSE_POSTINGS < len(self.need):
+            rids, matched = np.unique(postings, return_counts=True)
+            score = matched * self.weight[rids]
+        else:
+            rids, matched = None, np.bincount(postings, minlength=len(self.need))
+            score = matched * self.weight
+
+        # Only the best few recipes are ordered: take those within reach of
+        # the top score, widening the cut until there are k of them.
+        best = score.max()
+        for cut in SCORE_CUTS:
+            cand = np.flatnonzero(score > best * cut)
+            if len(cand) >= k:
+                break
+        if len(cand) > k:
+            cand = cand[np.argpartition(-score[cand], k - 1)[:k]]
+        cand = cand[np.argsort(-score[cand])]
+        recipes = cand if rids is None else rids[cand]
+        coverage = matched[cand] / self.need[recipes]
+
+        return [RecipeHit(float(c), self._card(int(r), have)) for r, c in zip(recipes, coverage)]
+
+
+def open_index(path: str):
+    return RecipeIndex(path) if path and os.path.exists(os.path.join(path, "vocab.json")) else None
+
+
+def main():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index a JSON-lines corpus")
+    b.add_argument("corpus")
+    b.add_argument("--out", default="recipe_index")
+    q = sub.add_parser("search", help="query an index")
+    q.add_argument("ingredients", nargs="+")
+    q.add_argument("--index", default="recipe_index")
+    q.add_argument("-k", type=int, default=5)
+    args = p.parse_args()
+
+    if args.cmd == "build":
+        n = build_index(args.corpus, args.out)
+        print(f"indexed {n} recipes into {args.out}")
+    else:
+        for hit in RecipeIndex(args.index).search(args.ingredients, k=args.k):
+            print(f"{hit.coverage:.2f}  {hit.card.title}  uses={hit.card.uses} missing={hit.card.missing_common_items}")
+
+
+if __name__ == "__main__":
+    main()
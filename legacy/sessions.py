@@ -0,0 +1,222 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from state import IngredientState
+
+
+def state_to_dict(state: IngredientState) -> dict:
+    return {
+        "hits": state.hits,
+        "misses": state.misses,
+        "confirmed": sorted(state.confirmed),
+        "last_changed_ts": state.last_changed_ts,
+        "last_key": state.last_key,
+        "cached_recipes": state.cached_recipes,
+    }
+
+
+def state_from_dict(d: dict, add_hits: int, remove_misses: int, stable_seconds: float) -> IngredientState:
+    return IngredientState(
+        add_hits=add_hits,
+        remove_misses=remove_misses,
+        stable_seconds=stable_seconds,
+        hits=d.get("hits", {}),
+        misses=d.get("misses", {}),
+        confirmed=set(d.get("confirmed", [])),
+        last_changed_ts=d.get("last_changed_ts", time.time()),
+        last_key=d.get("last_key"),
+        cached_recipes=d.get("cached_recipes", {}),
+    )
+
+
+def approx_size(obj, _seen=None) -> int:
+    """Rough deep sizeof for the containers IngredientState holds."""
+    _seen = _seen if _seen is not None else set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, _seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), _seen)
+    return size
+
+
+def trim_recipes(state: IngredientState, max_entries: int) -> None:
+    # dicts keep insertion order, so the first keys are the oldest sets
+    while len(state.cached_recipes) > max_entries:
+        state.cached_recipes.pop(next(iter(state.cached_recipes)))
+
+
+@dataclass
+class _Entry:
+    state: IngredientState
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_seen: float = field(default_factory=time.time)
+    nbytes: int = 0
+
+
+class SessionStore:
+    """
+    In-process map of session id -> IngredientState.
+
+    Sessions idle for `idle_ttl` seconds are dropped, and the least recently
+    used ones go first once `max_sessions` or `max_bytes` is exceeded.
+    Each session has its own lock, so concurrent frames from one headset
+    apply their updates one at a time while other sessions proceed.
+    """
+
+    def __init__(self, add_hits: int, remove_misses: int, stable_seconds: float,
+                 idle_ttl: float = 600.0, max_sessions: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 max_cached_recipes: int = 16):
+        self.add_hits = add_hits
+        self.remove_misses = remove_misses
+        self.stable_seconds = stable_seconds
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_cached_recipes = max_cached_recipes
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.evictions = 0
+
+    def _new_state(self) -> IngredientState:
+        return IngredientState(
+            add_hits=self.add_hits,
+            remove_misses=self.remove_misses,
+            stable_seconds=self.stable_seconds,
+        )
+
+    def _evict(self, now: float, keep: str) -> None:
+        for sid in list(self._entries.keys()):
+            over = len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+            expired = now - self._entries[sid].last_seen > self.idle_ttl
+            if not (over or expired):
+                break
+            if sid == keep:
+                continue
+            self._bytes -= self._entries.pop(sid).nbytes
+            self.evictions += 1
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[IngredientState]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = self._entries[session_id] = _Entry(state=self._new_state())
+            entry.last_seen = now
+            self._entries.move_to_end(session_id)
+            self._evict(now, keep=session_id)
+
+        with entry.lock:
+            yield entry.state
+            trim_recipes(entry.state, self.max_cached_recipes)
+            nbytes = approx_size(entry.state)
+
+        with self._lock:
+            if self._entries.get(session_id) is entry:
+                self._bytes += nbytes - entry.nbytes
+            entry.nbytes = nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._entries),
+                "approx_bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SqliteSessionStore:
+    """
+    Same interface as SessionStore, backed by one SQLite file so several
+    worker processes on a box (gunicorn -w N) see the same sessions.
+    Each update runs in an IMMEDIATE transaction, which serializes writers
+    across processes.
+    """
+
+    def __init__(self, path: str, add_hits: int, remove_misses: int, stable_seconds: float,
+                 idle_ttl: float = 600.0, max_sessions: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 max_cached_recipes: int = 16):
+        self.path = path
+        self.add_hits = add_hits
+        self.remove_misses = remove_misses
+        self.stable_seconds = stable_seconds
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_cached_recipes = max_cached_recipes
+
+        self._local = threading.local()
+        with self._conn() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL, nbytes INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections aren't shareable across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _evict(self, db: sqlite3.Connection, now: float, keep: str) -> None:
+        db.execute("DELETE FROM sessions WHERE last_seen < ? AND id != ?", (now - self.idle_ttl, keep))
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM sessions").fetchone()
+        while count > self.max_sessions or total > self.max_bytes:
+            row = db.execute(
+                "SELECT id, nbytes FROM sessions WHERE id != ? ORDER BY last_seen LIMIT 1", (keep,)
+            ).fetchone()
+            if row is None:
+                break
+            db.execute("DELETE FROM sessions WHERE id = ?", (row[0],))
+            count, total = count - 1, total - row[1]
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[IngredientState]:
+        db = self._conn()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            stored = json.loads(row[0]) if row else {}
+            state = state_from_dict(stored, self.add_hits, self.remove_misses, self.stable_seconds)
+
+            yield state
+
+            trim_recipes(state, self.max_cached_recipes)
+            blob = json.dumps(state_to_dict(state))
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, last_seen, nbytes) VALUES (?, ?, ?, ?)",
+                (session_id, blob, now, len(blob)),
+            )
+            self._evict(db, now, keep=session_id)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM sessions"
+        ).fetchone()
+        return {"backend": "sqlite", "sessions": count, "approx_bytes": total}
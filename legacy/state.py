@@ -1,25 +1,108 @@
 import time
-from dataclasses import dataclass, field
 from typing import Optional, Dict
 
-@dataclass
+import numpy as np
+
+# Initial counter capacity; grows by doubling.
+MIN_CAPACITY = 16
+
+
 class IngredientState:
-    add_hits: int
-    remove_misses: int
-    stable_seconds: float
+    """
+    Debounced ingredient set for one session.
+
+    Labels are interned to slots in two NumPy counter arrays, so a frame
+    updates every tracked label with a couple of masked array ops instead of
+    a dict walk. A label that has been missing for `remove_misses` frames is
+    evicted and its slot reused; its hit count is already 0 by then, so
+    seeing it again starts from the same state as if it had been kept.
+    """
+
+    def __init__(self, add_hits: int, remove_misses: int, stable_seconds: float,
+                 hits: Optional[dict[str, int]] = None, misses: Optional[dict[str, int]] = None,
+                 confirmed: Optional[set[str]] = None, last_changed_ts: Optional[float] = None,
+                 last_key: Optional[str] = None, cached_recipes: Optional[dict[str, dict]] = None):
+        self.add_hits = add_hits
+        self.remove_misses = remove_misses
+        self.stable_seconds = stable_seconds
+
+        self.confirmed: set[str] = set(confirmed or ())
+        self.last_changed_ts = time.time() if last_changed_ts is None else last_changed_ts
+
+        # recipe cache
+        self.last_key = last_key
+        self.cached_recipes: dict[str, dict] = cached_recipes if cached_recipes is not None else {}
 
-    # counters
-    hits: dict[str, int] = field(default_factory=dict)
-    misses: dict[str, int] = field(default_factory=dict)
+        # interning table: label <-> slot
+        self._ids: dict[str, int] = {}
+        self._labels: list[Optional[str]] = []
+        self._free: list[int] = []
 
-    confirmed: set[str] = field(default_factory=set)
-    last_changed_ts: float = field(default_factory=lambda: time.time())
+        # counters, one entry per slot
+        self._hits = np.zeros(MIN_CAPACITY, dtype=np.int64)
+        self._misses = np.zeros(MIN_CAPACITY, dtype=np.int64)
+        self._live = np.zeros(MIN_CAPACITY, dtype=bool)
 
-    # recipe cache
-    last_key: Optional[str] = None
+        hits, misses = hits or {}, misses or {}
+        for label in {**hits, **misses}:
+            i = self._intern(label)
+            self._hits[i] = hits.get(label, 0)
+            self._misses[i] = misses.get(label, 0)
 
-    cached_recipes: dict[str, dict] = field(default_factory=dict)
+    # ----------------------------
+    # Interning
+    # ----------------------------
+    def _intern(self, label: str) -> int:
+        i = self._ids.get(label)
+        if i is not None:
+            return i
+        if self._free:
+            i = self._free.pop()
+            self._labels[i] = label
+        else:
+            i = len(self._labels)
+            self._labels.append(label)
+            if i >= len(self._hits):
+                self._grow()
+        self._ids[label] = i
+        self._hits[i] = 0
+        self._misses[i] = 0
+        self._live[i] = True
+        return i
 
+    def _grow(self) -> None:
+        cap = 2 * len(self._hits)
+        for name in ("_hits", "_misses", "_live"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _evict(self, slots: np.ndarray) -> None:
+        for i in slots.tolist():
+            del self._ids[self._labels[i]]
+            self._labels[i] = None
+            self._free.append(i)
+        self._live[slots] = False
+
+    # ----------------------------
+    # Counters as dicts (persistence, debugging)
+    # ----------------------------
+    @property
+    def hits(self) -> dict[str, int]:
+        return {label: int(self._hits[i]) for label, i in self._ids.items()}
+
+    @property
+    def misses(self) -> dict[str, int]:
+        return {label: int(self._misses[i]) for label, i in self._ids.items()}
+
+    def __len__(self) -> int:
+        """Number of labels currently tracked."""
+        return len(self._ids)
+
+    # ----------------------------
+    # Debounce
+    # ----------------------------
     def update(self, observed: list[str]) -> bool:
         """
         observed: normalized list from VLM
@@ -27,31 +110,40 @@ class IngredientState:
         """
         now = time.time()
         obs_set = set(observed)
+        obs_ids = np.fromiter((self._intern(ing) for ing in obs_set), dtype=np.intp, count=len(obs_set))
 
-        # Update hits/misses
-        for ing in obs_set:
-            self.hits[ing] = self.hits.get(ing, 0) + 1
-            self.misses[ing] = 0
+        # Update hits/misses: observed labels gain a hit, every other tracked
+        # label a miss.
+        n = len(self._labels)
+        seen = np.zeros(n, dtype=bool)
+        seen[obs_ids] = True
+        missed = self._live[:n] & ~seen
 
-        for ing in list(self.hits.keys()):
-            if ing not in obs_set:
-                self.misses[ing] = self.misses.get(ing, 0) + 1
-                self.hits[ing] = 0
+        self._hits[obs_ids] += 1
+        self._misses[obs_ids] = 0
+        self._misses[:n][missed] += 1
+        self._hits[:n][missed] = 0
 
         changed = False
 
         # Confirm additions
-        for ing in obs_set:
-            if ing not in self.confirmed and self.hits.get(ing, 0) >= self.add_hits:
+        for ing, i in zip(obs_set, obs_ids.tolist()):
+            if ing not in self.confirmed and self._hits[i] >= self.add_hits:
                 self.confirmed.add(ing)
                 changed = True
 
         # Confirm removals
         for ing in list(self.confirmed):
-            if self.misses.get(ing, 0) >= self.remove_misses:
+            i = self._ids.get(ing)
+            if i is not None and self._misses[i] >= self.remove_misses:
                 self.confirmed.remove(ing)
                 changed = True
 
+        # Labels missing long enough to be removed are no longer tracked.
+        stale = np.flatnonzero(missed & (self._misses[:n] >= self.remove_misses))
+        if len(stale):
+            self._evict(stale)
+
         if changed:
             self.last_changed_ts = now
 
@@ -1,10 +1,17 @@
 # vision.py
 import os
-from google import genai
 from PIL import Image
 import io
 
-client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+from lazy import Lazy
+
+def _make_client():
+    from google import genai  # heavy import; deferred to first use
+    base_url = os.environ.get("GEMINI_BASE_URL")  # e.g. benchmarks/fake_gemini.py
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"],
+                        http_options={"base_url": base_url} if base_url else None)
+
+client = Lazy(_make_client)
 
 MODEL = "gemini-2.0-flash"
 
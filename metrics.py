@@ -0,0 +1,319 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Process-local metrics in the Prometheus text format (GET /metrics), plus
+# per-request stage timings for the Server-Timing header. No client library:
+# a span is two perf_counter() calls, a bisect and a short locked update, so
+# it can wrap every step of the hot path.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request paths reported by name; anything else (static files) is "other".
+KNOWN_PATHS = {
+    "/analyze_frame", "/analyze_frame_stream", "/analyze_frames",
+    "/cache_stats", "/queue_stats", "/ready", "/metrics", "/admin/profile",
+}
+
+# Clients opt in to Server-Timing per request with this header.
+TIMING_REQUEST_HEADER = "X-Server-Timing"
+
+
+def _label_str(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+
+class CallbackGauge(_Metric):
+    """
+    Value read at scrape time: fn() returns a number, or {label values tuple:
+    number}. kind="counter" for totals something else already keeps.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable, labels: tuple = (), kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            row[0][i] += 1
+            row[1] += value
+            row[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(r[0]), r[1], r[2])) for k, r in self._values.items())
+        out = self.header()
+        for labels, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                out.append(f"{self.name}_bucket{_label_str(self.labels + ('le',), labels + (le,))} {cumulative}")
+            out.append(f"{self.name}_sum{_label_str(self.labels, labels)} {_num(total)}")
+            out.append(f"{self.name}_count{_label_str(self.labels, labels)} {n}")
+        return out
+
+
+# By family name: a module imported twice (`python backend_async.py` runs it as
+# __main__, then backend.py imports it) registers its metrics again, and the
+# newer one replaces the first so every family is rendered once.
+REGISTRY: dict[str, _Metric] = {}
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ----------------------------
+# Metrics shared by the backends
+# ----------------------------
+REQUESTS = Counter("recipefy_requests_total", "HTTP requests by path and status.", ("path", "status"))
+REQUEST_SECONDS = Histogram("recipefy_request_seconds", "Time to response headers, by path.", ("path",))
+IN_FLIGHT = Gauge("recipefy_in_flight_requests", "Requests being handled.")
+BYTES_IN = Counter("recipefy_request_bytes_total", "Request body bytes, by path.", ("path",))
+BYTES_OUT = Counter("recipefy_response_bytes_total", "Response body bytes, by path.", ("path",))
+STAGE_SECONDS = Histogram("recipefy_stage_seconds", "Time spent per request stage.", ("stage",))
+STAGE_ERRORS = Counter("recipefy_stage_errors_total", "Exceptions raised inside a stage.", ("stage",))
+UPSTREAM_CALLS = Counter("recipefy_upstream_calls_total", "Model API calls, by kind.", ("kind",))
+UPSTREAM_ERRORS = Counter("recipefy_upstream_errors_total", "Failed model API calls, by kind.", ("kind",))
+FRAME_LOOKUPS = Counter("recipefy_frame_lookups_total",
+                        "How frames were answered: reused, cache, local or model.", ("source",))
+ENRICH_SKIPPED = Counter("recipefy_enrich_skipped_total",
+                         "Frames left with local labels: key already pending or queue full.", ("reason",))
+
+
+# ----------------------------
+# Spans and Server-Timing
+# ----------------------------
+class RequestTiming:
+    __slots__ = ("stages", "start")
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        parts = [f"{stage};dur={s * 1000:.1f}" for stage, s in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_timing: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Times the block into recipefy_stage_seconds and the current request's Server-Timing."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage)
+        timing = _timing.get()
+        if timing is not None:
+            timing.add(stage, dt)
+
+
+@contextmanager
+def upstream_call(kind: str):
+    """span("upstream_<kind>") that also counts the call and its failure."""
+    UPSTREAM_CALLS.inc(kind)
+    try:
+        with span("upstream_" + kind):
+            yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(kind)
+        raise
+
+
+def path_label(path: str) -> str:
+    return path if path in KNOWN_PATHS else "other"
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+class WSGIMetrics:
+    """
+    Request counts, latency, in-flight and body bytes for a WSGI app, plus a
+    Server-Timing header (always with `server_timing`, else when the client
+    sends X-Server-Timing: 1). Streamed bodies are counted as they are sent.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    def __call__(self, environ, start_response):
+        path = path_label(environ.get("PATH_INFO", ""))
+        want_timing = self.server_timing or environ.get("HTTP_X_SERVER_TIMING") == "1"
+        timing = RequestTiming()
+        token = _timing.set(timing)
+        IN_FLIGHT.inc()
+        BYTES_IN.inc(path, amount=float(environ.get("CONTENT_LENGTH") or 0))
+
+        def metered_start_response(status, headers, exc_info=None):
+            REQUESTS.inc(path, status.split(" ", 1)[0])
+            REQUEST_SECONDS.observe(time.perf_counter() - timing.start, path)
+            if want_timing:
+                headers = list(headers) + [("Server-Timing", timing.header()), ("Timing-Allow-Origin", "*")]
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.app(environ, metered_start_response)
+        except BaseException:
+            IN_FLIGHT.dec()
+            raise
+        finally:
+            _timing.reset(token)
+        return _MeteredBody(body, path)
+
+
+class _MeteredBody:
+    """Counts bytes as the server sends them; the request ends when the server closes it."""
+
+    def __init__(self, body, path: str):
+        self.body = body
+        self.path = path
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.body:
+            BYTES_OUT.inc(self.path, amount=float(len(chunk)))
+            yield chunk
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        IN_FLIGHT.dec()
+        close = getattr(self.body, "close", None)
+        if close is not None:
+            close()
+
+
+class ASGIMetrics:
+    """ASGI counterpart of WSGIMetrics."""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = path_label(scope.get("path", ""))
+        want_timing = self.server_timing or (TIMING_REQUEST_HEADER.lower().encode(), b"1") in scope.get("headers", [])
+        timing = RequestTiming()
+        token = _timing.set(timing)
+        IN_FLIGHT.inc()
+
+        async def metered_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                BYTES_IN.inc(path, amount=float(len(message.get("body", b""))))
+            return message
+
+        async def metered_send(message):
+            if message["type"] == "http.response.start":
+                REQUESTS.inc(path, str(message["status"]))
+                REQUEST_SECONDS.observe(time.perf_counter() - timing.start, path)
+                if want_timing:
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", timing.header().encode()),
+                        (b"timing-allow-origin", b"*"),
+                    ]}
+            elif message["type"] == "http.response.body":
+                BYTES_OUT.inc(path, amount=float(len(message.get("body", b""))))
+            await send(message)
+
+        try:
+            await self.app(scope, metered_receive, metered_send)
+        finally:
+            IN_FLIGHT.dec()
+            _timing.reset(token)
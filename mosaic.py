@@ -0,0 +1,102 @@
+import json
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+# Crop mosaics: instead of a whole camera frame, webcam_viewer can upload
+# padded crops of the boxes it needs labelled, packed into one small image,
+# plus a tile map. The server runs the usual detection on the mosaic and
+# translates box_2d back to frame coordinates with the map.
+#
+# Tile map: [{"tile": box in the mosaic, "frame": box in the camera frame}],
+# both [ymin, xmin, ymax, xmax] normalized 0-1000 like box_2d.
+
+PAD = 0.25          # crop padding per side, as a fraction of the box size
+TILE_MAX = 256      # long edge of one tile in pixels (crops are never upscaled)
+MAX_WIDTH = 768     # row width before the next row starts
+GUTTER = 8
+FILL = 128
+
+
+def _is_box(b) -> bool:
+    return isinstance(b, list) and len(b) == 4 and all(isinstance(v, (int, float)) for v in b)
+
+
+def build_mosaic(frame: np.ndarray, boxes, pad: float = PAD, tile_max: int = TILE_MAX,
+                 max_width: int = MAX_WIDTH) -> tuple[np.ndarray, list[dict]]:
+    """Packs padded crops of `boxes` (0-1000) from an HxWxC frame into rows; returns (mosaic, tile map)."""
+    h, w = frame.shape[:2]
+    crops = []
+    for ymin, xmin, ymax, xmax in boxes:
+        dy, dx = (ymax - ymin) * pad, (xmax - xmin) * pad
+        y0, x0 = int(max(0, (ymin - dy) * h / 1000)), int(max(0, (xmin - dx) * w / 1000))
+        y1, x1 = int(min(h, (ymax + dy) * h / 1000)), int(min(w, (xmax + dx) * w / 1000))
+        if y1 - y0 < 2 or x1 - x0 < 2:
+            continue
+        scale = min(1.0, tile_max / max(y1 - y0, x1 - x0))
+        size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+        crops.append(((y0, x0, y1, x1), size))
+
+    # Shelf packing, tallest first
+    crops.sort(key=lambda c: -c[1][1])
+    placed, x, y, row_h, width = [], 0, 0, 0, 0
+    for src, (cw, ch) in crops:
+        if x and x + cw > max_width:
+            x, y, row_h = 0, y + row_h + GUTTER, 0
+        placed.append((src, (cw, ch), (x, y)))
+        x, row_h, width = x + cw + GUTTER, max(row_h, ch), max(width, x + cw)
+    height = y + row_h
+
+    mosaic = np.full((max(height, 1), max(width, 1)) + frame.shape[2:], FILL, dtype=frame.dtype)
+    tiles = []
+    for (y0, x0, y1, x1), (cw, ch), (px, py) in placed:
+        crop = Image.fromarray(np.ascontiguousarray(frame[y0:y1, x0:x1]))
+        mosaic[py:py + ch, px:px + cw] = np.asarray(crop.resize((cw, ch), Image.Resampling.BILINEAR))
+        tiles.append({
+            "tile": [round(py * 1000 / height, 1), round(px * 1000 / width, 1),
+                     round((py + ch) * 1000 / height, 1), round((px + cw) * 1000 / width, 1)],
+            "frame": [round(y0 * 1000 / h, 1), round(x0 * 1000 / w, 1),
+                      round(y1 * 1000 / h, 1), round(x1 * 1000 / w, 1)],
+        })
+    return mosaic, tiles
+
+
+def parse_tiles(raw: Optional[str]) -> Optional[list]:
+    """The `tiles` form field, or None when absent; ValueError when malformed."""
+    if not raw:
+        return None
+    tiles = json.loads(raw)
+    if not isinstance(tiles, list) or not all(
+            isinstance(t, dict) and _is_box(t.get("tile")) and _is_box(t.get("frame")) for t in tiles):
+        raise ValueError('tiles must be a list of {"tile": [ymin, xmin, ymax, xmax], "frame": [...]}')
+    return tiles
+
+
+def untile(detection: dict, tiles: list) -> dict:
+    """
+    Copy of `detection` with each box_2d clipped to the tile it overlaps most
+    and mapped into frame coordinates; boxes outside every tile are dropped.
+    """
+    out = []
+    for ing in detection.get("ingredients", []):
+        box = ing.get("box_2d")
+        if not _is_box(box):
+            continue
+        best, best_area = None, 0.0
+        for t in tiles:
+            ty0, tx0, ty1, tx1 = t["tile"]
+            clipped = (max(box[0], ty0), max(box[1], tx0), min(box[2], ty1), min(box[3], tx1))
+            area = max(0.0, clipped[2] - clipped[0]) * max(0.0, clipped[3] - clipped[1])
+            if area > best_area:
+                best, best_area = (t, clipped), area
+        if best is None:
+            continue
+        t, (y0, x0, y1, x1) = best
+        ty0, tx0, ty1, tx1 = t["tile"]
+        fy0, fx0, fy1, fx1 = t["frame"]
+        sy = (fy1 - fy0) / max(ty1 - ty0, 1e-6)
+        sx = (fx1 - fx0) / max(tx1 - tx0, 1e-6)
+        out.append({**ing, "box_2d": [round(fy0 + (y0 - ty0) * sy), round(fx0 + (x0 - tx0) * sx),
+                                      round(fy0 + (y1 - ty0) * sy), round(fx0 + (x1 - tx0) * sx)]})
+    return {**detection, "ingredients": out}
@@ -0,0 +1,99 @@
+import json
+from typing import Optional
+
+import numpy as np
+
+from ingredients import normalize_ingredient
+
+# Macro estimates from nutritional_database.json. The file is parsed once at
+# startup into a float32 table (one row per dish) plus a dict from normalized
+# name to row, so a lookup is one normalize + one dict probe and requests never
+# touch the JSON.
+
+FIELDS = ("calories_per_100g", "protein_per_100g", "carbs_per_100g", "fat_per_100g", "fiber_per_100g")
+
+# Longest dish name, in words, tried when scanning a recipe title.
+MAX_NAME_WORDS = 4
+
+
+def name_key(name: str) -> str:
+    """Database keys ("apple_pie") and model labels ("Apple pie") share one form."""
+    return normalize_ingredient(name.replace("_", " "))
+
+
+class NutritionTable:
+    def __init__(self, path: str):
+        with open(path) as f:
+            data = json.load(f)
+
+        self.names: list[str] = []
+        rows = []
+        self.index: dict[str, int] = {}
+        for raw_name, macros in data.items():
+            key = name_key(raw_name)
+            if not key or key in self.index:
+                continue
+            self.index[key] = len(self.names)
+            self.names.append(raw_name.replace("_", " "))
+            rows.append([float(macros.get(f, 0.0)) for f in FIELDS])
+        self.values = np.array(rows, dtype=np.float32).reshape(-1, len(FIELDS))
+
+        # Response dicts are built once per row and shared (callers must not mutate them).
+        self._facts = [
+            {"match": name, **{f: round(float(v), 1) for f, v in zip(FIELDS, row)}}
+            for name, row in zip(self.names, self.values)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def row(self, label: str) -> Optional[int]:
+        return self.index.get(name_key(label))
+
+    def lookup(self, label: str) -> Optional[dict]:
+        """Per-100g macros for an ingredient or dish label, or None."""
+        i = self.row(label)
+        return None if i is None else self._facts[i]
+
+    def _title_row(self, title: str) -> Optional[int]:
+        # Longest dish name appearing as consecutive words of the title, e.g.
+        # "Quick chicken curry for two" -> "chicken curry".
+        words = title.replace("_", " ").split()
+        for n in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - n + 1):
+                i = self.index.get(name_key(" ".join(words[start:start + n])))
+                if i is not None:
+                    return i
+        return None
+
+    def for_recipe(self, recipe: dict) -> Optional[dict]:
+        """
+        Per-100g estimate for a recipe: the dish named in its title if the
+        table has it, else the mean over the ingredients it uses that the
+        table knows.
+        """
+        i = self._title_row(recipe.get("title", ""))
+        if i is not None:
+            return {**self._facts[i], "basis": "dish"}
+
+        rows = [r for r in (self.row(u) for u in recipe.get("uses", [])) if r is not None]
+        if not rows:
+            return None
+        mean = self.values[rows].mean(axis=0)
+        return {
+            "match": [self.names[r] for r in rows],
+            **{f: round(float(v), 1) for f, v in zip(FIELDS, mean)},
+            "basis": "ingredients",
+        }
+
+    def annotate(self, ingredients: list, recipes: list) -> tuple[list, list]:
+        """Copies of the ingredient / recipe dicts with a "nutrition" entry where known."""
+        out_ing = []
+        for ing in ingredients:
+            facts = self.lookup(ing.get("label", ""))
+            out_ing.append({**ing, "nutrition": facts} if facts else ing)
+        out_rec = []
+        for rec in recipes:
+            facts = self.for_recipe(rec)
+            out_rec.append({**rec, "nutrition": facts} if facts else rec)
+        return out_ing, out_rec
@@ -0,0 +1,285 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# On-demand sampling profiler for live requests. An admin arms it over HTTP;
+# while armed it profiles every Nth analyze request (and any request sent with
+# X-Profile: 1) by sampling the handling thread's stack from one background
+# thread, and aggregates the samples as collapsed stacks ("a;b;c count"), the
+# input flamegraph.pl and speedscope take. Disarmed, the middleware costs one
+# attribute check per request and no sampler thread exists.
+
+PROFILED_PATHS = {"/analyze_frame", "/analyze_frame_stream", "/analyze_frames"}
+PROFILE_REQUEST_HEADER = "X-Profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+DEFAULT_INTERVAL_MS = 5.0
+DEFAULT_SECONDS = 300.0
+# Distinct stacks kept; later new stacks are counted under "(truncated)".
+MAX_STACKS = 20_000
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stacks: Counter = Counter()
+        # thread ident -> profiled requests running on it; None = every thread
+        self._targets: dict[Optional[int], int] = {}
+        self._labels: dict = {}       # code object -> "file.py:func"
+        self._names: dict[int, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Condition(self._lock)
+        self.every = 0
+        self.interval = DEFAULT_INTERVAL_MS / 1000
+        self.deadline = 0.0
+        self.seen = 0
+        self.profiled = 0
+        self.samples = 0
+        self.started_at: Optional[float] = None
+
+    # ----------------------------
+    # Arming
+    # ----------------------------
+    def start(self, every: int = 0, interval_ms: float = DEFAULT_INTERVAL_MS,
+              seconds: float = DEFAULT_SECONDS, reset: bool = True) -> None:
+        with self._lock:
+            if reset:
+                self._clear()
+            self.every = max(0, int(every))
+            self.interval = max(0.001, interval_ms / 1000)
+            self.deadline = time.monotonic() + seconds
+            self.started_at = time.time()
+            self.enabled = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def stop(self) -> None:
+        with self._lock:
+            self.enabled = False
+            self._wake.notify()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._stacks.clear()
+        self.seen = self.profiled = self.samples = 0
+
+    # ----------------------------
+    # Per request
+    # ----------------------------
+    def should_profile(self, forced: bool) -> bool:
+        with self._lock:
+            if not self.enabled:
+                return False
+            if time.monotonic() > self.deadline:
+                self.enabled = False
+                return False
+            self.seen += 1
+            if forced or (self.every and self.seen % self.every == 0):
+                self.profiled += 1
+                return True
+            return False
+
+    def begin(self, ident: Optional[int]) -> None:
+        """Sample thread `ident` (None: all threads) until the matching end()."""
+        with self._lock:
+            self._targets[ident] = self._targets.get(ident, 0) + 1
+            self._wake.notify()
+
+    def end(self, ident: Optional[int]) -> None:
+        with self._lock:
+            n = self._targets.get(ident, 0) - 1
+            if n > 0:
+                self._targets[ident] = n
+            else:
+                self._targets.pop(ident, None)
+
+    # ----------------------------
+    # Sampler
+    # ----------------------------
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                while not (self.enabled and self._targets):
+                    if not self.enabled:
+                        self._targets.clear()
+                    self._wake.wait()
+                targets = list(self._targets)
+                interval = self.interval
+            frames = sys._current_frames()
+            if None in targets:
+                targets = [ident for ident in frames if ident != me]
+            stacks = [self._fold(ident, frames[ident]) for ident in targets if ident in frames]
+            del frames
+            with self._lock:
+                for stack in stacks:
+                    if stack in self._stacks or len(self._stacks) < MAX_STACKS:
+                        self._stacks[stack] += 1
+                    else:
+                        self._stacks["(truncated)"] += 1
+                self.samples += 1
+            time.sleep(interval)
+
+    def _fold(self, ident: int, frame) -> str:
+        parts = []
+        while frame is not None and len(parts) < MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+            parts.append(label)
+            frame = frame.f_back
+        parts.append(self._thread_name(ident))
+        return ";".join(reversed(parts))
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {t.ident: t.name.split(" ")[0] for t in threading.enumerate()}
+            name = self._names.get(ident, "thread")
+        return name
+
+    # ----------------------------
+    # Output
+    # ----------------------------
+    def collapsed(self) -> str:
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {n}\n" for stack, n in items)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "every": self.every,
+                "interval_ms": round(self.interval * 1000, 3),
+                "seconds_left": round(max(0.0, self.deadline - time.monotonic()), 1) if self.enabled else 0.0,
+                "started_at": self.started_at,
+                "requests_seen": self.seen,
+                "requests_profiled": self.profiled,
+                "profiling_now": sum(self._targets.values()),
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+            }
+
+
+profiler = SamplingProfiler()
+
+
+# ----------------------------
+# Admin endpoint
+# ----------------------------
+def admin_request(method: str, token: Optional[str], params, admin_token: Optional[str]):
+    """
+    Shared handler for /admin/profile. Returns (status, body, content type);
+    body is a dict (JSON) or the collapsed stacks as text.
+
+      POST   ?every=N&interval_ms=5&seconds=300   arm (resets collected stacks)
+      GET                                         collapsed stacks
+      GET    ?status=1                            counters only
+      DELETE                                      disarm, keep the stacks
+    """
+    if not admin_token:
+        return 404, {"error": "Not found"}, None
+    if not token or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        return 403, {"error": "Bad admin token"}, None
+
+    try:
+        if method == "POST":
+            profiler.start(
+                every=int(params.get("every", 0)),
+                interval_ms=float(params.get("interval_ms", DEFAULT_INTERVAL_MS)),
+                seconds=float(params.get("seconds", DEFAULT_SECONDS)),
+                reset=params.get("reset", "1") == "1",
+            )
+            return 200, profiler.status(), None
+    except ValueError as e:
+        return 400, {"error": str(e)}, None
+    if method == "DELETE":
+        profiler.stop()
+        return 200, profiler.status(), None
+    if params.get("status") == "1":
+        return 200, profiler.status(), None
+    return 200, profiler.collapsed(), "text/plain; charset=utf-8"
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+class _ProfiledBody:
+    """Keeps the thread sampled while a streamed body is produced; ends on close()."""
+
+    def __init__(self, body, ident: int):
+        self.body = body
+        self.ident = ident
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        profiler.end(self.ident)
+        close = getattr(self.body, "close", None)
+        if close is not None:
+            close()
+
+
+class WSGIProfile:
+    """Samples the handling thread of selected analyze requests while the profiler is armed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        if not profiler.enabled or environ.get("PATH_INFO") not in PROFILED_PATHS:
+            return self.app(environ, start_response)
+        if not profiler.should_profile(environ.get("HTTP_X_PROFILE") == "1"):
+            return self.app(environ, start_response)
+
+        ident = threading.get_ident()
+        profiler.begin(ident)
+        try:
+            body = self.app(environ, start_response)
+        except BaseException:
+            profiler.end(ident)
+            raise
+        return _ProfiledBody(body, ident)
+
+
+class ASGIProfile:
+    """
+    ASGI counterpart. Requests share the event loop and the to_thread pool, so
+    a profiled request samples every thread: requests running alongside it
+    show up too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (not profiler.enabled or scope["type"] != "http"
+                or scope.get("path") not in PROFILED_PATHS):
+            return await self.app(scope, receive, send)
+        forced = (PROFILE_REQUEST_HEADER.lower().encode(), b"1") in scope.get("headers", [])
+        if not profiler.should_profile(forced):
+            return await self.app(scope, receive, send)
+
+        profiler.begin(None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end(None)
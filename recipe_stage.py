@@ -0,0 +1,218 @@
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional
+
+from ingredients import normalize_list
+from metrics import upstream_call
+from schemas import RecipeList
+
+# Second stage of the pipeline: recipes depend only on the ingredient set, so
+# they're generated once per distinct set and served from cache while the
+# scene's contents stay the same (the legacy IngredientState.key() idea).
+
+STAPLES = ["salt", "pepper", "cooking oil", "butter", "water"]
+
+RECIPE_PROMPT = """
+You are Recipefy.ai, a helpful cooking assistant.
+
+AVAILABLE_INGREDIENTS (use only these as primary ingredients):
+{ingredients}
+
+ALLOWED_STAPLES (you may assume these exist without listing them as missing):
+{staples}
+{constraints}
+Task:
+Return 3 to 5 recipe suggestions that a home cook could make.
+- Each suggestion must have:
+  - title (short)
+  - description (1-2 sentences)
+  - uses (subset of AVAILABLE_INGREDIENTS actually used)
+Rules:
+- Do NOT include utensils or packaging.
+- Do NOT invent specialty ingredients.
+- Prefer simple, realistic dishes (15-40 minutes).
+"""
+
+
+def recipe_key(ingredients: list[str], constraints: Optional[dict] = None) -> str:
+    """Same layout as legacy IngredientState.key(): sorted set, then constraints."""
+    constraints = constraints or {}
+    parts = sorted(set(ingredients))
+    cparts = [f"{k}={constraints[k]}" for k in sorted(constraints.keys())]
+    return "|".join(parts + ["--"] + cparts)
+
+
+class RecipeCache:
+    """
+    Bounded LRU + TTL map of recipe_key -> recipes, optionally persisted to a
+    JSON file so a restart doesn't regenerate every set the box has seen.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+
+        self._entries: "OrderedDict[str, tuple[float, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (ts, recipes) in sorted(stored.items(), key=lambda kv: kv[1][0]):
+            if now - ts <= self.ttl_seconds:
+                self._entries[key] = (ts, recipes)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        # Write-then-rename so a crash never leaves a truncated cache file.
+        data = {k: [ts, recipes] for k, (ts, recipes) in self._entries.items()}
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".recipes-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def peek(self, key: str) -> Optional[list]:
+        """Like get(), without touching LRU order or hit/miss counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                return None
+            return entry[1]
+
+    def get(self, key: str) -> Optional[list]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, recipes: list) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), recipes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "persisted": bool(self.path),
+            }
+
+
+class RecipeStage:
+    def __init__(self, client, model: str, cache: RecipeCache):
+        self.client = client
+        self.model = model
+        self.cache = cache
+
+        # Single-flight: concurrent frames with the same set wait for one call.
+        self._inflight: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        # Runs generations that outlive a request's recipe budget.
+        self._background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recipes")
+
+    def key_for(self, labels: list[str], constraints: Optional[dict] = None) -> tuple[list[str], str]:
+        ingredients = sorted(normalize_list(labels, max_items=12))
+        return ingredients, recipe_key(ingredients, constraints)
+
+    def contents(self, ingredients: list[str], constraints: Optional[dict] = None) -> str:
+        extra = ""
+        if constraints:
+            extra = "\nCONSTRAINTS (every recipe must respect these):\n" + json.dumps(constraints) + "\n"
+        return RECIPE_PROMPT.format(ingredients=ingredients, staples=STAPLES, constraints=extra)
+
+    def config(self) -> dict:
+        return {
+            "response_mime_type": "application/json",
+            "response_json_schema": RecipeList.model_json_schema(),
+        }
+
+    def store(self, key: str, text: str) -> list:
+        recipes = [r.model_dump() for r in RecipeList.model_validate_json(text).recipes]
+        self.cache.put(key, recipes)
+        return recipes
+
+    def recipes_for(self, labels: list[str], constraints: Optional[dict] = None,
+                    budget: Optional[float] = None) -> list:
+        """
+        Recipes for this ingredient set. With a `budget` (seconds), a cache
+        miss waits at most that long and returns [] if generation is still
+        running; it finishes in the background and later frames hit the cache.
+        """
+        ingredients, key = self.key_for(labels, constraints)
+        if not ingredients:
+            return []
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if budget is None:
+            return self._generate(ingredients, key, constraints)
+
+        fut = self._background.submit(contextvars.copy_context().run, self._generate, ingredients, key, constraints)
+        try:
+            return fut.result(timeout=budget)
+        except FutureTimeout:
+            return []
+
+    def _generate(self, ingredients: list[str], key: str, constraints: Optional[dict]) -> list:
+        while True:
+            with self._lock:
+                cached = self.cache.peek(key)
+                if cached is not None:
+                    return cached
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            # Someone else is generating this set; wait and re-check the cache.
+            waiter.wait(timeout=30)
+
+        try:
+            with upstream_call("recipes"):
+                resp = self.client.models.generate_content(
+                    model=self.model,
+                    contents=self.contents(ingredients, constraints),
+                    config=self.config(),
+                )
+            return self.store(key, resp.text)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+
+# --- Schema for Structured Output ---
+class Ingredient(BaseModel):
+    label: str = Field(description="Singular lowercase name of food")
+    box_2d: list[int] = Field(description="Normalized [ymin, xmin, ymax, xmax] (0-1000)")
+
+class Recipe(BaseModel):
+    title: str
+    description: str
+    uses: list[str]
+
+class AnalysisResponse(BaseModel):
+    """What /analyze_frame returns to clients."""
+    ingredients: list[Ingredient]
+    recipes: list[Recipe]
+
+# --- Stage 1: per-frame detection ---
+class DetectionResponse(BaseModel):
+    ingredients: list[Ingredient]
+
+class FrameDetections(DetectionResponse):
+    index: int = Field(description="0-based position of the image in the request")
+
+class BatchDetectionResponse(BaseModel):
+    frames: list[FrameDetections]
+
+# --- Stage 2: recipes for a set of ingredients ---
+class RecipeList(BaseModel):
+    recipes: list[Recipe] = Field(description="3-5 recipe suggestions.")
+
+# --- Label enrichment for boxes from a local detector ---
+class BoxLabel(BaseModel):
+    index: int = Field(description="Index of the box in the given list")
+    label: str = Field(description="Singular lowercase name of food")
+
+class BoxLabels(BaseModel):
+    labels: list[BoxLabel]
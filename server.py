@@ -0,0 +1,609 @@
+import contextvars, os, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from dotenv import load_dotenv
+from flask_cors import CORS
+
+from detectors import DetectorEngine, create_detector
+from frame_cache import FrameCache, dhash
+from frame_gate import FrameGate, motion_frame
+from image_io import PreparedFrame, prepare_frame
+from ingredients import normalize_ingredient
+from lazy import Lazy, readiness, warmup
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ENRICH_SKIPPED, FRAME_LOOKUPS, CallbackGauge, WSGIMetrics, span, upstream_call
+from metrics import render as render_metrics
+from mosaic import parse_tiles, untile
+from nutrition import NutritionTable
+from profiler import ADMIN_TOKEN_HEADER, WSGIProfile, admin_request as profile_admin_request
+from recipe_stage import RecipeCache, RecipeStage
+from schemas import BatchDetectionResponse, BoxLabels, DetectionResponse
+from streaming import AnalysisEventStream, replay_events, sse
+
+load_dotenv()
+
+# Shared by every entry point (backend.py, backend-https.py, backend_async.py) so
+# one process keeps a single model client and a single warm cache, whatever it
+# listens on.
+
+# Config
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# Alternate API endpoint, e.g. benchmarks/fake_gemini.py for load tests.
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL") or None
+MODEL_ID = "gemini-2.0-flash"
+RECIPE_MODEL_ID = os.environ.get("RECIPE_MODEL_ID", MODEL_ID)
+
+# Near-duplicate frame cache (perceptual hash + Hamming tolerance)
+FRAME_CACHE_SIZE = int(os.environ.get("FRAME_CACHE_SIZE", "256"))
+FRAME_CACHE_TTL = float(os.environ.get("FRAME_CACHE_TTL", "30"))
+FRAME_CACHE_MAX_DISTANCE = int(os.environ.get("FRAME_CACHE_MAX_DISTANCE", "12"))
+
+# Per-session motion gating (reuse the last result while the scene is static)
+FRAME_GATE_ENABLED = os.environ.get("FRAME_GATE_ENABLED", "1") == "1"
+FRAME_GATE_SCAN_SECONDS = float(os.environ.get("FRAME_GATE_SCAN_SECONDS", "3.0"))
+FRAME_GATE_LOCKED_SECONDS = float(os.environ.get("FRAME_GATE_LOCKED_SECONDS", "10.0"))
+
+# Recipe stage cache (keyed by the normalized ingredient set + constraints)
+RECIPE_CACHE_SIZE = int(os.environ.get("RECIPE_CACHE_SIZE", "1024"))
+RECIPE_CACHE_TTL = float(os.environ.get("RECIPE_CACHE_TTL", str(24 * 3600)))
+RECIPE_CACHE_PATH = os.environ.get("RECIPE_CACHE_PATH") or None  # e.g. recipe_cache.json
+
+# Seconds a request waits for a recipe-cache miss before answering without
+# recipes (generation finishes in the background). Unset = always wait.
+RECIPE_BUDGET_SECONDS = float(os.environ["RECIPE_BUDGET_SECONDS"]) if os.environ.get("RECIPE_BUDGET_SECONDS") else None
+
+# Detection engine: "gemini" (remote) or a local engine from detectors.py
+# ("yolo", "onnx"). With a local engine Gemini only enriches labels and
+# writes recipes, both off the box-drawing path.
+DETECTOR_ENGINE = os.environ.get("DETECTOR_ENGINE", "gemini")
+DETECTOR_WEIGHTS = os.environ.get("DETECTOR_WEIGHTS")
+DETECTOR_CONF = float(os.environ.get("DETECTOR_CONF", "0.35"))
+DETECTOR_MAX_BOXES = int(os.environ.get("DETECTOR_MAX_BOXES", "8"))
+ENRICH_LABELS = os.environ.get("ENRICH_LABELS", "1") == "1"
+# Enrich calls queued or running at once; frames beyond that keep the local labels.
+ENRICH_MAX_PENDING = int(os.environ.get("ENRICH_MAX_PENDING", "8"))
+
+# Batch endpoint: frames per request, and frames packed into one upstream call
+BATCH_MAX_FRAMES = int(os.environ.get("BATCH_MAX_FRAMES", "32"))
+BATCH_FRAMES_PER_CALL = int(os.environ.get("BATCH_FRAMES_PER_CALL", "8"))
+
+# Clients may name their session; otherwise the remote address is used.
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "recipefy_session"
+
+WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
+
+# Per-100g macro estimates attached to ingredients and recipes in responses
+NUTRITION_ENABLED = os.environ.get("NUTRITION_ENABLED", "1") == "1"
+NUTRITION_DB_PATH = os.environ.get(
+    "NUTRITION_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nutritional_database.json")
+)
+
+# The Gemini client and local detector are built on first use; with WARMUP=1
+# the serving entry points build them on a background thread at startup
+# (GET /ready reports progress).
+WARMUP = os.environ.get("WARMUP", "1") == "1"
+
+# Per-stage timings (decode, lookup, upstream_*, recipes, serialize, ...) go
+# to GET /metrics. SERVER_TIMING=1 also returns them in a Server-Timing header
+# on every response; without it a client asks per request with X-Server-Timing: 1.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# Enables /admin/profile (sampling profiler for live analyze requests); the
+# endpoint is 404 while unset and wants this value in X-Admin-Token.
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN") or None
+
+def _make_client():
+    from google import genai  # ~1s of imports; keep it off the import path
+    http_options = {"base_url": GEMINI_BASE_URL} if GEMINI_BASE_URL else None
+    return genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)
+
+client = Lazy(_make_client)
+frame_cache = FrameCache(
+    max_entries=FRAME_CACHE_SIZE,
+    ttl_seconds=FRAME_CACHE_TTL,
+    max_distance=FRAME_CACHE_MAX_DISTANCE,
+)
+frame_gate = FrameGate(
+    scan_interval=FRAME_GATE_SCAN_SECONDS,
+    locked_refresh=FRAME_GATE_LOCKED_SECONDS,
+)
+local_detector: Optional[DetectorEngine] = None
+if DETECTOR_ENGINE != "gemini":
+    local_detector = Lazy(lambda: create_detector(
+        DETECTOR_ENGINE,
+        conf=DETECTOR_CONF,
+        max_boxes=DETECTOR_MAX_BOXES,
+        **({"weights": DETECTOR_WEIGHTS} if DETECTOR_WEIGHTS else {}),
+    ))
+nutrition: Optional[NutritionTable] = None
+if NUTRITION_ENABLED and os.path.exists(NUTRITION_DB_PATH):
+    nutrition = NutritionTable(NUTRITION_DB_PATH)
+enrich_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="enrich")
+# frame keys with an enrich call queued or running (single flight per key)
+_enriching: set[int] = set()
+_enriching_lock = threading.Lock()
+recipe_stage = RecipeStage(
+    client,
+    RECIPE_MODEL_ID,
+    RecipeCache(max_entries=RECIPE_CACHE_SIZE, ttl_seconds=RECIPE_CACHE_TTL, path=RECIPE_CACHE_PATH),
+)
+
+def _cache_counts(stats, hit: str = "hits", miss: str = "misses"):
+    return lambda: {("hit",): stats()[hit], ("miss",): stats()[miss]}
+
+CallbackGauge("recipefy_frame_cache_lookups_total", "Frame cache lookups.",
+              _cache_counts(frame_cache.stats), ("result",), kind="counter")
+CallbackGauge("recipefy_frame_gate_checks_total", "Frame gate checks; hit = previous detection reused.",
+              _cache_counts(frame_gate.stats, "reused", "passed"), ("result",), kind="counter")
+CallbackGauge("recipefy_recipe_cache_lookups_total", "Recipe cache lookups.",
+              _cache_counts(recipe_stage.cache.stats), ("result",), kind="counter")
+CallbackGauge("recipefy_frame_cache_entries", "Frames held in the frame cache.",
+              lambda: frame_cache.stats()["entries"])
+CallbackGauge("recipefy_enrich_pending", "Enrich calls queued or running.", lambda: len(_enriching))
+
+# Two stages: detection runs on every frame the caches can't answer; recipes
+# are generated only when the normalized ingredient set changes (recipe_stage).
+# The frame cache and gate store detections, so recipes always follow the
+# request's constraints.
+
+# --- Stage 1 prompt ---
+PROMPT = """
+Identify all raw food ingredients in this image.
+Provide a bounding box [ymin, xmin, ymax, xmax] (normalized 0-1000) for each.
+Return strictly JSON matching the schema.
+"""
+
+BATCH_PROMPT = """
+You are given {n} images, numbered 0 to {last} in the order they appear.
+For EACH image independently, identify all raw food ingredients with a
+bounding box [ymin, xmin, ymax, xmax] (normalized 0-1000).
+Return strictly JSON matching the schema, one entry per image with its index.
+"""
+
+ENRICH_PROMPT = """
+The image contains these food regions, as [ymin, xmin, ymax, xmax] boxes normalized 0-1000:
+{boxes}
+For each box give the singular lowercase name of the raw food ingredient inside it.
+Return strictly JSON matching the schema, one entry per box with its index.
+"""
+
+def generation_config() -> dict:
+    with span("schema"):
+        return {
+            "response_mime_type": "application/json",
+            "response_json_schema": DetectionResponse.model_json_schema(),
+        }
+
+def decode_frame(raw: bytes) -> tuple[PreparedFrame, int]:
+    """Prepare an upload for the model and compute its cache key."""
+    with span("decode"):
+        frame = prepare_frame(raw)
+        return frame, dhash(frame.thumb)
+
+def image_part(frame: PreparedFrame):
+    from google.genai import types
+    return types.Part.from_bytes(data=frame.data, mime_type=frame.mime_type)
+
+def model_contents(frame: PreparedFrame) -> list:
+    return [PROMPT, image_part(frame)]
+
+def batch_generation_config() -> dict:
+    with span("schema"):
+        return {
+            "response_mime_type": "application/json",
+            "response_json_schema": BatchDetectionResponse.model_json_schema(),
+        }
+
+def batch_contents(frames: list[PreparedFrame]) -> list:
+    contents = [BATCH_PROMPT.format(n=len(frames), last=len(frames) - 1)]
+    for i, frame in enumerate(frames):
+        contents.append(f"Image {i}:")
+        contents.append(image_part(frame))
+    return contents
+
+def session_id_for(headers, cookies, remote_addr) -> str:
+    return headers.get(SESSION_HEADER) or cookies.get(SESSION_COOKIE) or remote_addr or "anonymous"
+
+def constraints_from(form) -> dict:
+    """Optional `constraints` form field: a JSON object such as {"diet": "vegetarian"}."""
+    try:
+        constraints = json.loads(form.get("constraints") or "{}")
+    except ValueError:
+        return {}
+    return constraints if isinstance(constraints, dict) else {}
+
+def known_labels_from(form) -> list[str]:
+    """
+    Optional `known_labels` form field: a JSON list of ingredients the client
+    already identified outside this image (e.g. with a crop mosaic upload);
+    recipes cover them too.
+    """
+    try:
+        labels = json.loads(form.get("known_labels") or "[]")
+    except ValueError:
+        return []
+    return [l for l in labels if isinstance(l, str)] if isinstance(labels, list) else []
+
+def labels_of(detection: dict) -> list[str]:
+    return [i.get("label", "") for i in detection.get("ingredients", []) if i.get("label")]
+
+def with_recipes(detection: dict, recipes: list, reused: bool) -> dict:
+    ingredients = detection.get("ingredients", [])
+    if nutrition is not None:
+        ingredients, recipes = nutrition.annotate(ingredients, recipes)
+    return {"ingredients": ingredients, "recipes": recipes, "reused": reused}
+
+def is_reused(source: str) -> bool:
+    return source in ("reused", "cache")
+
+def recipes_for(detection: dict, constraints: dict, known_labels: tuple = ()) -> list:
+    with span("recipes"):
+        labels = labels_of(detection) + list(known_labels)
+        return recipe_stage.recipes_for(labels, constraints, budget=RECIPE_BUDGET_SECONDS)
+
+# ----------------------------
+# Local detection + label enrichment
+# ----------------------------
+def enrich_labels(img: PreparedFrame, key: int, detection: dict) -> None:
+    """
+    Ask Gemini to name the local detector's boxes and cache the relabeled
+    detection under this frame's key, so the next similar frame gets it.
+    """
+    ingredients = detection.get("ingredients", [])
+    if not ingredients:
+        return
+    boxes = "\n".join(f"{i}: {ing['box_2d']}" for i, ing in enumerate(ingredients))
+    with upstream_call("enrich"):
+        response = client.models.generate_content(
+            model=MODEL_ID,
+            contents=[ENRICH_PROMPT.format(boxes=boxes),
+                      image_part(img)],
+            config={
+                "response_mime_type": "application/json",
+                "response_json_schema": BoxLabels.model_json_schema(),
+            },
+        )
+    names = {b.index: b.label for b in BoxLabels.model_validate_json(response.text).labels}
+    enriched = [{**ing, "label": names.get(i, ing["label"])} for i, ing in enumerate(ingredients)]
+    frame_cache.put(key, json.dumps({"ingredients": enriched}))
+
+def detect_locally(img: PreparedFrame, key: int) -> dict:
+    with span("local_detect"):
+        detection = {"ingredients": local_detector.detect(img)}
+    # Cached right away so similar frames don't re-run the detector or queue
+    # another enrich while this one waits on a slow upstream.
+    frame_cache.put(key, json.dumps(detection))
+    if ENRICH_LABELS and detection["ingredients"]:
+        submit_enrich(img, key, detection)
+    return detection
+
+def submit_enrich(img: PreparedFrame, key: int, detection: dict) -> None:
+    """Queues one enrich call per frame key; when ENRICH_MAX_PENDING are pending the frame keeps its local labels."""
+    with _enriching_lock:
+        if key in _enriching:
+            ENRICH_SKIPPED.inc("duplicate")
+            return
+        if len(_enriching) >= ENRICH_MAX_PENDING:
+            ENRICH_SKIPPED.inc("full")
+            return
+        _enriching.add(key)
+    try:
+        enrich_pool.submit(_enrich_once, img, key, detection)
+    except RuntimeError:   # pool shut down
+        with _enriching_lock:
+            _enriching.discard(key)
+
+def _enrich_once(img: PreparedFrame, key: int, detection: dict) -> None:
+    try:
+        enrich_labels(img, key, detection)
+    finally:
+        with _enriching_lock:
+            _enriching.discard(key)
+
+def lookup_frame(img: PreparedFrame, key: int, session_id: str):
+    """
+    Try to detect a frame without the model.
+    Returns (detection or None, source, motion frame); source is "reused",
+    "cache", "local" (on-box detector) or "" when the model has to run.
+    """
+    detection, source, frame = _lookup_frame(img, key, session_id)
+    FRAME_LOOKUPS.inc(source or "model")
+    return detection, source, frame
+
+def _lookup_frame(img: PreparedFrame, key: int, session_id: str):
+    with span("lookup"):
+        frame = None
+        if FRAME_GATE_ENABLED:
+            frame = motion_frame(img.thumb)
+            prev = frame_gate.check(session_id, frame)
+            if prev is not None:
+                return prev, "reused", frame
+
+        cached = frame_cache.get(key)
+        if cached is not None:
+            return json.loads(cached), "cache", frame
+
+    if local_detector is not None:
+        detection = detect_locally(img, key)
+        if frame is not None:
+            frame_gate.record(session_id, frame, detection)
+        return detection, "local", frame
+
+    return None, "", frame
+
+def remember_frame(key: int, session_id: str, frame, text: str) -> dict:
+    """Store a fresh detection and return it."""
+    detection = json.loads(text)
+    frame_cache.put(key, text)
+    if frame is not None:
+        frame_gate.record(session_id, frame, detection)
+    return detection
+
+def cache_header(source: str) -> dict:
+    return {"X-Cache": {"reused": "REUSED", "cache": "HIT"}.get(source, "MISS")}
+
+def analyze_image(img: PreparedFrame, key: int, session_id: str, constraints: dict,
+                  tiles: Optional[list] = None, known_labels: tuple = ()) -> tuple[dict, str]:
+    """
+    Returns (AnalysisResponse payload + "reused" flag, source). With `tiles`
+    the image is a crop mosaic and boxes come back in frame coordinates.
+    """
+    detection, source, frame = lookup_frame(img, key, session_id)
+    if detection is None:
+        with upstream_call("detect"):
+            response = client.models.generate_content(
+                model=MODEL_ID,
+                contents=model_contents(img),
+                config=generation_config(),
+            )
+        detection = remember_frame(key, session_id, frame, response.text)
+
+    # Caches hold mosaic coordinates: a near-identical mosaic has the same layout.
+    if tiles:
+        detection = untile(detection, tiles)
+    recipes = recipes_for(detection, constraints, known_labels)
+    return with_recipes(detection, recipes, is_reused(source)), source
+
+# ----------------------------
+# Streaming analysis (SSE)
+# ----------------------------
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def stream_analysis(img: PreparedFrame, key: int, session_id: str, frame, constraints: dict):
+    """Yields SSE events for a frame the cache couldn't answer."""
+    events = AnalysisEventStream()
+    try:
+        with upstream_call("stream"):
+            for chunk in client.models.generate_content_stream(
+                model=MODEL_ID,
+                contents=model_contents(img),
+                config=generation_config(),
+            ):
+                yield from events.on_chunk(chunk.text or "")
+        detection = remember_frame(key, session_id, frame, events.text)
+        yield from events.finish(with_recipes(detection, recipes_for(detection, constraints), reused=False))
+    except Exception as e:
+        yield sse("error", {"error": str(e)})
+
+# ----------------------------
+# Batch analysis
+# ----------------------------
+def prepare_batch(raws: list[bytes]) -> tuple[list, list[list]]:
+    """
+    Decode every frame and answer what the frame cache can.
+    Returns (results, chunks): `results` has one detection slot per frame
+    (None until answered), `chunks` groups the remaining (index, frame, key)
+    tuples into upstream calls of at most BATCH_FRAMES_PER_CALL frames.
+    """
+    results = [None] * len(raws)
+    pending = []
+    for i, raw in enumerate(raws):
+        try:
+            frame, key = decode_frame(raw)
+        except Exception as e:
+            results[i] = {"index": i, "error": f"invalid image: {e}"}
+            continue
+
+        # Batch frames aren't one camera's timeline, so only the frame cache
+        # applies here, not the per-session motion gate.
+        cached = frame_cache.get(key)
+        if cached is not None:
+            results[i] = {"index": i, **json.loads(cached), "reused": True}
+            continue
+        if local_detector is not None:
+            try:
+                results[i] = {"index": i, **detect_locally(frame, key), "reused": False}
+            except Exception as e:
+                results[i] = {"index": i, "error": str(e)}
+            continue
+        pending.append((i, frame, key))
+
+    chunks = [pending[k:k + BATCH_FRAMES_PER_CALL] for k in range(0, len(pending), BATCH_FRAMES_PER_CALL)]
+    return results, chunks
+
+def finish_chunk(results: list, chunk: list, text: str | None, error: Exception | None = None) -> None:
+    """Fan one upstream batch answer back out to its frames."""
+    if error is None:
+        try:
+            by_position = {f["index"]: f for f in json.loads(text).get("frames", [])}
+        except Exception as e:
+            error = e
+
+    for pos, (i, _frame, key) in enumerate(chunk):
+        if error is not None:
+            results[i] = {"index": i, "error": str(error)}
+            continue
+        item = by_position.get(pos)
+        if item is None:
+            results[i] = {"index": i, "error": "frame missing from model response"}
+            continue
+        detection = remember_frame(key, None, None, json.dumps({"ingredients": item.get("ingredients", [])}))
+        results[i] = {"index": i, **detection, "reused": False}
+
+def attach_recipes(results: list, constraints: dict) -> list:
+    """
+    Second stage for a batch: one recipe lookup per distinct ingredient set,
+    all started at once so a batch of N new sets waits for one round trip.
+    """
+    keys = [None if "error" in r else recipe_stage.key_for(labels_of(r), constraints)[1] for r in results]
+    sets = {key: r for key, r in zip(keys, results) if key is not None}
+    if not sets:
+        return results
+
+    with ThreadPoolExecutor(max_workers=len(sets)) as pool:
+        futures = {key: pool.submit(contextvars.copy_context().run, recipes_for, r, constraints)
+                   for key, r in sets.items()}
+        out = []
+        for key, r in zip(keys, results):
+            if key is None:
+                out.append(r)
+                continue
+            try:
+                out.append({"index": r["index"], **with_recipes(r, futures[key].result(), r["reused"])})
+            except Exception as e:
+                out.append({"index": r["index"], "error": str(e)})
+    return out
+
+def _call_batch_chunk(chunk: list) -> str:
+    with upstream_call("batch"):
+        response = client.models.generate_content(
+            model=MODEL_ID,
+            contents=batch_contents([frame for _i, frame, _key in chunk]),
+            config=batch_generation_config(),
+        )
+    return response.text
+
+def analyze_batch(raws: list[bytes], constraints: dict) -> list[dict]:
+    results, chunks = prepare_batch(raws)
+    if not chunks:
+        return attach_recipes(results, constraints)
+
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        # each call runs in the request's context so its span lands in Server-Timing
+        futures = [(chunk, pool.submit(contextvars.copy_context().run, _call_batch_chunk, chunk))
+                   for chunk in chunks]
+        for chunk, fut in futures:
+            try:
+                finish_chunk(results, chunk, fut.result())
+            except Exception as e:
+                finish_chunk(results, chunk, None, e)
+    return attach_recipes(results, constraints)
+
+
+def lazy_components() -> dict:
+    components = {"gemini_client": client}
+    if local_detector is not None:
+        components["detector"] = local_detector
+    return components
+
+def start_warmup() -> None:
+    if WARMUP:
+        warmup(*lazy_components().values())
+
+def create_app() -> Flask:
+    app = Flask(__name__, static_folder=WEB_DIR)
+    CORS(app, expose_headers=["Server-Timing"])  # Enable CORS for web frontend and Unity
+    start_warmup()
+    app.wsgi_app = WSGIMetrics(WSGIProfile(app.wsgi_app), server_timing=SERVER_TIMING)
+
+    @app.get("/ready")
+    def ready():
+        body, ok = readiness(lazy_components())
+        return jsonify(body), 200 if ok else 503
+
+    @app.get("/cache_stats")
+    def cache_stats():
+        return jsonify({
+            **frame_cache.stats(),
+            "frame_gate": frame_gate.stats(),
+            "recipe_cache": recipe_stage.cache.stats(),
+            "normalize_cache": normalize_ingredient.cache_info()._asdict(),
+        })
+
+    @app.get("/metrics")
+    def metrics():
+        return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+    @app.route("/admin/profile", methods=["GET", "POST", "DELETE"])
+    def admin_profile():
+        status, body, content_type = profile_admin_request(
+            request.method, request.headers.get(ADMIN_TOKEN_HEADER), request.args, PROFILE_ADMIN_TOKEN)
+        if content_type is None:
+            return jsonify(body), status
+        return Response(body, status=status, content_type=content_type)
+
+    # Serve web frontend
+    @app.route('/')
+    def serve_index():
+        return send_from_directory(WEB_DIR, 'index.html')
+
+    @app.route('/<path:filename>')
+    def serve_static(filename):
+        return send_from_directory(WEB_DIR, filename)
+
+    @app.post("/analyze_frame")
+    def analyze_frame():
+        with span("parse"):
+            files = request.files  # parses the multipart body
+        if "file" not in files:
+            return jsonify({"error": "No file"}), 400
+        try:
+            tiles = parse_tiles(request.form.get("tiles"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            img, key = decode_frame(files["file"].read())
+            session_id = session_id_for(request.headers, request.cookies, request.remote_addr)
+            payload, source = analyze_image(img, key, session_id, constraints_from(request.form),
+                                            tiles, known_labels_from(request.form))
+            with span("serialize"):
+                body = jsonify(payload)
+            return body, 200, cache_header(source)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.post("/analyze_frame_stream")
+    def analyze_frame_stream():
+        with span("parse"):
+            files = request.files
+        if "file" not in files:
+            return jsonify({"error": "No file"}), 400
+        if request.form.get("tiles"):
+            return jsonify({"error": "Crop mosaics are only supported by /analyze_frame"}), 400
+
+        try:
+            img, key = decode_frame(files["file"].read())
+            session_id = session_id_for(request.headers, request.cookies, request.remote_addr)
+            constraints = constraints_from(request.form)
+            detection, source, frame = lookup_frame(img, key, session_id)
+            if detection is not None:
+                recipes = recipes_for(detection, constraints)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+        if detection is not None:
+            events = replay_events(with_recipes(detection, recipes, is_reused(source)))
+        else:
+            events = stream_with_context(stream_analysis(img, key, session_id, frame, constraints))
+        return Response(events, mimetype="text/event-stream", headers={**SSE_HEADERS, **cache_header(source)})
+
+    @app.post("/analyze_frames")
+    def analyze_frames():
+        with span("parse"):
+            uploads = request.files.getlist("file") + request.files.getlist("files")
+        if not uploads:
+            return jsonify({"error": "No file"}), 400
+        if len(uploads) > BATCH_MAX_FRAMES:
+            return jsonify({"error": f"At most {BATCH_MAX_FRAMES} frames per batch"}), 413
+
+        try:
+            raws = [u.read() for u in uploads]
+            results = analyze_batch(raws, constraints_from(request.form))
+            with span("serialize"):
+                return jsonify({"results": results})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    return app
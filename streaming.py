@@ -0,0 +1,120 @@
+import json
+
+
+def sse(event: str, data) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class IngredientStreamParser:
+    """
+    Incremental scanner over the model's streamed AnalysisResponse JSON.
+
+    The schema lists `ingredients` before `recipes`, so each ingredient object
+    can be parsed and emitted as soon as its closing brace arrives, long
+    before the recipes have been generated.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.ingredients: list[dict] = []
+        self.ingredients_done = False
+
+        self._pos = 0            # next unscanned char
+        self._in_array = False
+        self._obj_start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Add streamed text; returns ingredients completed by this chunk."""
+        self.text += chunk
+        if self.ingredients_done:
+            return []
+
+        if not self._in_array:
+            key = self.text.find('"ingredients"')
+            if key < 0:
+                return []
+            bracket = self.text.find("[", key)
+            if bracket < 0:
+                return []
+            self._in_array = True
+            self._pos = bracket + 1
+
+        out = []
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        ing = json.loads(text[self._obj_start:i + 1])
+                    except ValueError:
+                        ing = None
+                    if isinstance(ing, dict) and ing.get("label"):
+                        self.ingredients.append(ing)
+                        out.append(ing)
+            elif ch == "]" and self._depth == 0:
+                self.ingredients_done = True
+                i += 1
+                break
+            i += 1
+
+        self._pos = i
+        return out
+
+
+class AnalysisEventStream:
+    """
+    Turns streamed model text into SSE events:
+      ingredient (one per box, as parsed) -> ingredients -> recipes -> done
+    """
+
+    def __init__(self):
+        self.parser = IngredientStreamParser()
+        self._sent_list = False
+
+    @property
+    def text(self) -> str:
+        return self.parser.text
+
+    def on_chunk(self, chunk: str) -> list[str]:
+        events = [sse("ingredient", ing) for ing in self.parser.feed(chunk)]
+        if self.parser.ingredients_done and not self._sent_list:
+            self._sent_list = True
+            events.append(sse("ingredients", {"ingredients": self.parser.ingredients}))
+        return events
+
+    def finish(self, payload: dict) -> list[str]:
+        events = []
+        if not self._sent_list:
+            # Parser never saw the array close (odd formatting); send the final list.
+            known = len(self.parser.ingredients)
+            events += [sse("ingredient", ing) for ing in payload.get("ingredients", [])[known:]]
+            events.append(sse("ingredients", {"ingredients": payload.get("ingredients", [])}))
+            self._sent_list = True
+        events.append(sse("recipes", {"recipes": payload.get("recipes", [])}))
+        events.append(sse("done", payload))
+        return events
+
+
+def replay_events(payload: dict) -> list[str]:
+    """Events for a result that is already complete (cache / reuse)."""
+    return AnalysisEventStream().finish(payload)
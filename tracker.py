@@ -0,0 +1,161 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+# Multi-object tracker for webcam_viewer. Each frame's YOLO boxes (normalized
+# [ymin, xmin, ymax, xmax], 0-1000) are matched to the live tracks by IoU, with
+# a centroid-distance fallback for small or fast boxes, using optimal
+# (Hungarian) assignment. Tracks keep their id and Gemini label across frames,
+# so a label is fetched once per object instead of once per box layout.
+
+MATCH_IOU = 0.3
+MATCH_CENTER_DIST = 80.0   # 0-1000 units; centroid fallback below MATCH_IOU
+LABEL_MATCH_IOU = 0.1      # Gemini box_2d vs the track's box when the frame was sent
+MAX_MISSES = 10            # frames a track survives without a matching box
+MIN_HITS = 3               # frames before a track is shown as confirmed and gets labelled
+
+_NO_MATCH = 1e6
+
+
+@dataclass(frozen=True)
+class TrackedBox:
+    id: int
+    box: tuple          # (ymin, xmin, ymax, xmax), 0-1000
+    label: str          # "" until Gemini names it
+    confirmed: bool
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (n, 4) and (m, 4) [ymin, xmin, ymax, xmax] boxes -> (n, m)."""
+    lo = np.maximum(a[:, None, :2], b[None, :, :2])
+    hi = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(hi - lo, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).clip(0).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).clip(0).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def center_dist(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    return np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+
+
+def assign(a: np.ndarray, b: np.ndarray, min_iou: float, max_dist: float = 0.0):
+    """
+    Optimal one-to-one (rows of a, rows of b) pairs. A pair needs IoU >= min_iou
+    or, with max_dist, centres closer than max_dist; IoU pairs always cost less.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.empty(0, int), np.empty(0, int)
+    iou = iou_matrix(a, b)
+    cost = np.where(iou >= min_iou, 1.0 - iou, _NO_MATCH)
+    if max_dist > 0:
+        dist = center_dist(a, b)
+        cost = np.where((cost == _NO_MATCH) & (dist < max_dist), 1.0 + dist / max_dist, cost)
+    rows, cols = linear_sum_assignment(cost)
+    keep = cost[rows, cols] < _NO_MATCH
+    return rows[keep], cols[keep]
+
+
+class Tracker:
+    """
+    Track state lives in parallel arrays (one row per track). update() runs on
+    the YOLO thread and label() on the analysis thread, hence the lock.
+    """
+
+    def __init__(self, max_misses: int = MAX_MISSES, min_hits: int = MIN_HITS):
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.misses = np.empty(0, dtype=np.int32)
+        self.asked = np.empty(0, dtype=np.float64)   # time.time() of the last Gemini request, 0 = never
+        self.labels: dict[int, str] = {}
+
+    def update(self, norm_boxes) -> list[TrackedBox]:
+        """Matches this frame's boxes to tracks; returns the tracks seen in this frame."""
+        boxes = np.asarray(norm_boxes, dtype=np.float32).reshape(-1, 4)
+        with self._lock:
+            rows, cols = assign(self.boxes, boxes, MATCH_IOU, MATCH_CENTER_DIST)
+
+            self.misses += 1
+            self.boxes[rows] = boxes[cols]
+            self.hits[rows] += 1
+            self.misses[rows] = 0
+
+            new = np.setdiff1d(np.arange(len(boxes)), cols)
+            n = len(new)
+            self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + n)])
+            self._next_id += n
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int32)])
+            self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int32)])
+            self.asked = np.concatenate([self.asked, np.zeros(n)])
+
+            keep = self.misses <= self.max_misses
+            if not keep.all():
+                for track_id in self.ids[~keep]:
+                    self.labels.pop(int(track_id), None)
+                self.ids, self.boxes = self.ids[keep], self.boxes[keep]
+                self.hits, self.misses, self.asked = self.hits[keep], self.misses[keep], self.asked[keep]
+
+            return self._visible()
+
+    def _visible(self) -> list[TrackedBox]:
+        return [
+            TrackedBox(int(i), tuple(int(v) for v in b), self.labels.get(int(i), ""), bool(h >= self.min_hits))
+            for i, b, h in zip(self.ids[self.misses == 0], self.boxes[self.misses == 0], self.hits[self.misses == 0])
+        ]
+
+    # ----------------------------
+    # Labels
+    # ----------------------------
+    def unlabeled(self, retry_after: float, now: Optional[float] = None) -> list[int]:
+        """Confirmed, visible tracks without a label that weren't asked about in the last retry_after seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = (self.hits >= self.min_hits) & (self.misses == 0) & (now - self.asked > retry_after)
+            return [int(i) for i in self.ids[due] if int(i) not in self.labels]
+
+    def never_asked(self, track_ids) -> bool:
+        with self._lock:
+            return bool((self.asked[np.isin(self.ids, track_ids)] == 0).any())
+
+    def mark_asked(self, track_ids, now: Optional[float] = None) -> dict[int, tuple]:
+        """Records the request and returns {track id: box} of the visible tracks, to label its result with."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.asked[np.isin(self.ids, track_ids)] = now
+            visible = self.misses == 0
+            return {int(i): tuple(float(v) for v in b) for i, b in zip(self.ids[visible], self.boxes[visible])}
+
+    def known_labels(self) -> list[str]:
+        with self._lock:
+            return sorted(set(self.labels.values()))
+
+    def label(self, sent_boxes: dict[int, tuple], ingredients: list[dict]) -> int:
+        """
+        Attaches Gemini labels to the tracks whose boxes (as of the request)
+        best overlap each box_2d; returns how many tracks got one.
+        """
+        found = [(i.get("label", ""), i.get("box_2d")) for i in ingredients]
+        found = [(lbl, b) for lbl, b in found if lbl and b and len(b) == 4]
+        if not sent_boxes or not found:
+            return 0
+        track_ids = list(sent_boxes)
+        rows, cols = assign(np.array([sent_boxes[i] for i in track_ids], dtype=np.float32),
+                            np.array([b for _lbl, b in found], dtype=np.float32), LABEL_MATCH_IOU)
+        with self._lock:
+            live = set(self.ids.tolist())
+            for r, c in zip(rows, cols):
+                if track_ids[r] in live:
+                    self.labels[track_ids[r]] = found[c][0]
+        return len(rows)
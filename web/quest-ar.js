@@ -5,6 +5,9 @@ class RecipefyAR {
         this.lastAnalysis = null;
         this.analysisInterval = 3000; // 3 seconds between analyses
         this.backendUrl = 'http://localhost:4444/analyze_frame';
+        // Streams boxes as soon as they are parsed, recipes afterwards (SSE)
+        this.streamUrl = 'http://localhost:4444/analyze_frame_stream';
+        this.useStreaming = true;
         this.ingredients = [];
         this.recipes = [];
         
@@ -157,8 +160,12 @@ class RecipefyAR {
             const blob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.8));
             
             // Send to backend
-            const result = await this.sendToBackend(blob);
-            this.processAnalysisResult(result);
+            if (this.useStreaming) {
+                await this.streamFromBackend(blob);
+            } else {
+                const result = await this.sendToBackend(blob);
+                this.processAnalysisResult(result);
+            }
             
         } catch (error) {
             console.error('Analysis failed:', error);
@@ -184,6 +191,70 @@ class RecipefyAR {
         return await response.json();
     }
 
+    async streamFromBackend(imageBlob) {
+        const formData = new FormData();
+        formData.append('file', imageBlob, 'frame.jpg');
+
+        const response = await fetch(this.streamUrl, {
+            method: 'POST',
+            body: formData
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let fresh = true;
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // SSE messages are separated by a blank line
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) >= 0) {
+                const message = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+
+                let event = 'message';
+                let data = '';
+                for (const line of message.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                if (!data) continue;
+                const payload = JSON.parse(data);
+
+                if (event === 'ingredient') {
+                    // Replace last frame's boxes on the first new one, then draw incrementally
+                    if (fresh) {
+                        this.ingredients = [];
+                        fresh = false;
+                    }
+                    this.ingredients.push(payload);
+                    this.updateUI();
+                    this.addAROverlays();
+                } else if (event === 'ingredients') {
+                    this.ingredients = payload.ingredients || [];
+                    this.updateUI();
+                    this.addAROverlays();
+                    this.updateStatus('Finding recipes...');
+                } else if (event === 'recipes') {
+                    this.recipes = payload.recipes || [];
+                    this.updateUI();
+                } else if (event === 'done') {
+                    this.processAnalysisResult(payload);
+                } else if (event === 'error') {
+                    throw new Error(payload.error);
+                }
+            }
+        }
+    }
+
     processAnalysisResult(result) {
         this.lastAnalysis = result;
         this.ingredients = result.ingredients || [];
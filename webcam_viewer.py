@@ -1,10 +1,12 @@
-import time, threading, textwrap
+import json, time, threading, textwrap
 import cv2
-import numpy as np
 import httpx
 
 from ultralytics import YOLO
 
+from mosaic import build_mosaic
+from tracker import Tracker
+
 # ----------------------------
 # Config
 # ----------------------------
@@ -21,9 +23,36 @@ YOLO_CONF = 0.35
 YOLO_IOU = 0.45
 MAX_BOXES = 8
 
-# Gemini call cadence
-SCAN_INTERVAL_SECONDS = 3.0
-LOCKED_REFRESH_SECONDS = 10.0
+# YOLO boxes are tracked across frames; Gemini is asked only when a track
+# (seen in TRACK_MIN_HITS frames) has no label yet. A track the answer didn't
+# label is asked about again after LABEL_RETRY_SECONDS.
+TRACK_MIN_HITS = 3
+TRACK_MAX_MISSES = 10   # frames a track outlives its box (occlusion, missed detections)
+LABEL_RETRY_SECONDS = 3.0
+
+# Capture, YOLO and rendering run on their own threads: the display follows
+# the camera, drawing the latest boxes while YOLO works on the newest frame
+# (older frames are dropped). False runs the three serially per frame.
+PIPELINED = True
+
+# Frames are downscaled to this long edge before the JPEG upload (boxes are
+# normalized to 0-1000, so they don't depend on the upload size).
+UPLOAD_MAX_LONG_EDGE = 960
+UPLOAD_JPEG_QUALITY = 80
+
+# Upload only padded crops of the tracks that need a label, tiled into one
+# small mosaic with a tile map (the server maps boxes back to the frame), plus
+# the labels already known so recipes still cover everything in view. Falls
+# back to the full frame when there are many crops or the mosaic's JPEG comes
+# out larger. Needs server.py (backend.py): the legacy app on SERVER_URL's
+# port 4444 ignores the tile map.
+UPLOAD_MOSAIC = False
+MOSAIC_MAX_AREA = 0.6   # of the downscaled frame
+MOSAIC_MAX_BOXES = 4    # past ~4 crops the mosaic's JPEG outgrows the frame's (bench_mosaic.py)
+
+# FPS / per-stage latency counters in the bottom-left corner
+SHOW_STATS = True
+STATS_SMOOTHING = 0.1   # EWMA weight of the newest sample
 
 net_client = httpx.Client(http2=True, timeout=15.0)
 
@@ -32,42 +61,19 @@ net_client = httpx.Client(http2=True, timeout=15.0)
 # State
 # ----------------------------
 class ARState:
+    # Written by the analysis thread, read by render: take `lock` to change payload.
     def __init__(self):
+        self.lock = threading.Lock()
         self.payload = {}            # Gemini response
-        self.in_flight = False
-
-        self.is_locked = False
-        self.stable_hits = 0
-        self.last_labels = []
-        self.prev_gray = None
-
-        self.last_boxes_sig = None
-        self.last_call_time = 0.0
 
 
 state = ARState()
+tracker = Tracker(max_misses=TRACK_MAX_MISSES, min_hits=TRACK_MIN_HITS)
 
 
 # ----------------------------
 # Helpers
 # ----------------------------
-def detect_significant_motion(frame):
-    small = cv2.resize(frame, (320, 180))
-    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (35, 35), 0)
-
-    if state.prev_gray is None:
-        state.prev_gray = gray
-        return False
-
-    diff = cv2.absdiff(state.prev_gray, gray)
-    _, thresh = cv2.threshold(diff, 40, 255, cv2.THRESH_BINARY)
-    motion_val = np.sum(thresh)
-
-    state.prev_gray = gray
-    return motion_val > 50000
-
-
 def yolo_boxes_to_norm(boxes_xyxy, frame_w, frame_h):
     norm = []
     for (x1, y1, x2, y2) in boxes_xyxy:
@@ -79,89 +85,156 @@ def yolo_boxes_to_norm(boxes_xyxy, frame_w, frame_h):
     return norm
 
 
-def boxes_signature(norm_boxes):
-    if not norm_boxes:
-        return None
-    q = []
-    for b in norm_boxes:
-        q.append(tuple((v // 25) for v in b))  # quantize
-    return tuple(sorted(q))
+def downscale(frame, max_long_edge=UPLOAD_MAX_LONG_EDGE):
+    """A new array no larger than max_long_edge, safe to hand to another thread."""
+    h, w = frame.shape[:2]
+    scale = max_long_edge / max(h, w)
+    if scale >= 1:
+        return frame.copy()
+    return cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def apply_analysis(new_data, sent_boxes, current=True):
+    """
+    sent_boxes: {track id: box} when the frame was submitted, matched against
+    the returned box_2d. Labels stick to tracks, so they are kept even when a
+    newer frame was submitted meanwhile; only a current result replaces the panel.
+    """
+    labelled = tracker.label(sent_boxes, new_data.get("ingredients", []))
+    stats.count("labelled", labelled)
+    if current:
+        with state.lock:
+            state.payload = new_data
 
 
-def fetch_analysis(frame):
-    state.in_flight = True
-    try:
-        ok, img_encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+class AnalysisWorker:
+    """
+    One persistent thread posting frames to the server, fed by a one-slot
+    queue: a frame submitted while another waits replaces it. A result whose
+    frame was superseded while in flight still labels its tracks but isn't
+    shown in the recipe panel.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = None     # (generation, image, mosaic or None, tracked boxes, mosaic form fields)
+        self._gen = 0            # generation of the newest submitted frame
+        self.busy = False
+        self.sent = 0
+        self.superseded = 0      # frames replaced in the slot
+        self.stale = 0           # results kept for labels only, a newer frame was submitted
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def idle(self):
+        with self._cond:
+            return not self.busy and self._pending is None
+
+    def submit(self, frame, sent_boxes, known_labels=None):
+        """known_labels (a list) asks for a crop mosaic of sent_boxes instead of the whole frame."""
+        image, mosaic, form = downscale(frame), None, {}
+        if known_labels is not None and len(sent_boxes) <= MOSAIC_MAX_BOXES:
+            mosaic, tiles = build_mosaic(frame, list(sent_boxes.values()))
+            if tiles and mosaic.shape[0] * mosaic.shape[1] <= MOSAIC_MAX_AREA * image.shape[0] * image.shape[1]:
+                form = {"tiles": json.dumps(tiles), "known_labels": json.dumps(known_labels)}
+            else:
+                mosaic = None
+        with self._cond:
+            self._gen += 1
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = (self._gen, image, mosaic, sent_boxes, form)
+            self._cond.notify()
+
+    def pending_tracks(self):
+        """Track ids of the request waiting in the slot, if any."""
+        with self._cond:
+            return list(self._pending[3]) if self._pending is not None else []
+
+    def _current(self, gen):
+        with self._cond:
+            return gen == self._gen
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                (gen, image, mosaic, sent_boxes, form), self._pending = self._pending, None
+                self.busy = True
+            try:
+                self._process(gen, image, mosaic, sent_boxes, form)
+            except Exception as e:
+                print(f"Connection error: {e}")
+            finally:
+                with self._cond:
+                    self.busy = False
+
+    def _process(self, gen, image, mosaic, sent_boxes, form):
+        t0 = time.perf_counter()
+        ok, img_encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, UPLOAD_JPEG_QUALITY])
         if not ok:
             return
+        if mosaic is not None:
+            # the mosaic is only worth it when it actually uploads fewer bytes
+            ok, mosaic_encoded = cv2.imencode(".jpg", mosaic, [cv2.IMWRITE_JPEG_QUALITY, UPLOAD_JPEG_QUALITY])
+            if ok and len(mosaic_encoded) < len(img_encoded):
+                img_encoded = mosaic_encoded
+            else:
+                form = {}
+        stats.record("encode", (time.perf_counter() - t0) * 1000)
 
         files = {"file": ("f.jpg", img_encoded.tobytes(), "image/jpeg")}
-        resp = net_client.post(SERVER_URL, files=files)
-
-        if resp.status_code == 200:
-            new_data = resp.json()
+        t0 = time.perf_counter()
+        resp = net_client.post(SERVER_URL, files=files, data=form)
+        stats.record("upstream", (time.perf_counter() - t0) * 1000)
+        self.sent += 1
 
-            # stability/lock based on returned labels list
-            new_labels = sorted(
-                [i.get("label", "") for i in new_data.get("ingredients", []) if i.get("label")]
-            )
+        if resp.status_code != 200:
+            return
+        current = self._current(gen)
+        if not current:
+            with self._cond:
+                self.stale += 1
+        apply_analysis(resp.json(), sent_boxes, current)
 
-            if new_labels == state.last_labels and len(new_labels) > 0:
-                state.stable_hits += 1
-            else:
-                state.stable_hits = 0
-                state.is_locked = False
 
-            state.last_labels = new_labels
-            state.payload = new_data
+analysis = AnalysisWorker()
 
-            if state.stable_hits >= 3:
-                state.is_locked = True
 
-    except Exception as e:
-        print(f"Connection error: {e}")
-    finally:
-        state.in_flight = False
-
-
-def draw_ar_overlay(frame, yolo_norm_boxes, payload):
+def draw_ar_overlay(frame, tracks, payload):
     h, w = frame.shape[:2]
     panel_w = 350
 
     # Gemini labels (optional)
     gem_ings = payload.get("ingredients", [])
     gem_labels = [g.get("label", "") for g in gem_ings if g.get("label")]
+    # a mosaic answer only covers the new crops; list the tracked labels too
+    gem_labels += sorted({tr.label for tr in tracks if tr.label} - set(gem_labels))
 
-    # If Gemini returns same count as boxes, map by left->right
-    box_labels = []
-    if len(gem_labels) == len(yolo_norm_boxes) and len(yolo_norm_boxes) > 0:
-        boxes_with_idx = sorted(list(enumerate(yolo_norm_boxes)), key=lambda x: x[1][1])  # xmin
-        labels_sorted = sorted(gem_labels)
-        mapped = [""] * len(yolo_norm_boxes)
-        for k, (idx, _b) in enumerate(boxes_with_idx):
-            mapped[idx] = labels_sorted[k]
-        box_labels = mapped
-    else:
-        box_labels = [f"FOOD {i+1}" for i in range(len(yolo_norm_boxes))]
-
-    # Draw YOLO boxes continuously
-    for i, b in enumerate(yolo_norm_boxes):
-        ymin, xmin, ymax, xmax = b[:4]
+    # Draw tracked YOLO boxes continuously, with the label attached to the track
+    for tr in tracks:
+        ymin, xmin, ymax, xmax = tr.box
         l, t = int(xmin * w / 1000), int(ymin * h / 1000)
         r, bb = int(xmax * w / 1000), int(ymax * h / 1000)
 
-        cv2.rectangle(frame, (l, t), (r, bb), (0, 255, 0), 2)
-        label = box_labels[i].upper() if i < len(box_labels) else f"FOOD {i+1}"
+        color = (0, 255, 0) if tr.confirmed else (0, 160, 0)
+        cv2.rectangle(frame, (l, t), (r, bb), color, 2)
+        label = tr.label.upper() if tr.label else f"FOOD {tr.id}"
         cv2.putText(frame, label, (l, max(15, t - 10)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 0), 2)
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, color, 2)
 
     # Side panel
     overlay = frame.copy()
     cv2.rectangle(overlay, (w - panel_w, 0), (w, h), (0, 0, 0), -1)
     cv2.addWeighted(overlay, 0.60, frame, 0.40, 0, frame)
 
-    status_text = "LOCKED" if state.is_locked else "SCANNING..."
-    if state.in_flight:
+    labelled = sum(1 for tr in tracks if tr.label)
+    status_text = f"TRACKING {labelled}/{len(tracks)} LABELLED"
+    if analysis.busy:
         status_text += " (analyzing)"
 
     cv2.putText(frame, status_text, (w - panel_w + 15, 30),
@@ -210,86 +283,284 @@ def draw_ar_overlay(frame, yolo_norm_boxes, payload):
             y_cursor += 20
 
 
-def main():
-    print(f"Loading YOLO model: {YOLO_MODEL_ID}")
-    yolo = YOLO(YOLO_MODEL_ID)
+class StageStats:
+    """Smoothed per-stage latencies (ms) and rates (frames/s), shared by the threads."""
 
-    # Helpful debug (optional)
-    # try:
-    #     print("Model classes:", getattr(yolo, "names", None))
-    # except Exception:
-    #     pass
+    def __init__(self, alpha=STATS_SMOOTHING):
+        self.alpha = alpha
+        self.ms = {}
+        self.fps = {}
+        self.counts = {}
+        self._last_tick = {}
+        self._lock = threading.Lock()
 
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Could not open webcam")
-        return
+    def _ewma(self, table, key, value):
+        old = table.get(key)
+        table[key] = value if old is None else old + self.alpha * (value - old)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    def record(self, stage, ms):
+        with self._lock:
+            self._ewma(self.ms, stage, ms)
 
-        h, w = frame.shape[:2]
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
 
-        # YOLO inference every frame (continuous boxes)
-        try:
-            results = yolo.predict(
-                frame,
-                conf=YOLO_CONF,
-                iou=YOLO_IOU,
-                verbose=False,
-                device=YOLO_DEVICE
-            )
-        except Exception as e:
-            # If MPS fails for any reason, fall back to CPU automatically
-            if YOLO_DEVICE == "mps":
-                print(f"MPS failed ({e}); falling back to CPU.")
-                globals()["YOLO_DEVICE"] = "cpu"
-                results = yolo.predict(frame, conf=YOLO_CONF, iou=YOLO_IOU, verbose=False, device="cpu")
-            else:
-                raise
+    def tick(self, stage):
+        now = time.perf_counter()
+        with self._lock:
+            last = self._last_tick.get(stage)
+            self._last_tick[stage] = now
+            if last is not None and now > last:
+                self._ewma(self.fps, stage, 1.0 / (now - last))
 
-        r0 = results[0]
+    def lines(self):
+        with self._lock:
+            fps = " ".join(f"{k} {v:.0f}" for k, v in self.fps.items())
+            ms = " ".join(f"{k} {v:.0f}" for k, v in self.ms.items())
+            counts = " ".join(f"{k} {v}" for k, v in self.counts.items())
+        counts += f" sent {analysis.sent} superseded {analysis.superseded} stale {analysis.stale}"
+        return [f"FPS  {fps}  {counts}", f"MS   {ms}"]
 
-        boxes_xyxy = []
-        if r0.boxes is not None and len(r0.boxes) > 0:
-            confs = r0.boxes.conf.cpu().numpy().tolist()
-            xyxy = r0.boxes.xyxy.cpu().numpy().tolist()
 
-            idxs = sorted(range(len(confs)), key=lambda i: confs[i], reverse=True)[:MAX_BOXES]
-            for i in idxs:
-                x1, y1, x2, y2 = xyxy[i]
-                boxes_xyxy.append((x1, y1, x2, y2))
+stats = StageStats()
 
-        yolo_norm = yolo_boxes_to_norm(boxes_xyxy, w, h)
-        sig = boxes_signature(yolo_norm)
 
-        # Motion invalidates lock
-        if detect_significant_motion(frame):
-            state.is_locked = False
-            state.stable_hits = 0
+def draw_stats(frame):
+    h = frame.shape[0]
+    for i, line in enumerate(reversed(stats.lines())):
+        cv2.putText(frame, line, (10, h - 12 - 20 * i),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
 
-        # Gemini call decision (async)
-        now = time.time()
-        interval = LOCKED_REFRESH_SECONDS if state.is_locked else SCAN_INTERVAL_SECONDS
-        boxes_changed = (sig != state.last_boxes_sig) and (sig is not None)
-        time_ok = (now - state.last_call_time) > interval
 
-        if not state.in_flight and (time_ok or boxes_changed):
-            state.last_call_time = now
-            state.last_boxes_sig = sig
-            threading.Thread(target=fetch_analysis, args=(frame.copy(),), daemon=True).start()
+def run_yolo(yolo, frame):
+    """YOLO boxes for one frame, normalized to 0-1000 and capped at MAX_BOXES."""
+    h, w = frame.shape[:2]
+    try:
+        results = yolo.predict(
+            frame,
+            conf=YOLO_CONF,
+            iou=YOLO_IOU,
+            verbose=False,
+            device=YOLO_DEVICE
+        )
+    except Exception as e:
+        # If MPS fails for any reason, fall back to CPU automatically
+        if YOLO_DEVICE == "mps":
+            print(f"MPS failed ({e}); falling back to CPU.")
+            globals()["YOLO_DEVICE"] = "cpu"
+            results = yolo.predict(frame, conf=YOLO_CONF, iou=YOLO_IOU, verbose=False, device="cpu")
+        else:
+            raise
+
+    r0 = results[0]
+
+    boxes_xyxy = []
+    if r0.boxes is not None and len(r0.boxes) > 0:
+        confs = r0.boxes.conf.cpu().numpy().tolist()
+        xyxy = r0.boxes.xyxy.cpu().numpy().tolist()
+
+        idxs = sorted(range(len(confs)), key=lambda i: confs[i], reverse=True)[:MAX_BOXES]
+        for i in idxs:
+            x1, y1, x2, y2 = xyxy[i]
+            boxes_xyxy.append((x1, y1, x2, y2))
+
+    return yolo_boxes_to_norm(boxes_xyxy, w, h)
+
+
+def maybe_request_analysis(frame):
+    # Gemini call decision (async): only for confirmed tracks still without a
+    # label. While a request is in flight, only objects it doesn't cover yet
+    # replace the queued frame; moved or jittering boxes keep their track.
+    unlabeled = tracker.unlabeled(LABEL_RETRY_SECONDS)
+    if not unlabeled:
+        return
+    if analysis.idle or tracker.never_asked(unlabeled):
+        sent_boxes = tracker.mark_asked(unlabeled)
+        if UPLOAD_MOSAIC:
+            # this replaces a request still waiting in the slot: keep its tracks
+            ids = set(unlabeled) | set(analysis.pending_tracks())
+            analysis.submit(frame, {i: sent_boxes[i] for i in ids if i in sent_boxes}, tracker.known_labels())
+        else:
+            analysis.submit(frame, sent_boxes)
 
-        draw_ar_overlay(frame, yolo_norm, state.payload)
 
-        # small "in-flight" dot
-        if state.in_flight:
-            cv2.circle(frame, (30, 30), 8, (0, 255, 255), -1)
+def render(frame, tracks):
+    """Draws the overlay on `frame` and shows it; returns False when 'q' is pressed."""
+    draw_ar_overlay(frame, tracks, state.payload)
 
-        cv2.imshow("Recipefy AR (Food YOLO + Gemini)", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
+    # small "in-flight" dot
+    if analysis.busy:
+        cv2.circle(frame, (30, 30), 8, (0, 255, 255), -1)
+
+    if SHOW_STATS:
+        draw_stats(frame)
+
+    cv2.imshow("Recipefy AR (Food YOLO + Gemini)", frame)
+    return not (cv2.waitKey(1) & 0xFF == ord("q"))
+
+
+# ----------------------------
+# Pipelined mode
+# ----------------------------
+class LatestFrame:
+    """
+    Capture thread that keeps only the newest camera frame, so neither YOLO
+    nor the display ever works through a backlog of stale ones.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # not every backend honours this
+        self.frame = None
+        self.seq = 0
+        self.ts = 0.0
+        self.stopped = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped:
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            stats.record("capture", (time.perf_counter() - t0) * 1000)
+            stats.tick("camera")
+            with self._cond:
+                self.frame, self.seq, self.ts = frame, self.seq + 1, time.perf_counter()
+                self._cond.notify_all()
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def get(self, after_seq, timeout=1.0):
+        """(frame, seq, capture time) of a frame newer than after_seq; frame is None once stopped."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after_seq or self.stopped, timeout)
+            if self.seq <= after_seq:
+                return None, after_seq, 0.0
+            return self.frame, self.seq, self.ts
+
+    def stop(self):
+        self.stopped = True
+
+
+class InferenceWorker:
+    """Runs YOLO, the tracker and the label request decision on the newest frame, one at a time."""
+
+    def __init__(self, yolo, frames):
+        self.yolo = yolo
+        self.frames = frames
+        self.tracks = []
+        self.boxes_ts = 0.0   # capture time of the frame the tracks were updated from
+        self.stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        seq = 0
+        while not self.stopped:
+            frame, new_seq, ts = self.frames.get(seq)
+            if frame is None:
+                if self.frames.stopped:
+                    break
+                continue
+            if seq and new_seq > seq + 1:
+                stats.count("skipped", new_seq - seq - 1)   # frames YOLO never saw
+            seq = new_seq
+
+            t0 = time.perf_counter()
+            tracks = tracker.update(run_yolo(self.yolo, frame))
+            stats.record("yolo", (time.perf_counter() - t0) * 1000)
+            stats.tick("yolo")
+            self.tracks, self.boxes_ts = tracks, ts
+            maybe_request_analysis(frame)
+
+    def stop(self):
+        self.stopped = True
+
+
+def run_pipelined(cap, yolo):
+    frames = LatestFrame(cap).start()
+    worker = InferenceWorker(yolo, frames).start()
+    seq = 0
+    try:
+        while True:
+            frame, seq, ts = frames.get(seq)
+            if frame is None:
+                if frames.stopped:
+                    break
+                continue
+
+            t0 = time.perf_counter()
+            # The worker may still be reading this frame; draw on a copy.
+            keep_going = render(frame.copy(), worker.tracks)
+            now = time.perf_counter()
+            stats.record("render", (now - t0) * 1000)
+            stats.record("latency", (now - ts) * 1000)              # capture -> on screen
+            stats.record("box_age", (now - worker.boxes_ts) * 1000)  # how old the drawn boxes are
+            stats.tick("display")
+            if not keep_going:
+                break
+    finally:
+        worker.stop()
+        frames.stop()
+
+
+def run_serial(cap, yolo):
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
             break
+        t1 = time.perf_counter()
+
+        # YOLO inference every frame (continuous boxes)
+        tracks = tracker.update(run_yolo(yolo, frame))
+        t2 = time.perf_counter()
+        maybe_request_analysis(frame)
+
+        keep_going = render(frame, tracks)
+        now = time.perf_counter()
+        stats.record("capture", (t1 - t0) * 1000)
+        stats.record("yolo", (t2 - t1) * 1000)
+        stats.record("render", (now - t2) * 1000)
+        stats.record("latency", (now - t1) * 1000)
+        stats.tick("display")
+        if not keep_going:
+            break
+
+
+def main():
+    print(f"Loading YOLO model: {YOLO_MODEL_ID}")
+    yolo = YOLO(YOLO_MODEL_ID)
+
+    # Helpful debug (optional)
+    # try:
+    #     print("Model classes:", getattr(yolo, "names", None))
+    # except Exception:
+    #     pass
+
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        print("Could not open webcam")
+        return
+
+    analysis.start()
+
+    # cv2.imshow stays on the main thread (required on macOS).
+    if PIPELINED:
+        run_pipelined(cap, yolo)
+    else:
+        run_serial(cap, yolo)
 
     cap.release()
     cv2.destroyAllWindows()